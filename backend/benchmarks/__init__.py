@@ -0,0 +1,7 @@
+"""
+Benchmark helpers for the helpdesk backend.
+
+Nothing in here is imported by the application itself; the management
+commands in tickets/management/commands/benchmark_*.py drive it against a
+throwaway test database.
+"""
@@ -0,0 +1,232 @@
+import json
+import platform
+import random
+import statistics
+import subprocess
+import threading
+import time
+from pathlib import Path
+
+import django
+from django.db import connection, connections
+
+from .scenarios import SCENARIOS
+from .transport import Recorder
+from .utils import percentile
+
+# ---------------------------
+# Load runner and reports
+# ---------------------------
+#
+# run_load() drives the role scenarios from --concurrency threads until a
+# session count or a time budget runs out. summarize() turns the samples
+# into a JSON-serializable report (per-endpoint p50/p95/p99 and throughput,
+# plus the commit and scale it was measured at) that compare() can diff
+# against a report saved from another commit.
+
+METRICS = ('p50', 'p95', 'p99', 'throughput')
+
+
+def run_load(users, make_transport, mix, sessions=None, duration=None, concurrency=1, seed=42,
+             pool=10, scenarios=SCENARIOS):
+    """
+    Run scenario sessions until `sessions` have started or `duration`
+    seconds have passed (whichever is set; both means whichever comes first).
+
+    users maps each role in mix to the accounts to act as; up to `pool` of
+    each are picked and every thread logs them in through make_transport
+    (recorder, account) before the clock starts, so logins are not timed.
+    scenarios maps each role to its session (READ_SCENARIOS for read-only
+    load). Returns (recorder, wall-clock seconds).
+    """
+    roles = [role for role, weight in mix.items() if weight > 0]
+    weights = [mix[role] for role in roles]
+    missing = [role for role in roles if not users.get(role)]
+    if missing:
+        raise ValueError(f"No users to run the {', '.join(missing)} scenario as")
+    picker = random.Random(seed)
+    accounts = {role: picker.sample(list(users[role]), min(pool, len(users[role]))) for role in roles}
+
+    lock = threading.Lock()
+    started = 0
+    start = deadline = None
+    recorders = [Recorder() for _ in range(concurrency)]
+    failures = []
+
+    def start_clock():
+        nonlocal start, deadline
+        start = time.perf_counter()
+        deadline = start + duration if duration else None
+
+    # Runs once every thread has logged in, before any of them continues
+    ready = threading.Barrier(concurrency, action=start_clock)
+
+    def claim():
+        nonlocal started
+        if deadline is not None and time.perf_counter() >= deadline:
+            return False
+        with lock:
+            if sessions is not None and started >= sessions:
+                return False
+            started += 1
+            return True
+
+    def log_in(recorder):
+        return {role: [make_transport(recorder, account) for account in accounts[role]] for role in roles}
+
+    def worker(n, transports):
+        rng = random.Random(seed + n)
+        try:
+            while claim():
+                role = rng.choices(roles, weights)[0]
+                session, _ = scenarios[role]
+                session(rng.choice(transports[role]), rng)
+        except Exception as e:
+            failures.append(e)
+
+    def thread_main(n):
+        try:
+            try:
+                transports = log_in(recorders[n])
+            except Exception as e:
+                failures.append(e)
+                ready.abort()
+                return
+            try:
+                ready.wait()
+            except threading.BrokenBarrierError:
+                return
+            worker(n, transports)
+        finally:
+            connection.close()
+
+    if concurrency == 1:
+        # No thread: keep using the caller's database connection
+        transports = log_in(recorders[0])
+        start_clock()
+        worker(0, transports)
+    else:
+        threads = [threading.Thread(target=thread_main, args=(n,), daemon=True) for n in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    if failures:
+        raise failures[0]
+    elapsed = time.perf_counter() - start
+
+    merged = Recorder()
+    for recorder in recorders:
+        merged.merge(recorder)
+    return merged, elapsed
+
+
+def _latency(samples):
+    return {
+        'p50': statistics.median(samples) if samples else 0.0,
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'mean': statistics.fmean(samples) if samples else 0.0,
+    }
+
+
+def git_revision():
+    """
+    Short commit hash of the checkout, with '-dirty' for local changes,
+    or None outside a git work tree.
+    """
+    cwd = Path(__file__).resolve().parent
+    try:
+        revision = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=cwd,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=cwd,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f'{revision}-dirty' if dirty else revision
+
+
+def summarize(recorder, elapsed, **meta):
+    """
+    Build the report dict; meta (scale, transport, concurrency...) is
+    stored alongside the commit, database vendor and versions.
+    """
+    endpoints = {}
+    for label in sorted(recorder.samples):
+        samples = recorder.samples[label]
+        endpoints[label] = {
+            'requests': len(samples),
+            'errors': recorder.errors.get(label, 0),
+            'throughput': len(samples) / elapsed if elapsed else 0.0,
+            **_latency(samples),
+        }
+    everything = [sample for samples in recorder.samples.values() for sample in samples]
+    return {
+        'meta': {
+            'revision': git_revision(),
+            'database': connections['default'].vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            **meta,
+        },
+        'total': {
+            'requests': len(everything),
+            'errors': sum(recorder.errors.values()),
+            'seconds': elapsed,
+            'throughput': len(everything) / elapsed if elapsed else 0.0,
+            **_latency(everything),
+        },
+        'endpoints': endpoints,
+    }
+
+
+def format_report(report):
+    """
+    Render a report as a fixed-width table, one line per endpoint.
+    """
+    header = f"{'endpoint':<42} {'reqs':>7} {'err':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}"
+    lines = [header, '-' * len(header)]
+    rows = list(report['endpoints'].items()) + [('TOTAL', report['total'])]
+    for label, row in rows:
+        lines.append(
+            f"{label:<42} {row['requests']:>7} {row['errors']:>5} {row['p50']:>8.2f} "
+            f"{row['p95']:>8.2f} {row['p99']:>8.2f} {row['throughput']:>8.1f}"
+        )
+    return lines
+
+
+def compare(report, baseline, threshold=10.0):
+    """
+    Diff two reports endpoint by endpoint. Returns (rows, regressions):
+    rows are (label, metric, before, after, change %), regressions the rows
+    where latency grew or throughput fell by more than threshold percent.
+    """
+    rows, regressions = [], []
+    current = dict(report['endpoints'], TOTAL=report['total'])
+    previous = dict(baseline['endpoints'], TOTAL=baseline['total'])
+    for label in sorted(set(current) & set(previous)):
+        for metric in METRICS:
+            before, after = previous[label][metric], current[label][metric]
+            change = (after - before) / before * 100 if before else 0.0
+            row = (label, metric, before, after, change)
+            rows.append(row)
+            worse = -change if metric == 'throughput' else change
+            if worse > threshold:
+                regressions.append(row)
+    return rows, regressions
+
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
@@ -0,0 +1,155 @@
+from tickets.models import Ticket
+
+# ---------------------------
+# Scripted user sessions
+# ---------------------------
+#
+# One function per role, each running a single visit the way the frontend
+# would: list first, then drill into tickets picked from the response. Labels
+# use the URL pattern, not the concrete path, so samples for different
+# tickets land in the same report row.
+
+STATUSES = [choice for choice, _ in Ticket.STATUS_CHOICES]
+
+
+def _pick(rng, body):
+    results = (body or {}).get('results') or []
+    return rng.choice(results)['id'] if results else None
+
+
+def customer_session(http, rng):
+    """
+    A customer checks their tickets, reads one, sometimes replies, and
+    now and then opens a new ticket.
+    """
+    http.request('GET /api/me/', 'GET', '/api/me/')
+    _, body = http.request('GET /api/tickets/', 'GET', '/api/tickets/')
+    ticket_id = _pick(rng, body)
+    if ticket_id:
+        http.request('GET /api/tickets/<id>/', 'GET', f'/api/tickets/{ticket_id}/')
+        http.request('GET /api/tickets/<id>/comments/', 'GET', f'/api/tickets/{ticket_id}/comments/')
+        if rng.random() < 0.2:
+            http.request('POST /api/tickets/<id>/comments/add/', 'POST',
+                         f'/api/tickets/{ticket_id}/comments/add/',
+                         {'content': 'Any update on this?'})
+    if rng.random() < 0.1:
+        http.request('GET /api/tickets/search/', 'GET', '/api/tickets/search/', params={'q': 'synthetic'})
+    if rng.random() < 0.1:
+        http.request('POST /api/tickets/create/', 'POST', '/api/tickets/create/', {
+            'title': 'Benchmark ticket',
+            'description': 'Created by the load test',
+            'priority': rng.choice(['Low', 'Medium', 'High']),
+        })
+
+
+def agent_session(http, rng):
+    """
+    A Support Team agent works their queue: list (sometimes by activity),
+    open a ticket, leave a note and move its status along.
+    """
+    params = {'sort': 'activity'} if rng.random() < 0.3 else None
+    _, body = http.request('GET /api/tickets/', 'GET', '/api/tickets/', params=params)
+    ticket_id = _pick(rng, body)
+    if ticket_id:
+        http.request('GET /api/tickets/<id>/', 'GET', f'/api/tickets/{ticket_id}/')
+        http.request('GET /api/tickets/<id>/comments/', 'GET', f'/api/tickets/{ticket_id}/comments/')
+        if rng.random() < 0.3:
+            http.request('POST /api/tickets/<id>/comments/add/', 'POST',
+                         f'/api/tickets/{ticket_id}/comments/add/',
+                         {'content': 'Looking into it', 'is_internal': rng.random() < 0.5})
+        if rng.random() < 0.2:
+            http.request('PATCH /api/tickets/<id>/', 'PATCH', f'/api/tickets/{ticket_id}/',
+                         {'status': rng.choice(STATUSES)})
+    if rng.random() < 0.2:
+        http.request('GET /api/tickets/changes/', 'GET', '/api/tickets/changes/')
+
+
+def admin_session(http, rng):
+    """
+    IT Staff on the admin dashboard: stats, the unassigned queue, agent
+    workload, the user list and the occasional ticket.
+    """
+    http.request('GET /api/admin/dashboard/', 'GET', '/api/admin/dashboard/')
+    http.request('GET /api/admin/assignments/', 'GET', '/api/admin/assignments/')
+    http.request('GET /api/admin/workload/', 'GET', '/api/admin/workload/')
+    _, body = http.request('GET /api/tickets/', 'GET', '/api/tickets/')
+    if rng.random() < 0.3:
+        http.request('GET /api/admin/users/', 'GET', '/api/admin/users/')
+    ticket_id = _pick(rng, body)
+    if ticket_id and rng.random() < 0.3:
+        http.request('GET /api/tickets/<id>/', 'GET', f'/api/tickets/{ticket_id}/')
+
+
+# role -> (session function, key of the users in seed_dataset()'s result)
+SCENARIOS = {
+    'customer': (customer_session, 'customers'),
+    'agent': (agent_session, 'agents'),
+    'admin': (admin_session, 'it_staff'),
+}
+
+
+
+def customer_reads(http, rng):
+    """
+    customer_session without the writes: the ticket list, then one ticket
+    and its comments.
+    """
+    _, body = http.request('GET /api/tickets/', 'GET', '/api/tickets/')
+    ticket_id = _pick(rng, body)
+    if ticket_id:
+        http.request('GET /api/tickets/<id>/', 'GET', f'/api/tickets/{ticket_id}/')
+        http.request('GET /api/tickets/<id>/comments/', 'GET', f'/api/tickets/{ticket_id}/comments/')
+
+
+def agent_reads(http, rng):
+    """
+    agent_session without the writes: the queue (sometimes by activity),
+    then one ticket and its comments.
+    """
+    params = {'sort': 'activity'} if rng.random() < 0.3 else None
+    _, body = http.request('GET /api/tickets/', 'GET', '/api/tickets/', params=params)
+    ticket_id = _pick(rng, body)
+    if ticket_id:
+        http.request('GET /api/tickets/<id>/', 'GET', f'/api/tickets/{ticket_id}/')
+        http.request('GET /api/tickets/<id>/comments/', 'GET', f'/api/tickets/{ticket_id}/comments/')
+
+
+def admin_reads(http, rng):
+    """
+    IT Staff glancing at the dashboard and the newest tickets.
+    """
+    http.request('GET /api/admin/dashboard/', 'GET', '/api/admin/dashboard/')
+    _, body = http.request('GET /api/tickets/', 'GET', '/api/tickets/')
+    ticket_id = _pick(rng, body)
+    if ticket_id:
+        http.request('GET /api/tickets/<id>/', 'GET', f'/api/tickets/{ticket_id}/')
+
+
+# Same roles, only the endpoints with async variants (ASYNC_READ_VIEWS), so
+# runs leave the database as they found it
+READ_SCENARIOS = {
+    'customer': (customer_reads, 'customers'),
+    'agent': (agent_reads, 'agents'),
+    'admin': (admin_reads, 'it_staff'),
+}
+
+DEFAULT_MIX = 'customer=70,agent=25,admin=5'
+
+
+def parse_mix(value):
+    """
+    Parse 'customer=70,agent=25,admin=5' into {'customer': 70, ...}.
+    """
+    mix = {}
+    for part in value.split(','):
+        role, _, weight = part.partition('=')
+        role = role.strip()
+        if role not in SCENARIOS:
+            raise ValueError(f"Unknown scenario {role!r}; choose from {', '.join(SCENARIOS)}")
+        try:
+            mix[role] = float(weight) if weight else 1.0
+        except ValueError:
+            raise ValueError(f"Invalid weight for {role!r}: {weight!r}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("At least one scenario needs a positive weight")
+    return mix
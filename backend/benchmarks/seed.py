@@ -0,0 +1,131 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils import timezone
+
+from tickets import search
+from tickets.activity import reconcile_ticket_activity
+from tickets.bulk import preserve_timestamps
+from tickets.models import Category, Ticket, TicketComment
+from tickets.roles import IT_STAFF, SUPPORT_TEAM
+from tickets.stats import recompute_ticket_stats
+
+CATEGORY_NAMES = ['Hardware', 'Software', 'Network', 'Access', 'Email', 'Other']
+PRIORITIES = [choice for choice, _ in Ticket.PRIORITY_CHOICES]
+STATUSES = [choice for choice, _ in Ticket.STATUS_CHOICES]
+# Every seeded account logs in with this password
+PASSWORD = 'benchmark'
+
+
+def seed_dataset(tickets=10000, customers=None, agents=None, it_staff=2,
+                 comments_per_ticket=2, unassigned_ratio=0.3, batch_size=2000, seed=42):
+    """
+    Bulk-load a synthetic helpdesk: customers, Support Team agents, IT Staff,
+    categories, tickets spread over the last year and comments on them.
+
+    Returns a dict with the created users per role so scenarios can log in
+    as a realistic customer/agent/admin.
+    """
+    rng = random.Random(seed)
+    customers = customers or max(10, tickets // 50)
+    agents = agents or max(3, tickets // 500)
+    password = make_password(PASSWORD)
+
+    support_group, _ = Group.objects.get_or_create(name=SUPPORT_TEAM)
+    it_group, _ = Group.objects.get_or_create(name=IT_STAFF)
+
+    def make_users(prefix, count, **flags):
+        users = [
+            User(username=f'{prefix}{i}', email=f'{prefix}{i}@example.com', password=password, **flags)
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        return list(User.objects.filter(username__startswith=prefix).order_by('id'))
+
+    customer_users = make_users('bench-customer-', customers)
+    agent_users = make_users('bench-agent-', agents)
+    # IT Staff doubles as the superusers who manage accounts (api/admin/users/)
+    it_users = make_users('bench-it-', it_staff, is_staff=True, is_superuser=True)
+    support_group.user_set.add(*agent_users)
+    it_group.user_set.add(*it_users)
+
+    Category.objects.bulk_create([Category(name=name) for name in CATEGORY_NAMES])
+    categories = list(Category.objects.filter(name__in=CATEGORY_NAMES))
+
+    now = timezone.now()
+    ticket_ids = []
+    with preserve_timestamps(Ticket, TicketComment):
+        for start in range(0, tickets, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, tickets)):
+                created_at = now - timedelta(seconds=rng.randint(0, 365 * 24 * 3600))
+                assignee = None if rng.random() < unassigned_ratio else rng.choice(agent_users)
+                batch.append(Ticket(
+                    title=f'Ticket {i}',
+                    description=f'Synthetic ticket {i} for benchmarking',
+                    category=rng.choice(categories),
+                    priority=rng.choice(PRIORITIES),
+                    status=rng.choice(STATUSES),
+                    created_by=rng.choice(customer_users),
+                    assigned_to=assignee,
+                    created_at=created_at,
+                    updated_at=created_at,
+                    last_activity_at=created_at,
+                ))
+            Ticket.objects.bulk_create(batch, batch_size=batch_size)
+            ticket_ids.extend(t.id for t in batch if t.id is not None)
+
+        if not ticket_ids:
+            # Backends without RETURNING on bulk insert
+            ticket_ids = list(Ticket.objects.values_list('id', flat=True))
+
+        comments = []
+        tickets_to_comment = (
+            ticket
+            for start in range(0, len(ticket_ids) if comments_per_ticket else 0, batch_size)
+            for ticket in Ticket.objects.filter(id__in=ticket_ids[start:start + batch_size])
+            .only('id', 'created_at', 'created_by_id')
+        )
+        for ticket in tickets_to_comment:
+            for n in range(comments_per_ticket):
+                created_at = ticket.created_at + timedelta(minutes=rng.randint(1, 7 * 24 * 60))
+                internal = n % 3 == 2
+                comments.append(TicketComment(
+                    ticket_id=ticket.id,
+                    author_id=rng.choice(agent_users).id if internal or n % 2 else ticket.created_by_id,
+                    content=f'Comment {n} on ticket {ticket.id}',
+                    is_internal=internal,
+                    created_at=created_at,
+                    updated_at=created_at,
+                ))
+            if len(comments) >= batch_size:
+                TicketComment.objects.bulk_create(comments, batch_size=batch_size)
+                comments = []
+        TicketComment.objects.bulk_create(comments, batch_size=batch_size)
+
+    # bulk_create skipped the signals that keep the comment counters
+    for start in range(0, len(ticket_ids) if comments_per_ticket else 0, batch_size):
+        reconcile_ticket_activity(Ticket.objects.filter(id__in=ticket_ids[start:start + batch_size]))
+
+    return {
+        'customers': customer_users,
+        'agents': agent_users,
+        'it_staff': it_users,
+        'categories': categories,
+        'ticket_ids': ticket_ids,
+    }
+
+
+def rebuild_derived():
+    """
+    Rebuild the TicketStat counters and the search index, which
+    seed_dataset()'s bulk_create bypasses. Only needed when the benchmark
+    reads them (dashboards, search).
+    """
+    recompute_ticket_stats()
+    if search.is_supported():
+        with transaction.atomic():
+            search.rebuild_index()
@@ -0,0 +1,128 @@
+import json
+import time
+from http.client import HTTPConnection, HTTPSConnection, RemoteDisconnected
+from urllib.parse import urlencode, urlsplit
+
+from rest_framework.test import APIClient
+
+from tickets.authentication import ClaimsRefreshToken
+
+
+class Recorder:
+    """
+    Latency samples (ms) and error counts per endpoint label. One per load
+    thread; merge() combines them afterwards so nothing is shared while timing.
+    """
+
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    def add(self, label, elapsed_ms, ok):
+        self.samples.setdefault(label, []).append(elapsed_ms)
+        if not ok:
+            self.errors[label] = self.errors.get(label, 0) + 1
+
+    def merge(self, other):
+        for label, samples in other.samples.items():
+            self.samples.setdefault(label, []).extend(samples)
+        for label, count in other.errors.items():
+            self.errors[label] = self.errors.get(label, 0) + count
+
+
+class Transport:
+    """
+    Issues API calls as one user and times them. Scenarios only see
+    request(); subclasses decide whether that goes through the Django test
+    client or a real HTTP connection.
+    """
+
+    def __init__(self, recorder):
+        self.recorder = recorder
+
+    def request(self, label, method, path, data=None, params=None):
+        """
+        Call the endpoint and return (status_code, decoded JSON or None).
+        label groups samples in the report, e.g. 'GET /api/tickets/<id>/'.
+        """
+        start = time.perf_counter()
+        status, body = self.send(method, path, data, params)
+        self.recorder.add(label, (time.perf_counter() - start) * 1000, status < 400)
+        return status, body
+
+    def send(self, method, path, data, params):
+        raise NotImplementedError
+
+
+class TestClientTransport(Transport):
+    """
+    In-process requests through the full middleware and JWT authentication
+    stack, without sockets or a server.
+    """
+
+    def __init__(self, recorder, user):
+        super().__init__(recorder)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+
+    def send(self, method, path, data, params):
+        call = getattr(self.client, method.lower())
+        if method == 'GET':
+            response = call(path, params or {})
+        else:
+            response = call(path, data or {}, format='json')
+        body = None
+        if response.get('Content-Type', '').startswith('application/json'):
+            body = json.loads(response.content or b'null')
+        return response.status_code, body
+
+
+class HTTPTransport(Transport):
+    """
+    Requests against a running server (runserver, gunicorn, ...) over one
+    kept-alive connection per user, logged in with a real username and
+    password through /api/token/, or with an access token from an earlier
+    login (self.token).
+    """
+
+    def __init__(self, recorder, base_url, username, password, timeout=30, token=None):
+        super().__init__(recorder)
+        url = urlsplit(base_url)
+        connection_class = HTTPSConnection if url.scheme == 'https' else HTTPConnection
+        self.connect = lambda: connection_class(url.netloc, timeout=timeout)
+        self.prefix = url.path.rstrip('/')
+        self.connection = self.connect()
+        self.headers = {'Accept': 'application/json'}
+        if token is None:
+            status, body = self.send('POST', '/api/token/', {'username': username, 'password': password}, None)
+            if status != 200:
+                raise RuntimeError(f"Login as {username!r} failed with HTTP {status}")
+            token = body['access']
+        self.token = token
+        self.headers['Authorization'] = f"Bearer {token}"
+
+    def send(self, method, path, data, params):
+        target = self.prefix + path + (f'?{urlencode(params)}' if params else '')
+        headers = dict(self.headers)
+        payload = None
+        if method != 'GET':
+            payload = json.dumps(data or {}).encode()
+            headers['Content-Type'] = 'application/json'
+        try:
+            response = self._roundtrip(method, target, payload, headers)
+        except (ConnectionError, RemoteDisconnected):
+            # The server closed the kept-alive connection; reconnect once
+            self.connection.close()
+            self.connection = self.connect()
+            response = self._roundtrip(method, target, payload, headers)
+        content = response.read()
+        body = None
+        if response.getheader('Content-Type', '').startswith('application/json'):
+            body = json.loads(content or b'null')
+        if response.getheader('Connection', '').lower() == 'close':
+            self.connection.close()
+        return response.status, body
+
+    def _roundtrip(self, method, target, payload, headers):
+        self.connection.request(method, target, body=payload, headers=headers)
+        return self.connection.getresponse()
@@ -0,0 +1,87 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.urls import URLPattern, URLResolver, get_resolver
+from rest_framework.views import APIView
+
+
+@contextmanager
+def throwaway_database(verbosity=0):
+    """
+    Run the block against a fresh test database (same engine as the
+    configured one) and drop it afterwards, so benchmarks never touch real data.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=verbosity, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+
+
+def percentile(samples, pct):
+    """
+    Nearest-rank percentile of a list of numbers.
+    """
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def time_call(fn, repeat=20, warmup=2):
+    """
+    Call fn repeatedly and return latency stats in milliseconds.
+    """
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        'p50': statistics.median(samples),
+        'p95': percentile(samples, 95),
+        'p99': percentile(samples, 99),
+        'mean': statistics.fmean(samples),
+    }
+
+
+def analyze():
+    """
+    Refresh planner statistics after a bulk load.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def _api_views(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _api_views(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            view = getattr(pattern.callback, 'cls', None)
+            if isinstance(view, type) and issubclass(view, APIView):
+                yield view
+
+
+@contextmanager
+def authentication(*classes):
+    """
+    Run the block with every DRF view in the URLconf authenticating through
+    `classes` instead of DEFAULT_AUTHENTICATION_CLASSES, which views copy
+    when they are defined.
+    """
+    views = set(_api_views(get_resolver().url_patterns))
+    saved = {view: view.authentication_classes for view in views}
+    try:
+        for view in views:
+            view.authentication_classes = list(classes)
+        yield
+    finally:
+        for view, original in saved.items():
+            view.authentication_classes = original
@@ -51,8 +51,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Prometheus request/query metrics (see tickets/metrics.py)
+    'tickets.metrics.MetricsMiddleware',
+    # Inert unless REQUEST_PROFILING is on (see tickets/profiling.py)
+    'tickets.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise, async-capable so ASGI requests stay on the event loop (see tickets/static.py)
+    'tickets.static.StaticFilesMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -85,18 +90,35 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Seconds a connection is kept open between requests. Under ASGI every
+# request runs its queries in a thread of its own, so a kept connection is
+# never reused and stays open until garbage-collected: config/asgi.py
+# defaults this to 0.
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 600))
+
 DATABASES = {
     'default': dj_database_url.config(
         default=os.getenv('DATABASE_URL', 'sqlite:///' + str(BASE_DIR / 'db.sqlite3')),
-        conn_max_age=600,
+        conn_max_age=DB_CONN_MAX_AGE,
         conn_health_checks=True,
     )
 }
 
+# SQLite: take the write lock when a transaction starts and wait for it,
+# rather than failing with "database is locked" when a read transaction
+# tries to upgrade while another connection (e.g. a job worker) writes
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {}).update(
+        transaction_mode='IMMEDIATE',
+        timeout=20,
+    )
+
 
 REST_FRAMEWORK = {
+    # Builds request.user from the token's role claims, without a query
+    # (see tickets/authentication.py)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'tickets.authentication.StatelessJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
@@ -105,7 +127,89 @@ REST_FRAMEWORK = {
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
-    'REFRESH_TOKEN_LIFETIME': timedelta(days=1)
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    # Tokens carry user id, username, is_superuser, groups and a version;
+    # refreshing re-reads them from the database
+    'TOKEN_OBTAIN_SERIALIZER': 'tickets.authentication.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'tickets.authentication.TokenRefreshSerializer',
+    'TOKEN_USER_CLASS': 'tickets.authentication.ClaimsUser',
+}
+
+# Cache
+# LocMemCache is per-process; point CACHE_BACKEND/CACHE_LOCATION at a shared
+# backend (e.g. Redis or Memcached) when running several gunicorn workers so
+# invalidations reach every worker.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'helpdeskpro'),
+    }
+}
+
+# Seconds a user's group membership stays cached (see tickets/roles.py)
+ROLE_CACHE_TIMEOUT = int(os.getenv('ROLE_CACHE_TIMEOUT', 300))
+
+# Cache alias and lifetime for serialized ticket fragments (see tickets/fragments.py)
+TICKET_FRAGMENT_CACHE = os.getenv('TICKET_FRAGMENT_CACHE', 'default')
+TICKET_FRAGMENT_TIMEOUT = int(os.getenv('TICKET_FRAGMENT_TIMEOUT', 3600))
+
+# Real-time events (see tickets/events.py). The in-memory broker only reaches
+# clients connected to the same ASGI process.
+TICKET_EVENT_BROKER = os.getenv('TICKET_EVENT_BROKER', 'tickets.events.InMemoryBroker')
+TICKET_EVENTS_HEARTBEAT = int(os.getenv('TICKET_EVENTS_HEARTBEAT', 15))
+
+# Serve the ticket list, ticket detail (GET), comments and admin dashboard
+# from async views (see tickets/views.py). Only worth it under an ASGI
+# server, e.g. gunicorn config.asgi:application -k uvicorn_worker.UvicornWorker
+ASYNC_READ_VIEWS = os.getenv('ASYNC_READ_VIEWS', 'False') == 'True'
+
+# Auto-assign new tickets to the least-loaded agent (see tickets/assignment.py);
+# weighted counts High/Critical tickets as more load than Low/Medium
+TICKET_AUTO_ASSIGN = os.getenv('TICKET_AUTO_ASSIGN', 'False') == 'True'
+TICKET_ASSIGNMENT_WEIGHTED = os.getenv('TICKET_ASSIGNMENT_WEIGHTED', 'True') == 'True'
+
+# SLA scanner (manage.py sla_scanner): how often it runs and how long before
+# a deadline a ticket is flagged as at risk
+SLA_SCAN_INTERVAL = int(os.getenv('SLA_SCAN_INTERVAL', 60))
+SLA_WARNING_MINUTES = int(os.getenv('SLA_WARNING_MINUTES', 60))
+
+# Background jobs (see tickets/jobs.py), processed by manage.py run_workers.
+# JOBS_EAGER runs them right after commit in the web process instead, for
+# development without a worker.
+JOBS_EAGER = os.getenv('JOBS_EAGER', 'False') == 'True'
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))
+JOB_RETRY_BASE = int(os.getenv('JOB_RETRY_BASE', 10))
+JOB_RETRY_MAX = int(os.getenv('JOB_RETRY_MAX', 3600))
+JOB_LOCK_TIMEOUT = int(os.getenv('JOB_LOCK_TIMEOUT', 600))
+JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', 7))
+
+# Per-request profiling (see tickets/profiling.py): Server-Timing header and
+# a tickets.profiling log line for a sample of requests, with the slowest
+# query fingerprints
+REQUEST_PROFILING = os.getenv('REQUEST_PROFILING', 'False') == 'True'
+REQUEST_PROFILING_SAMPLE_RATE = float(os.getenv('REQUEST_PROFILING_SAMPLE_RATE', 1.0))
+REQUEST_PROFILING_SLOW_QUERIES = int(os.getenv('REQUEST_PROFILING_SLOW_QUERIES', 5))
+# Query fingerprints each process totals across profiled requests; /metrics
+# exports the slowest of them
+REQUEST_PROFILING_FINGERPRINTS = int(os.getenv('REQUEST_PROFILING_FINGERPRINTS', 200))
+
+# Prometheus metrics at /metrics (see tickets/metrics.py). With several
+# gunicorn workers, also export PROMETHEUS_MULTIPROC_DIR (an empty writable
+# directory, read by prometheus_client itself) so every worker's counters
+# are merged; gunicorn.conf.py clears it on start. METRICS_TOKEN, if set, is
+# required as "Authorization: Bearer <token>".
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'tickets.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
 }
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -160,11 +264,15 @@ CORS_ALLOW_HEADERS = [
     'authorization',
     'content-type',
     'dnt',
+    'if-modified-since',
+    'if-none-match',
     'origin',
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
 ]
+# Let the frontend read ETags for conditional GETs
+CORS_EXPOSE_HEADERS = ['ETag']
 CORS_ALLOW_METHODS = [
     'DELETE',
     'GET',
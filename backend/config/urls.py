@@ -14,19 +14,31 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib.auth import views as auth_views
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from tickets.views import (
-    ticket_list_api, ticket_create_api, ticket_detail_api, 
+    ticket_list_api, ticket_search_api, ticket_create_api, ticket_detail_api,
+    ticket_bulk_update_api, ticket_export_api, ticket_changes_api,
     add_ticket_comment, ticket_comments_api,
     admin_dashboard, admin_users, admin_user_detail,
     admin_categories, admin_category_detail,
-    admin_ticket_assignments, admin_assign_ticket
+    admin_ticket_assignments, admin_assign_ticket,
+    ticket_events_stream, me_api,
+    admin_auto_assign, admin_workload, admin_jobs, admin_job_detail,
+    metrics_view,
+    ticket_list_api_async, ticket_detail_api_async, ticket_comments_api_async,
+    admin_dashboard_async,
 )
 
 
+def read_view(sync_view, async_view):
+    # Async read views only pay off under an ASGI server (see tickets/views.py)
+    return async_view if settings.ASYNC_READ_VIEWS else sync_view
+
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('accounts/login/', auth_views.LoginView.as_view(), name='login'),
@@ -35,19 +47,33 @@ urlpatterns = [
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     
+    path('api/me/', me_api, name='api_me'),
+    
     # Ticket APIs
-    path('api/tickets/', ticket_list_api, name='api_ticket_list'),
+    path('api/tickets/', read_view(ticket_list_api, ticket_list_api_async), name='api_ticket_list'),
+    path('api/tickets/search/', ticket_search_api, name='api_ticket_search'),
     path('api/tickets/create/', ticket_create_api, name='api_ticket_create'),
-    path('api/tickets/<int:ticket_id>/', ticket_detail_api, name='api_ticket_detail'),
-    path('api/tickets/<int:ticket_id>/comments/', ticket_comments_api, name='api_ticket_comments'),
+    path('api/tickets/events/', ticket_events_stream, name='api_ticket_events'),
+    path('api/tickets/changes/', ticket_changes_api, name='api_ticket_changes'),
+    path('api/tickets/export/', ticket_export_api, name='api_ticket_export'),
+    path('api/tickets/bulk/', ticket_bulk_update_api, name='api_ticket_bulk_update'),
+    path('api/tickets/<int:ticket_id>/', read_view(ticket_detail_api, ticket_detail_api_async), name='api_ticket_detail'),
+    path('api/tickets/<int:ticket_id>/comments/', read_view(ticket_comments_api, ticket_comments_api_async), name='api_ticket_comments'),
     path('api/tickets/<int:ticket_id>/comments/add/', add_ticket_comment, name='api_add_comment'),
     
     # Admin APIs
-    path('api/admin/dashboard/', admin_dashboard, name='api_admin_dashboard'),
+    path('api/admin/dashboard/', read_view(admin_dashboard, admin_dashboard_async), name='api_admin_dashboard'),
     path('api/admin/users/', admin_users, name='api_admin_users'),
     path('api/admin/users/<int:user_id>/', admin_user_detail, name='api_admin_user_detail'),
     path('api/admin/categories/', admin_categories, name='api_admin_categories'),
     path('api/admin/categories/<int:category_id>/', admin_category_detail, name='api_admin_category_detail'),
     path('api/admin/assignments/', admin_ticket_assignments, name='api_admin_assignments'),
+    path('api/admin/assignments/auto/', admin_auto_assign, name='api_admin_auto_assign'),
+    path('api/admin/workload/', admin_workload, name='api_admin_workload'),
+    path('api/admin/jobs/', admin_jobs, name='api_admin_jobs'),
+    path('api/admin/jobs/<int:job_id>/', admin_job_detail, name='api_admin_job_detail'),
     path('api/admin/tickets/<int:ticket_id>/assign/', admin_assign_ticket, name='api_admin_assign_ticket'),
+
+    # Prometheus scrape target
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -0,0 +1,24 @@
+# gunicorn reads this file from the working directory (backend/).
+#
+# With PROMETHEUS_MULTIPROC_DIR exported, each worker keeps its metrics in
+# files in that directory and /metrics merges them (see tickets/metrics.py).
+# Files from a previous run would be merged too, so the master clears them
+# on start, and a worker's live gauges are dropped when it exits.
+
+import glob
+import os
+
+from prometheus_client import multiprocess
+
+
+def on_starting(server):
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        os.makedirs(path, exist_ok=True)
+        for name in glob.glob(os.path.join(path, '*.db')):
+            os.remove(name)
+
+
+def child_exit(server, worker):
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,98 @@
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Ticket, TicketComment
+
+# ---------------------------
+# Denormalized comment activity
+# ---------------------------
+#
+# Ticket.comment_count, public_comment_count and last_activity_at follow
+# TicketComment through relative UPDATEs (count = count + 1), so concurrent
+# comments on one ticket never lose an increment and list endpoints read
+# three columns instead of counting comments per row. Ticket edits save
+# with update_fields from Ticket.edit_fields(), which leaves the counters
+# out for the same reason.
+#
+# Writes that bypass signals (bulk_create in imports and seeding) call
+# reconcile_ticket_activity(); so does the reconcile_ticket_activity
+# command, to repair drift.
+
+RECONCILE_BATCH = 500
+
+
+def comment_added_values(count, public_count, at):
+    """
+    update() kwargs for count new comments (public_count of them public)
+    written at the given time.
+    """
+    values = {
+        'comment_count': F('comment_count') + count,
+        'last_activity_at': Greatest(F('last_activity_at'), Value(at)),
+    }
+    if public_count:
+        values['public_comment_count'] = F('public_comment_count') + public_count
+    return values
+
+
+def record_comment_added(comment):
+    Ticket.objects.filter(id=comment.ticket_id).update(
+        **comment_added_values(1, 0 if comment.is_internal else 1, comment.created_at)
+    )
+
+
+def record_comment_removed(comment):
+    # Clamped at zero so a counter that already drifted cannot fail the
+    # delete on the PositiveIntegerField check
+    values = {'comment_count': Greatest(F('comment_count') - 1, Value(0))}
+    if not comment.is_internal:
+        values['public_comment_count'] = Greatest(F('public_comment_count') - 1, Value(0))
+    Ticket.objects.filter(id=comment.ticket_id).update(**values)
+
+
+def record_visibility_change(comment):
+    """
+    A saved comment switched between internal and public.
+    """
+    change = -1 if comment.is_internal else 1
+    Ticket.objects.filter(id=comment.ticket_id).update(
+        public_comment_count=Greatest(F('public_comment_count') + change, Value(0))
+    )
+
+
+def _actual(comment_model):
+    comments = comment_model.objects.filter(ticket_id=OuterRef('pk')).order_by().values('ticket_id')
+    count = comments.annotate(n=Count('id')).values('n')
+    public = comments.filter(is_internal=False).annotate(n=Count('id')).values('n')
+    latest = comments.annotate(latest=Max('created_at')).values('latest')
+    return {
+        'actual_count': Coalesce(Subquery(count), Value(0), output_field=IntegerField()),
+        'actual_public': Coalesce(Subquery(public), Value(0), output_field=IntegerField()),
+        'actual_latest': Subquery(latest),
+    }
+
+
+def reconcile_ticket_activity(queryset, comment_model=TicketComment):
+    """
+    Recount comments for the tickets in queryset and move last_activity_at
+    up to their latest comment where it lags behind. Only rows that
+    disagree are written; returns how many were.
+    """
+    drifted = list(
+        queryset.annotate(**_actual(comment_model)).filter(
+            ~Q(comment_count=F('actual_count'))
+            | ~Q(public_comment_count=F('actual_public'))
+            | Q(last_activity_at__lt=F('actual_latest'))
+        ).values_list('id', flat=True)
+    )
+    actual = _actual(comment_model)
+    updated = 0
+    for start in range(0, len(drifted), RECONCILE_BATCH):
+        updated += queryset.model.objects.filter(id__in=drifted[start:start + RECONCILE_BATCH]).update(
+            comment_count=actual['actual_count'],
+            public_comment_count=actual['actual_public'],
+            last_activity_at=Greatest(
+                F('last_activity_at'), Coalesce(actual['actual_latest'], F('last_activity_at'))
+            ),
+        )
+    return updated
@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Ticket, Category, TicketComment
+from .models import Ticket, Category, TicketComment, SLAPolicy, Job
+from .search import MAX_RESULTS, is_supported, search_ticket_ids
 
 #use the settings in the class below to display the Ticket model.
 @admin.register(Ticket)
@@ -13,7 +14,9 @@ class TicketAdmin(admin.ModelAdmin):
         'status',
         'created_at',
         'assigned_to',
-        'created_at'
+        'created_at',
+        'due_at',
+        'sla_state'
     )
 
     
@@ -21,7 +24,8 @@ class TicketAdmin(admin.ModelAdmin):
     list_filter = (
         'category',
         'priority',
-        'status'
+        'status',
+        'sla_state'
     )
 
     #The Search Bar
@@ -33,6 +37,23 @@ class TicketAdmin(admin.ModelAdmin):
     #The Sorting ordering of the tickets
     ordering = ('-created_at',)
 
+    #The comment counters only move through activity.py's relative UPDATEs
+    readonly_fields = ('comment_count', 'public_comment_count')
+
+    #Edits write only the changed fields (see Ticket.edit_fields())
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        if form.changed_data:
+            obj.save(update_fields=obj.edit_fields(*form.changed_data))
+
+    #Search through the full-text index instead of LIKE '%term%' scans
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or not is_supported():
+            return super().get_search_results(request, queryset, search_term)
+        ids = search_ticket_ids(search_term, queryset, limit=MAX_RESULTS)
+        return queryset.filter(id__in=ids), False
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_displat = ('name',)
@@ -44,4 +65,18 @@ class TicketCommentAdmin(admin.ModelAdmin):
     list_filter = ('is_internal', 'created_at')
     search_fields = ('content', 'ticket__title', 'author__username')
     ordering = ('-created_at',)
-    readonly_fields = ('created_at', 'updated_at')
\ No newline at end of file
+    readonly_fields = ('created_at', 'updated_at')
+
+#Deadlines of existing tickets are recomputed with `manage.py sla_scanner --recompute`
+@admin.register(SLAPolicy)
+class SLAPolicyAdmin(admin.ModelAdmin):
+    list_display = ('name', 'priority', 'category', 'first_response_minutes', 'resolution_minutes', 'is_active')
+    list_filter = ('priority', 'category', 'is_active')
+    ordering = ('priority', 'category')
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'status', 'attempts', 'run_at', 'finished_at')
+    list_filter = ('status', 'name')
+    ordering = ('-id',)
+    readonly_fields = ('created_at', 'finished_at', 'locked_by', 'locked_at', 'result', 'last_error')
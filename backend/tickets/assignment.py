@@ -0,0 +1,125 @@
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, IntegerField, Value, When
+
+from .bulk import bulk_update_tickets
+from .models import Ticket, TicketStat
+from .roles import support_agents
+from .stats import OPEN_PRIORITY, OPEN_STATUSES
+
+# ---------------------------
+# Workload-aware auto-assignment
+# ---------------------------
+#
+# An agent's load is read from the open_priority counters that stats.py
+# keeps per assignee (open tickets by priority), so nothing is recounted:
+# one query for the eligible agents and one indexed read of their counter
+# rows. Picking the least-loaded agent is a heap pop; assigning a batch
+# pushes the agent back with the ticket's weight added.
+
+PRIORITY_WEIGHTS = {'Low': 1, 'Medium': 2, 'High': 3, 'Critical': 5}
+
+MAX_AUTO_ASSIGN = 5000
+
+
+def is_weighted():
+    return getattr(settings, 'TICKET_ASSIGNMENT_WEIGHTED', True)
+
+
+def ticket_weight(priority, weighted=True):
+    return PRIORITY_WEIGHTS.get(priority, 1) if weighted else 1
+
+
+def agent_workloads(weighted=True):
+    """
+    Return {agent_id: {"username", "open_tickets", "by_priority", "load"}}
+    for every active Support Team member.
+    """
+    agents = {
+        agent_id: {'username': username, 'open_tickets': 0, 'by_priority': {}, 'load': 0}
+        for agent_id, username in support_agents().filter(is_active=True).values_list('id', 'username')
+    }
+    rows = TicketStat.objects.filter(
+        scope=TicketStat.SCOPE_ASSIGNEE, dimension=OPEN_PRIORITY, owner_id__in=list(agents)
+    ).values_list('owner_id', 'value', 'count')
+    for agent_id, priority, count in rows:
+        if count <= 0:
+            continue
+        workload = agents[agent_id]
+        workload['open_tickets'] += count
+        workload['by_priority'][priority] = count
+        workload['load'] += count * ticket_weight(priority, weighted)
+    return agents
+
+
+class WorkloadHeap:
+    """
+    Min-heap of (load, agent_id); ties go to the lower id so results are
+    deterministic.
+    """
+
+    def __init__(self, workloads):
+        self._heap = [(workload['load'], agent_id) for agent_id, workload in workloads.items()]
+        heapq.heapify(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap)
+
+    def assign(self, weight):
+        """
+        Return the least-loaded agent id and charge weight to it.
+        """
+        load, agent_id = self._heap[0]
+        heapq.heapreplace(self._heap, (load + weight, agent_id))
+        return agent_id
+
+
+def pick_agent(priority='Medium'):
+    """
+    Least-loaded eligible agent id for a new ticket, or None if there are no
+    Support Team members.
+    """
+    weighted = is_weighted()
+    heap = WorkloadHeap(agent_workloads(weighted))
+    if not heap:
+        return None
+    return heap.assign(ticket_weight(priority, weighted))
+
+
+def assign_unassigned(user, limit=MAX_AUTO_ASSIGN):
+    """
+    Assign open, unassigned tickets to the least-loaded agents, highest
+    priority and oldest first, in one transaction. Writes go through
+    bulk_update_tickets() (one UPDATE per agent), which keeps the counters,
+    change log, events and caches in step.
+
+    Returns a list of {"id", "assigned_to"}.
+    """
+    weighted = is_weighted()
+    priority_order = Case(
+        *[When(priority=name, then=Value(weight)) for name, weight in PRIORITY_WEIGHTS.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+    with transaction.atomic():
+        heap = WorkloadHeap(agent_workloads(weighted))
+        if not heap:
+            return []
+
+        tickets = (
+            Ticket.objects.filter(assigned_to__isnull=True, status__in=OPEN_STATUSES)
+            .order_by(priority_order.desc(), 'created_at', 'id')
+            .values_list('id', 'priority')[:limit]
+        )
+        plan = [(ticket_id, heap.assign(ticket_weight(priority, weighted))) for ticket_id, priority in tickets]
+
+        by_agent = defaultdict(list)
+        for ticket_id, agent_id in plan:
+            by_agent[agent_id].append(ticket_id)
+        for agent_id, ticket_ids in by_agent.items():
+            bulk_update_tickets(user, ticket_ids, {'assigned_to': agent_id})
+
+    return [{"id": ticket_id, "assigned_to": agent_id} for ticket_id, agent_id in plan]
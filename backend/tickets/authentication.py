@@ -0,0 +1,180 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import serializers
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer as BaseTokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import UserTokenVersion
+from .roles import get_group_names, set_group_names
+
+# ---------------------------
+# Stateless JWT authentication
+# ---------------------------
+#
+# simplejwt's JWTAuthentication loads the User row on every API request and
+# the role checks then look up its groups. Tokens issued here carry what
+# authorisation needs (user id, username, is_superuser, group names) plus
+# the user's token version, and StatelessJWTAuthentication builds
+# request.user from the access token alone: no query per request.
+#
+# Claims are fixed when the token is minted, so anything that changes them
+# bumps the user's version (signals.py): group membership, is_superuser,
+# username, deactivation and password changes. Two things follow:
+#
+# - The new version goes into the cache; access tokens stamped with an older
+#   one are refused with a 401 and the client refreshes. With a per-process
+#   cache only the worker that made the change knows, and other workers
+#   accept the old claims until the token expires (ACCESS_TOKEN_LIFETIME).
+# - /api/token/refresh/ always re-reads the user, so the new access token
+#   has current roles. Deactivation and password changes also set
+#   revoked_at, and refresh tokens issued before it are refused.
+#
+# Views get a ClaimsUser: use user.id (e.g. created_by_id=user.id) rather
+# than passing it where a User instance is expected.
+
+VERSION_CLAIM = 'ver'
+
+
+def _version_key(user_id):
+    return f'tickets:token-version:{user_id}'
+
+
+def token_state(user_id):
+    """
+    (version, revoked_at) for user_id; (0, None) until the first bump.
+    """
+    state = UserTokenVersion.objects.filter(user_id=user_id).values_list('version', 'revoked_at').first()
+    return state or (0, None)
+
+
+def bump_token_versions(user_ids, revoke=False):
+    """
+    Mark the claims in the given users' tokens stale. With revoke, their
+    refresh tokens stop working as well (deactivation, password change).
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    now = timezone.now()
+    changes = {'version': F('version') + 1}
+    if revoke:
+        changes['revoked_at'] = now
+    existing = set(
+        UserTokenVersion.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+    if existing:
+        UserTokenVersion.objects.filter(user_id__in=existing).update(**changes)
+    UserTokenVersion.objects.bulk_create([
+        UserTokenVersion(user_id=user_id, version=1, revoked_at=now if revoke else None)
+        for user_id in user_ids - existing
+    ], ignore_conflicts=True)
+    # Only publish committed versions: a rolled-back bump left in the cache
+    # would refuse every token minted afterwards
+    transaction.on_commit(lambda: publish_token_versions(user_ids))
+
+
+def publish_token_versions(user_ids):
+    versions = UserTokenVersion.objects.filter(user_id__in=user_ids).values_list('user_id', 'version')
+    # Older tokens have expired by the time the entry does
+    timeout = int(api_settings.ACCESS_TOKEN_LIFETIME.total_seconds())
+    cache.set_many({_version_key(user_id): version for user_id, version in versions}, timeout)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token carrying the role claims; its access_token copies them.
+    """
+
+    @classmethod
+    def for_user(cls, user, version=None):
+        token = super().for_user(user)
+        token['username'] = user.username
+        token['is_superuser'] = user.is_superuser
+        token['groups'] = sorted(get_group_names(user))
+        token[VERSION_CLAIM] = token_state(user.pk)[0] if version is None else version
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    request.user for API calls: id, username, is_superuser and groups, read
+    from the token. Group names seed the roles.py memo, so role checks run
+    without a query.
+    """
+
+    def __init__(self, token):
+        super().__init__(token)
+        set_group_names(self, token.get('groups', ()))
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def pk(self):
+        return self.id
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    def get_user(self, validated_token):
+        user = self._claims_user(validated_token)
+        self._check_version(validated_token, cache.get(_version_key(user.id)))
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for plain async views, which DRF cannot wrap: the same
+        checks with the version read through the async cache API. Returns
+        (user, token), or None when there are no credentials.
+        """
+        header = self.get_header(request)
+        raw_token = None if header is None else self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = self._claims_user(validated_token)
+        self._check_version(validated_token, await cache.aget(_version_key(user.id)))
+        return user, validated_token
+
+    def _claims_user(self, validated_token):
+        if VERSION_CLAIM not in validated_token:
+            # Minted before role claims existed; refreshing replaces it
+            raise InvalidToken("Token has no role claims; refresh it")
+        return ClaimsUser(validated_token)
+
+    def _check_version(self, validated_token, latest):
+        if latest is not None and validated_token[VERSION_CLAIM] < latest:
+            raise InvalidToken("User roles have changed; refresh the token")
+
+
+class TokenObtainPairSerializer(BaseTokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """
+    Mint a new access token from the user's current state rather than the
+    claims copied from the refresh token.
+    """
+    refresh = serializers.CharField()
+    access = serializers.CharField(read_only=True)
+
+    def validate(self, attrs):
+        refresh = ClaimsRefreshToken(attrs['refresh'])
+        user = User.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM], is_active=True).first()
+        if user is None:
+            raise AuthenticationFailed("No active account found for the given token.", "no_active_account")
+        version, revoked_at = token_state(user.pk)
+        # iat has whole seconds; a token minted in the second of the
+        # revocation survives it
+        if revoked_at is not None and refresh['iat'] < int(revoked_at.timestamp()):
+            raise AuthenticationFailed("Token has been revoked.", "token_revoked")
+        return {'access': str(ClaimsRefreshToken.for_user(user, version).access_token)}
@@ -0,0 +1,231 @@
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from . import activity, events, search, sla, stats
+from . import changes as change_log
+from .fragments import invalidate_details
+from .models import Category, Ticket, TicketComment
+from .roles import is_support_agent, is_support_staff
+
+# ---------------------------
+# Bulk write helpers
+# ---------------------------
+
+
+@contextmanager
+def preserve_timestamps(*models):
+    """
+    Temporarily switch off auto_now / auto_now_add on the given models so
+    bulk_create() keeps the created_at/updated_at values we pass in instead
+    of stamping every row with the current time.
+    """
+    saved = []
+    for model in models:
+        for field in model._meta.concrete_fields:
+            if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+                saved.append((field, field.auto_now, field.auto_now_add))
+                field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in saved:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+# ---------------------------
+# Bulk ticket updates
+# ---------------------------
+
+MAX_BULK_TICKETS = 5000
+
+BULK_FIELDS = ('status', 'priority', 'assigned_to', 'category')
+
+UPDATED = 'updated'
+NOT_FOUND = 'not_found'
+FORBIDDEN = 'forbidden'
+
+
+class BulkUpdateError(ValueError):
+    pass
+
+
+def _is_id(value):
+    # bool is an int subclass; JSON true/false are not ids
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _validate_changes(changes):
+    """
+    Turn the request's changes dict into model field values for update().
+    """
+    if not isinstance(changes, dict):
+        raise BulkUpdateError("changes must be an object")
+    unknown = set(changes) - set(BULK_FIELDS)
+    if unknown:
+        raise BulkUpdateError(f"Unsupported fields: {', '.join(sorted(unknown))}")
+
+    values = {}
+    if 'status' in changes:
+        if not isinstance(changes['status'], str) or changes['status'] not in dict(Ticket.STATUS_CHOICES):
+            raise BulkUpdateError("Invalid status")
+        values['status'] = changes['status']
+    if 'priority' in changes:
+        if not isinstance(changes['priority'], str) or changes['priority'] not in dict(Ticket.PRIORITY_CHOICES):
+            raise BulkUpdateError("Invalid priority")
+        values['priority'] = changes['priority']
+    if 'assigned_to' in changes:
+        assignee = changes['assigned_to']
+        if assignee is not None and not _is_id(assignee):
+            raise BulkUpdateError("assigned_to must be a user id or null")
+        if assignee is not None and not User.objects.filter(id=assignee).exists():
+            raise BulkUpdateError("Assignee not found")
+        values['assigned_to_id'] = assignee
+    if 'category' in changes:
+        category = changes['category']
+        if category is not None and not _is_id(category):
+            raise BulkUpdateError("category must be a category id or null")
+        if category is not None and not Category.objects.filter(id=category).exists():
+            raise BulkUpdateError("Category not found")
+        values['category_id'] = category
+    return values
+
+
+def bulk_update_tickets(user, ticket_ids, changes=None, comment=None):
+    """
+    Apply the same field changes (and optionally one shared comment) to many
+    tickets in a single transaction with set-based UPDATE/INSERT statements.
+
+    Permissions follow ticket_detail_api's PATCH rules per ticket. Since
+    update()/bulk_create() skip model signals, the stats counters, search
+    index, change log and fragment cache are maintained here explicitly.
+
+    Returns a list of {"id", "result"} in request order.
+    """
+    if not isinstance(ticket_ids, list) or not all(_is_id(ticket_id) for ticket_id in ticket_ids):
+        raise BulkUpdateError("ids must be a list of ticket ids")
+    ticket_ids = list(dict.fromkeys(ticket_ids))
+    if not ticket_ids:
+        raise BulkUpdateError("ids is required")
+    if len(ticket_ids) > MAX_BULK_TICKETS:
+        raise BulkUpdateError(f"At most {MAX_BULK_TICKETS} tickets per request")
+
+    values = _validate_changes({} if changes is None else changes)
+    if comment is not None and not isinstance(comment, dict):
+        raise BulkUpdateError("comment must be an object")
+    content = comment.get('content', '') if comment else ''
+    if not isinstance(content, str):
+        raise BulkUpdateError("Comment content must be a string")
+    content = content.strip()
+    if comment and not content:
+        raise BulkUpdateError("Comment content is required")
+    if comment and not isinstance(comment.get('is_internal', False), bool):
+        raise BulkUpdateError("Comment is_internal must be a boolean")
+    if not values and not content:
+        raise BulkUpdateError("Nothing to change")
+
+    results = {}
+    with transaction.atomic():
+        rows = _locked_rows(Ticket.objects.filter(id__in=ticket_ids))
+
+        support_staff = is_support_staff(user)
+        # Support agents can only update tickets assigned to them
+        agent_only = is_support_agent(user) and not user.is_superuser
+        allowed = []
+        for ticket_id in ticket_ids:
+            row = rows.get(ticket_id)
+            if row is None:
+                results[ticket_id] = NOT_FOUND
+            elif not support_staff or (agent_only and row['assigned_to_id'] != user.id):
+                results[ticket_id] = FORBIDDEN
+            else:
+                results[ticket_id] = UPDATED
+                allowed.append(ticket_id)
+
+        if allowed:
+            _apply_changes(rows, allowed, values, user, content, bool(comment and comment.get('is_internal')))
+
+    return [{"id": ticket_id, "result": results[ticket_id]} for ticket_id in ticket_ids]
+
+
+def _locked_rows(queryset):
+    """
+    id -> stored values of the fields the derived data depends on, with the
+    rows locked until the surrounding transaction ends.
+    """
+    return {
+        row['id']: row
+        for row in queryset.select_for_update().values('id', 'category_id', *stats.TRACKED_FIELDS)
+    }
+
+
+def _apply_changes(rows, ticket_ids, values, user=None, content='', is_internal=False):
+    """
+    Write the field values (and the comment, if any, authored by user) to
+    the locked rows, then bring the counters, SLA deadlines, search index,
+    change log, fragment cache and events in line.
+    """
+    comments = []
+    if content:
+        # request.user comes from the token (see authentication.py);
+        # published comments need the author row for its username
+        author = User.objects.get(pk=user.id)
+        comments = TicketComment.objects.bulk_create([
+            TicketComment(ticket_id=ticket_id, author=author, content=content,
+                          is_internal=is_internal)
+            for ticket_id in ticket_ids
+        ], batch_size=1000)
+    # auto_now_add stamps each comment as it is inserted; the tickets
+    # take the latest stamp so no new comment is newer than their
+    # last_activity_at
+    now = max((created.created_at for created in comments), default=None) or timezone.now()
+    touched = dict(values, last_activity_at=now) if values else {}
+    if content:
+        touched.update(activity.comment_added_values(1, int(not is_internal), now))
+    Ticket.objects.filter(id__in=ticket_ids).update(updated_at=now, **touched)
+
+    # New priority or category means new SLA deadlines
+    retargeted = [
+        ticket_id for ticket_id in ticket_ids
+        if any(rows[ticket_id][field] != values[field]
+               for field in ('priority', 'category_id') if field in values)
+    ]
+    if retargeted:
+        sla.refresh_deadlines(Ticket.objects.filter(id__in=retargeted))
+
+    tracked = {k: v for k, v in values.items() if k in stats.TRACKED_FIELDS}
+    if tracked:
+        stats.record_ticket_changes(
+            (rows[ticket_id], {**rows[ticket_id], **tracked}) for ticket_id in ticket_ids
+        )
+
+    if content:
+        if not is_internal:
+            search.index_tickets(*ticket_ids)
+            sla.record_first_response(ticket_ids, user.id, now)
+        for created_comment in comments:
+            events.publish_comment(created_comment)
+
+    change_log.record_ticket_changes(
+        ticket_ids, {ticket_id: rows[ticket_id]['assigned_to_id'] for ticket_id in ticket_ids}
+    )
+    if values:
+        events.publish_ticket_changes(
+            ticket_ids, {ticket_id: rows[ticket_id]['assigned_to_id'] for ticket_id in ticket_ids}
+        )
+    invalidate_details(*ticket_ids)
+
+
+def unassign_tickets(queryset):
+    """
+    Unassign the tickets in the queryset the way a bulk update would. Used
+    before their assignee is deleted: on_delete=SET_NULL is a queryset
+    UPDATE that would bypass the derived data. Returns the ticket ids.
+    """
+    with transaction.atomic():
+        rows = _locked_rows(queryset)
+        if rows:
+            _apply_changes(rows, list(rows), {'assigned_to_id': None})
+    return list(rows)
@@ -0,0 +1,116 @@
+from datetime import timedelta
+
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from .models import Ticket, TicketChange
+
+# ---------------------------
+# Delta sync change log
+# ---------------------------
+#
+# Every ticket write appends a TicketChange row; its auto-increment id is
+# the sync cursor. A client polls with ?since=<cursor> and gets the tickets
+# touched after it: still-visible ones as fresh summaries, the rest
+# (deleted, or reassigned away from an agent) as tombstone ids.
+#
+# Sequence ids are allocated before commit, so a slow transaction can make
+# a lower id visible after a higher one was already served. The cursor we
+# hand back therefore only advances past changes older than SETTLE_SECONDS;
+# newer ones are sent again on the next poll, which is harmless because
+# applying a change is idempotent.
+
+MAX_CHANGES = 500
+SETTLE_SECONDS = 5
+
+
+def record_ticket_change(ticket_id, created_by_id, assigned_to_id, previous_assigned_to_id=None):
+    if previous_assigned_to_id == assigned_to_id:
+        previous_assigned_to_id = None
+    TicketChange.objects.create(
+        ticket_id=ticket_id,
+        created_by_id=created_by_id,
+        assigned_to_id=assigned_to_id,
+        previous_assigned_to_id=previous_assigned_to_id,
+    )
+
+
+def record_ticket_changes(ticket_ids, previous_assignees=None):
+    """
+    Log a change for each ticket from its current row; previous_assignees
+    maps ticket id -> assignee before the change for reassignments.
+    """
+    previous_assignees = previous_assignees or {}
+    rows = Ticket.objects.filter(id__in=ticket_ids).values('id', 'created_by_id', 'assigned_to_id')
+    TicketChange.objects.bulk_create([
+        TicketChange(
+            ticket_id=row['id'],
+            created_by_id=row['created_by_id'],
+            assigned_to_id=row['assigned_to_id'],
+            previous_assigned_to_id=(
+                previous_assignees.get(row['id'])
+                if previous_assignees.get(row['id']) != row['assigned_to_id'] else None
+            ),
+        )
+        for row in rows.iterator()
+    ], batch_size=1000)
+
+
+def latest_sequence():
+    return TicketChange.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+
+def scope_filter(user, admin, agent):
+    """
+    Change rows a caller may see, mirroring the ticket list's role rules.
+    """
+    if admin:
+        return Q()
+    if agent:
+        return Q(assigned_to_id=user.id) | Q(previous_assigned_to_id=user.id)
+    return Q(created_by_id=user.id)
+
+
+def is_expired(since):
+    """
+    True when changes after since are no longer all in the log (pruned, or
+    the cursor is from another database) and the client must reload.
+    """
+    bounds = TicketChange.objects.aggregate(first=Min('id'), last=Max('id'))
+    if bounds['first'] is None:
+        return since > 0
+    return since < bounds['first'] - 1 or since > bounds['last']
+
+
+def changed_ticket_ids(scope, since, limit=MAX_CHANGES):
+    """
+    Return (ticket ids touched after since, next cursor, has_more) for the
+    change rows matching scope.
+    """
+    rows = list(
+        TicketChange.objects.filter(scope, id__gt=since)
+        .order_by('id')
+        .values_list('id', 'ticket_id', 'recorded_at')[:limit + 1]
+    )
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    cursor = since
+    settled = timezone.now() - timedelta(seconds=SETTLE_SECONDS)
+    for seq, _, recorded_at in rows:
+        # Always move forward when the page is full so bursts cannot stall
+        if recorded_at > settled and not has_more:
+            break
+        cursor = seq
+
+    ticket_ids = list(dict.fromkeys(ticket_id for _, ticket_id, _ in rows))
+    return ticket_ids, cursor, has_more
+
+
+def prune_changes(older_than):
+    """
+    Delete change rows recorded before older_than; clients with an older
+    cursor get reset=true and reload their list.
+    """
+    deleted, _ = TicketChange.objects.filter(recorded_at__lt=older_than).delete()
+    return deleted
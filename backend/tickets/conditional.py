@@ -0,0 +1,136 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .models import TicketComment
+from .roles import is_admin, is_support_agent
+
+# ---------------------------
+# Conditional GET (ETag)
+# ---------------------------
+#
+# Each cacheable response gets a strong ETag hashed from a cheap version
+# probe: row count plus max(updated_at) of the tickets and comments it is
+# built from, evaluated with aggregate() before anything is serialized.
+# Ticket lists only render comment counts, so their comment half comes from
+# the denormalized counters and last_activity_at in the same aggregate.
+# A matching If-None-Match returns 304 straight away.
+#
+# There is no Last-Modified: deleting a row that is not the newest, a
+# ticket leaving the caller's scope or a username change all leave
+# max(updated_at) where it was, so If-Modified-Since would answer 304 for
+# a response that did change. Only the ETag sees the row counts.
+#
+# Rendered usernames can change without touching either table, so a
+# cache-held generation number is mixed into every tag; signals.py bumps it
+# on username changes. If the entry is evicted, get_or_set() seeds a new,
+# time-based value, which only ever makes tags miss.
+#
+# The a-prefixed variants do the same through the async ORM and cache API
+# for the async read views.
+
+GENERATION_KEY = 'tickets:etag-generation'
+
+
+def generation():
+    return cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+async def ageneration():
+    return await cache.aget_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def bump_generation():
+    cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def _list_probe(tickets, include_internal):
+    counter = 'comment_count' if include_internal else 'public_comment_count'
+    return tickets.order_by(), {
+        'count': Count('id'), 'latest': Max('updated_at'),
+        'comments': Sum(counter), 'activity': Max('last_activity_at'),
+    }
+
+
+def _list_version(probe):
+    return (
+        {'count': probe['count'], 'latest': probe['latest']},
+        {'count': probe['comments'] or 0, 'latest': probe['activity']},
+    )
+
+
+def ticket_list_version(tickets, include_internal=True):
+    tickets, aggregates = _list_probe(tickets, include_internal)
+    return _list_version(tickets.aggregate(**aggregates))
+
+
+async def aticket_list_version(tickets, include_internal=True):
+    tickets, aggregates = _list_probe(tickets, include_internal)
+    return _list_version(await tickets.aaggregate(**aggregates))
+
+
+def _visible_comments(ticket, include_internal):
+    comments = TicketComment.objects.filter(ticket_id=ticket.id)
+    if not include_internal:
+        comments = comments.filter(is_internal=False)
+    return comments
+
+
+def ticket_version(ticket, include_internal=True):
+    comment_probe = _visible_comments(ticket, include_internal).aggregate(
+        count=Count('id'), latest=Max('updated_at')
+    )
+    return {'count': 1, 'latest': ticket.updated_at}, comment_probe
+
+
+async def aticket_version(ticket, include_internal=True):
+    comment_probe = await _visible_comments(ticket, include_internal).aaggregate(
+        count=Count('id'), latest=Max('updated_at')
+    )
+    return {'count': 1, 'latest': ticket.updated_at}, comment_probe
+
+
+def response_etag(request, version):
+    """
+    Build the ETag for this request's URL, caller and version.
+    """
+    return _etag(request, version, generation())
+
+
+async def aresponse_etag(request, version):
+    return _etag(request, version, await ageneration())
+
+
+def _etag(request, version, generation):
+    ticket_probe, comment_probe = version
+    parts = [
+        request.get_full_path(),
+        request.user.pk,
+        is_admin(request.user),
+        is_support_agent(request.user),
+        generation,
+        ticket_probe['count'], ticket_probe['latest'],
+        comment_probe['count'], comment_probe['latest'],
+    ]
+    return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+
+def not_modified(request, etag):
+    """
+    Return a 304 response if the client's ETag still matches, else None.
+    """
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        add_etag(response, etag)
+    return response
+
+
+def add_etag(response, etag):
+    response['ETag'] = etag
+    # Responses depend on the Authorization header: never share them, and
+    # always revalidate before reuse
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
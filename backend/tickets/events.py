@@ -0,0 +1,253 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Ticket
+
+# ---------------------------
+# Real-time ticket events
+# ---------------------------
+#
+# Ticket and comment writes are published (after commit) to channels that
+# mirror ticket_list_api's visibility rules:
+#
+# - STAFF_CHANNEL: IT staff / admins, who see every ticket
+# - assignee:<id>: the support agent a ticket is (or was just) assigned to
+# - creator:<id>: the customer who opened the ticket; never gets internal
+#   comments
+#
+# The SSE view subscribes each connection to the one channel for its role,
+# so fan-out cost is proportional to the recipients, not to the number of
+# open connections.
+#
+# The broker is chosen by settings.TICKET_EVENT_BROKER. InMemoryBroker only
+# reaches connections in the current process; a multi-process deployment
+# plugs in a backend whose publish() goes over a shared transport (e.g.
+# Redis pub/sub) and whose listener hands messages to dispatch().
+
+STAFF_CHANNEL = 'staff'
+
+TICKET_CREATED = 'ticket.created'
+TICKET_UPDATED = 'ticket.updated'
+TICKET_ASSIGNED = 'ticket.assigned'
+COMMENT_CREATED = 'comment.created'
+
+DEFAULT_QUEUE_SIZE = 100
+
+
+def creator_channel(user_id):
+    return f'creator:{user_id}'
+
+
+def assignee_channel(user_id):
+    return f'assignee:{user_id}'
+
+
+def channel_for(user, admin, agent):
+    if admin:
+        return STAFF_CHANNEL
+    if agent:
+        return assignee_channel(user.id)
+    return creator_channel(user.id)
+
+
+class Subscription:
+    """
+    One connection's bounded event queue, bound to the event loop it was
+    created on. A consumer that falls maxsize events behind is marked
+    overflowed and should close; the client resyncs via the changes feed.
+    """
+
+    def __init__(self, channel, maxsize=DEFAULT_QUEUE_SIZE):
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.overflowed = False
+
+    def deliver(self, event):
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class InMemoryBroker:
+    """
+    Process-local fan-out. publish() may be called from any thread (sync
+    views run in a worker thread under ASGI); delivery is handed to each
+    subscriber's loop with one call_soon_threadsafe per loop.
+
+    Other backends implement the same methods; active() and wants() may
+    simply return True when subscribers live in other processes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = defaultdict(set)
+
+    def subscribe(self, channel, maxsize=DEFAULT_QUEUE_SIZE):
+        subscription = Subscription(channel, maxsize)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+    def active(self):
+        with self._lock:
+            return bool(self._channels)
+
+    def wants(self, channels):
+        """
+        Whether anyone could receive an event on channels, so publishers can
+        skip building payloads nobody will read.
+        """
+        with self._lock:
+            return any(channel in self._channels for channel in channels)
+
+    def publish(self, channels, event):
+        self.dispatch(channels, event)
+
+    def dispatch(self, channels, event):
+        by_loop = defaultdict(list)
+        with self._lock:
+            for channel in set(channels):
+                for subscription in self._channels.get(channel, ()):
+                    by_loop[subscription.loop].append(subscription)
+
+        for loop, subscriptions in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(_deliver_all, subscriptions, event)
+            except RuntimeError:
+                # Loop already closed; its connections are gone
+                pass
+
+
+def _deliver_all(subscriptions, event):
+    for subscription in subscriptions:
+        subscription.deliver(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'TICKET_EVENT_BROKER', 'tickets.events.InMemoryBroker')
+                _broker = import_string(path)()
+    return _broker
+
+
+# -- publishing (called from signals.py / bulk.py) --
+
+def _ticket_channels(created_by_id, assigned_to_id, previous_assigned_to_id=None):
+    channels = [STAFF_CHANNEL, creator_channel(created_by_id)]
+    if assigned_to_id:
+        channels.append(assignee_channel(assigned_to_id))
+    if previous_assigned_to_id and previous_assigned_to_id != assigned_to_id:
+        channels.append(assignee_channel(previous_assigned_to_id))
+    return channels
+
+
+def _ticket_payload(row):
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'priority': row['priority'],
+        'status': row['status'],
+        'category': row['category_id'],
+        'created_by': row['created_by_id'],
+        'created_by_username': row['created_by__username'],
+        'assigned_to': row['assigned_to_id'],
+        'assigned_to_username': row['assigned_to__username'],
+        'updated_at': row['updated_at'].isoformat(),
+    }
+
+
+_TICKET_FIELDS = (
+    'id', 'title', 'priority', 'status', 'category_id', 'created_by_id',
+    'created_by__username', 'assigned_to_id', 'assigned_to__username', 'updated_at',
+)
+
+
+def publish_ticket_changes(ticket_ids, previous_assignees=None, created=False):
+    """
+    Once the current transaction commits, publish one event per ticket:
+    ticket.created, ticket.assigned (assignee changed, also sent to the
+    previous assignee) or ticket.updated.
+    """
+    ticket_ids = list(ticket_ids)
+    previous_assignees = previous_assignees or {}
+
+    def send():
+        broker = get_broker()
+        if not broker.active():
+            return
+        rows = Ticket.objects.filter(id__in=ticket_ids).values(*_TICKET_FIELDS)
+        for row in rows:
+            previous = previous_assignees.get(row['id'], row['assigned_to_id'])
+            channels = _ticket_channels(row['created_by_id'], row['assigned_to_id'], previous)
+            if not broker.wants(channels):
+                continue
+            if created:
+                kind = TICKET_CREATED
+            elif previous != row['assigned_to_id']:
+                kind = TICKET_ASSIGNED
+            else:
+                kind = TICKET_UPDATED
+            broker.publish(channels, {'type': kind, 'ticket': _ticket_payload(row)})
+
+    transaction.on_commit(send)
+
+
+def publish_comment(comment):
+    """
+    Publish comment.created after commit to staff, the ticket's assignee
+    and, for public comments only, the ticket's creator.
+    """
+    from .serializers import TicketCommentSerializer
+
+    def send():
+        broker = get_broker()
+        if not broker.active():
+            return
+        ticket = Ticket.objects.filter(id=comment.ticket_id).values(
+            'created_by_id', 'assigned_to_id'
+        ).first()
+        if ticket is None:
+            return
+        channels = [STAFF_CHANNEL]
+        if ticket['assigned_to_id']:
+            channels.append(assignee_channel(ticket['assigned_to_id']))
+        if not comment.is_internal:
+            channels.append(creator_channel(ticket['created_by_id']))
+        if broker.wants(channels):
+            broker.publish(channels, {
+                'type': COMMENT_CREATED,
+                'comment': dict(TicketCommentSerializer(comment).data),
+            })
+
+    transaction.on_commit(send)
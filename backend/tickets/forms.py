@@ -1,6 +1,8 @@
 from django import forms
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, User
+from django.db.models import Exists, OuterRef
 from .models import Ticket,  Category
+from .roles import SUPPORT_TEAM
 
 # form for creating a new ticket
 class TicketCreateForm(forms.ModelForm):
@@ -36,13 +38,12 @@ class TicketUpdateForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        # Only show users from the Support Team group
-        try:
-            support_team_group = Group.objects.get(name='Support Team')
-            self.fields['assigned_to'].queryset = support_team_group.user_set.all()
-        except Group.DoesNotExist:
-            # If Support Team group doesn't exist, show all users
-            pass
+        # Only show users from the Support Team group, or all users while
+        # that group does not exist yet (a fresh install). Both conditions
+        # are part of the choices query, so the fallback costs no query.
+        in_team = Exists(User.groups.through.objects.filter(user_id=OuterRef('pk'), group__name=SUPPORT_TEAM))
+        no_team = ~Exists(Group.objects.filter(name=SUPPORT_TEAM))
+        self.fields['assigned_to'].queryset = User.objects.filter(in_team | no_team)
         
         # Make assigned_to not required
         self.fields['assigned_to'].required = False
\ No newline at end of file
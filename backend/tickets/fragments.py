@@ -0,0 +1,149 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Prefetch, aprefetch_related_objects, prefetch_related_objects
+
+from .models import TicketComment
+from .serializers import TicketSerializers, TicketSummarySerializer
+
+# ---------------------------
+# Serialized ticket fragment cache
+# ---------------------------
+#
+# Each ticket's serialized dict is cached on its own ("Russian-doll"
+# caching), so a list response only serializes the tickets that changed.
+#
+# - Summary fragments are keyed by everything they render that can change
+#   without a ticket save (updated_at, the visible comment count,
+#   last_activity_at, the two usernames), so stale entries are simply
+#   never read again.
+# - Detail fragments embed comments and comment authors, so they are keyed
+#   by ticket id and comment visibility (staff see internal comments,
+#   customers get a fragment without them) and dropped by signals.py on
+#   ticket/comment/username changes; the stored updated_at is also checked
+#   on read so writes that bypass signals (queryset.update) cannot serve
+#   stale data.
+#
+# arender_summaries()/arender_detail() are the async views' variants; only
+# the cache and database calls differ.
+
+
+def fragment_cache():
+    return caches[getattr(settings, 'TICKET_FRAGMENT_CACHE', 'default')]
+
+
+def _timeout():
+    return getattr(settings, 'TICKET_FRAGMENT_TIMEOUT', 3600)
+
+
+def summary_key(ticket):
+    assigned = ticket.assigned_to.username if ticket.assigned_to_id else ''
+    users = hashlib.md5(
+        f'{ticket.created_by.username}\0{assigned}'.encode()
+    ).hexdigest()[:12]
+    return (
+        f'tickets:summary:{ticket.id}:{ticket.updated_at.timestamp()}:'
+        f'{ticket.visible_comment_count}:{ticket.last_activity_at.timestamp()}:{users}'
+    )
+
+
+def detail_key(ticket_id, include_internal=True):
+    visibility = 'all' if include_internal else 'public'
+    return f'tickets:detail:{ticket_id}:{visibility}'
+
+
+def render_summaries(tickets):
+    """
+    Serialize tickets (from summary_queryset()) with TicketSummarySerializer,
+    reusing cached fragments and only serializing the misses.
+    """
+    cache = fragment_cache()
+    keys = [summary_key(ticket) for ticket in tickets]
+    cached = cache.get_many(keys)
+
+    fresh = _serialize_misses(tickets, keys, cached)
+    if fresh:
+        cache.set_many(fresh, _timeout())
+        cached.update(fresh)
+
+    return [cached[key] for key in keys]
+
+
+async def arender_summaries(tickets):
+    cache = fragment_cache()
+    keys = [summary_key(ticket) for ticket in tickets]
+    cached = await cache.aget_many(keys)
+
+    fresh = _serialize_misses(tickets, keys, cached)
+    if fresh:
+        await cache.aset_many(fresh, _timeout())
+        cached.update(fresh)
+
+    return [cached[key] for key in keys]
+
+
+def _serialize_misses(tickets, keys, cached):
+    misses = [ticket for ticket, key in zip(tickets, keys) if key not in cached]
+    return {
+        summary_key(ticket): dict(data)
+        for ticket, data in zip(misses, TicketSummarySerializer(misses, many=True).data)
+    }
+
+
+def _comments_prefetch(include_internal):
+    comments = TicketComment.objects.select_related('author')
+    if not include_internal:
+        comments = comments.filter(is_internal=False)
+    return Prefetch('comments', queryset=comments)
+
+
+def render_detail(ticket, include_internal=True):
+    """
+    Serialize one ticket with the nested TicketSerializers form. ticket only
+    needs created_by/assigned_to joined; comments are loaded on a miss.
+    Customers pass include_internal=False so internal comments are left out.
+    """
+    cache = fragment_cache()
+    key = detail_key(ticket.id, include_internal)
+    version = ticket.updated_at.isoformat()
+
+    entry = cache.get(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    prefetch_related_objects([ticket], _comments_prefetch(include_internal))
+    data = dict(TicketSerializers(ticket).data)
+    cache.set(key, (version, data), _timeout())
+    return data
+
+
+async def arender_detail(ticket, include_internal=True):
+    cache = fragment_cache()
+    key = detail_key(ticket.id, include_internal)
+    version = ticket.updated_at.isoformat()
+
+    entry = await cache.aget(key)
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    await aprefetch_related_objects([ticket], _comments_prefetch(include_internal))
+    data = dict(TicketSerializers(ticket).data)
+    await cache.aset(key, (version, data), _timeout())
+    return data
+
+
+def invalidate_details(*ticket_ids):
+    """
+    Drop detail fragments now and again once the surrounding transaction
+    commits, so a concurrent reader cannot re-cache pre-commit data.
+    """
+    keys = [
+        detail_key(ticket_id, include_internal)
+        for ticket_id in ticket_ids for include_internal in (True, False)
+    ]
+    if not keys:
+        return
+    fragment_cache().delete_many(keys)
+    transaction.on_commit(lambda: fragment_cache().delete_many(keys))
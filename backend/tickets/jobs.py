@@ -0,0 +1,292 @@
+import random
+import statistics
+import threading
+import time
+import traceback
+import uuid
+from collections import deque
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from .models import Job
+
+# ---------------------------
+# Background jobs
+# ---------------------------
+#
+# Jobs are rows in the project's own database, so there is no broker to run.
+# enqueue() inserts the row in the caller's transaction: workers only see it
+# once that transaction commits, and never if it rolls back.
+#
+# Workers (manage.py run_workers) claim due jobs in small batches:
+#
+# - with SELECT ... FOR UPDATE SKIP LOCKED where the backend supports it
+#   (PostgreSQL, MySQL 8), so concurrent workers neither wait on nor
+#   double-claim each other's rows;
+# - elsewhere (SQLite) with a conditional UPDATE ... WHERE status='queued'
+#   stamped with a claim token; SQLite serializes writes, so each row is
+#   won by exactly one worker.
+#
+# A handler runs in one transaction with the row's "done" update. Failures
+# are retried with exponential backoff and jitter until max_attempts; jobs
+# whose worker died are requeued once JOB_LOCK_TIMEOUT seconds have passed
+# since they started running.
+
+_handlers = {}
+
+
+def job(name=None):
+    """
+    Register a function as a job handler, under name or its dotted path.
+    The function is called with the job's payload as keyword arguments;
+    its (JSON-serializable) return value is stored as the job's result.
+    """
+    def register(fn):
+        fn.job_name = name or f'{fn.__module__}.{fn.__name__}'
+        _handlers[fn.job_name] = fn
+        return fn
+    return register
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue(task, payload=None, run_at=None, delay=None, max_attempts=None):
+    """
+    Queue a job for a registered handler (the function or its name).
+    Returns the Job; it becomes visible to workers when the current
+    transaction commits. With JOBS_EAGER it runs inline after commit
+    instead, for development without workers.
+    """
+    name = getattr(task, 'job_name', task)
+    if name not in _handlers:
+        raise ValueError(f"Unknown job: {name}")
+    if run_at is None:
+        run_at = timezone.now() + (delay or timedelta())
+    queued = Job.objects.create(
+        name=name,
+        payload=payload or {},
+        run_at=run_at,
+        max_attempts=max_attempts or _setting('JOB_MAX_ATTEMPTS', 5),
+    )
+    if _setting('JOBS_EAGER', False):
+        transaction.on_commit(lambda: work_off('eager', ids=[queued.id]))
+    return queued
+
+
+def retry_delay(attempts):
+    """
+    Seconds to wait before retry number attempts: doubling from
+    JOB_RETRY_BASE up to JOB_RETRY_MAX, with jitter so jobs that failed
+    together do not retry together.
+    """
+    base = _setting('JOB_RETRY_BASE', 10)
+    ceiling = _setting('JOB_RETRY_MAX', 3600)
+    delay = min(ceiling, base * 2 ** max(0, attempts - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+
+# -- claiming --
+
+def claim(worker, limit=1, ids=None):
+    """
+    Mark up to limit due jobs as running for worker and return them.
+    """
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:12]}'
+    due = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).order_by('run_at', 'id')
+    if ids is not None:
+        due = due.filter(id__in=ids)
+    claimed = dict(status=Job.RUNNING, locked_by=token, locked_at=now, attempts=F('attempts') + 1)
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            picked = list(due.select_for_update(skip_locked=True).values_list('id', flat=True)[:limit])
+            if not picked:
+                return []
+            Job.objects.filter(id__in=picked).update(**claimed)
+    else:
+        picked = list(due.values_list('id', flat=True)[:limit])
+        if not picked:
+            return []
+        # Another worker may have taken some of these since the SELECT
+        if not Job.objects.filter(id__in=picked, status=Job.QUEUED).update(**claimed):
+            return []
+
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING).order_by('run_at', 'id'))
+
+
+# -- running --
+
+def run_job(claimed, metrics=None):
+    """
+    Run one claimed job and record the outcome: done, queued for a retry,
+    or failed once max_attempts is used up. Returns True on success.
+    """
+    # Jobs wait their turn in the claimed batch, so the claim time says
+    # nothing about how long this one has run; restamp locked_at as it
+    # starts. If requeue_stale() took it back meanwhile, leave it alone.
+    started = Job.objects.filter(id=claimed.id, locked_by=claimed.locked_by, status=Job.RUNNING)
+    if not started.update(locked_at=timezone.now()):
+        return False
+    handler = _handlers.get(claimed.name)
+    start = time.perf_counter()
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for {claimed.name}")
+        with transaction.atomic():
+            result = handler(**claimed.payload)
+            Job.objects.filter(id=claimed.id, locked_by=claimed.locked_by).update(
+                status=Job.DONE, result=result, last_error='', finished_at=timezone.now()
+            )
+    except Exception:
+        error = traceback.format_exc()[-4000:]
+        if claimed.attempts >= claimed.max_attempts:
+            values = dict(status=Job.FAILED, finished_at=timezone.now())
+            outcome = 'failed'
+        else:
+            values = dict(status=Job.QUEUED, locked_by='', locked_at=None,
+                          run_at=timezone.now() + timedelta(seconds=retry_delay(claimed.attempts)))
+            outcome = 'retried'
+        Job.objects.filter(id=claimed.id, locked_by=claimed.locked_by).update(last_error=error, **values)
+        if metrics is not None:
+            metrics.record(outcome, time.perf_counter() - start)
+        return False
+
+    if metrics is not None:
+        metrics.record('done', time.perf_counter() - start)
+    return True
+
+
+def work_off(worker='inline', batch_size=10, ids=None, metrics=None):
+    """
+    Claim and run due jobs until none are left; returns how many ran.
+    Used by run_workers --burst, JOBS_EAGER and tests.
+    """
+    ran = 0
+    while True:
+        batch = claim(worker, batch_size, ids=ids)
+        if not batch:
+            return ran
+        for claimed in batch:
+            run_job(claimed, metrics)
+            ran += 1
+
+
+# -- maintenance --
+
+def requeue_stale(timeout=None):
+    """
+    Put back jobs whose worker stopped reporting (crashed or killed) for
+    longer than timeout seconds; those out of attempts are failed instead.
+    """
+    timeout = timeout if timeout is not None else _setting('JOB_LOCK_TIMEOUT', 600)
+    now = timezone.now()
+    stale = Job.objects.filter(status=Job.RUNNING, locked_at__lt=now - timedelta(seconds=timeout))
+    failed = stale.filter(attempts__gte=F('max_attempts')).update(
+        status=Job.FAILED, finished_at=now, last_error='Worker lost'
+    )
+    requeued = stale.update(status=Job.QUEUED, locked_by='', locked_at=None, run_at=now)
+    return requeued, failed
+
+
+def prune_finished(older_than):
+    """
+    Delete completed jobs that finished before older_than; failed jobs are
+    kept for inspection.
+    """
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=older_than).delete()
+    return deleted
+
+
+# ---------------------------
+# Metrics
+# ---------------------------
+
+class WorkerMetrics:
+    """
+    Thread-safe outcome counters and recent run times for one worker
+    process; snapshot() reports and resets them.
+    """
+
+    def __init__(self, window=1000):
+        self._lock = threading.Lock()
+        self._window = window
+        self._reset()
+
+    def _reset(self):
+        self.counts = {'done': 0, 'retried': 0, 'failed': 0}
+        self.durations = deque(maxlen=self._window)
+        self.since = time.monotonic()
+
+    def record(self, outcome, seconds):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.durations.append(seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            elapsed = max(time.monotonic() - self.since, 1e-9)
+            durations = sorted(self.durations)
+            data = dict(self.counts)
+            data['elapsed'] = elapsed
+            data['per_second'] = sum(self.counts.values()) / elapsed
+            data['p50_ms'] = statistics.median(durations) if durations else 0.0
+            data['p95_ms'] = durations[int(0.95 * (len(durations) - 1))] if durations else 0.0
+            self._reset()
+        return data
+
+
+def queue_stats():
+    """
+    Queue depth per status, how late the oldest due job is, and jobs
+    finished in the last minute, in two queries.
+    """
+    now = timezone.now()
+    minute_ago = now - timedelta(minutes=1)
+    counts = Job.objects.aggregate(
+        queued=Count('id', filter=Q(status=Job.QUEUED)),
+        running=Count('id', filter=Q(status=Job.RUNNING)),
+        failed=Count('id', filter=Q(status=Job.FAILED)),
+        done_last_minute=Count('id', filter=Q(status=Job.DONE, finished_at__gte=minute_ago)),
+        failed_last_minute=Count('id', filter=Q(status=Job.FAILED, finished_at__gte=minute_ago)),
+    )
+    oldest = Job.objects.filter(status=Job.QUEUED, run_at__lte=now).aggregate(oldest=Min('run_at'))['oldest']
+    counts['lag_seconds'] = (now - oldest).total_seconds() if oldest else 0.0
+    return counts
+
+
+# ---------------------------
+# Worker loop
+# ---------------------------
+
+class Worker(threading.Thread):
+    """
+    Polls for due jobs until stop is set, sleeping poll_interval seconds
+    whenever the queue is empty.
+    """
+
+    def __init__(self, name, stop, metrics, batch_size=10, poll_interval=1.0):
+        super().__init__(name=name, daemon=True)
+        self.stop = stop
+        self.metrics = metrics
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+
+    def run(self):
+        try:
+            while not self.stop.is_set():
+                close_old_connections()
+                batch = claim(self.name, self.batch_size)
+                if not batch:
+                    self.stop.wait(self.poll_interval)
+                    continue
+                for claimed in batch:
+                    run_job(claimed, self.metrics)
+        finally:
+            connection.close()
@@ -0,0 +1,148 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.load import compare, format_report, load_report, run_load, save_report, summarize
+from benchmarks.scenarios import DEFAULT_MIX, SCENARIOS, parse_mix
+from benchmarks.seed import rebuild_derived, seed_dataset
+from benchmarks.transport import HTTPTransport, TestClientTransport
+from benchmarks.utils import analyze, throwaway_database
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the REST API with scripted customer, agent and admin "
+        "sessions and report p50/p95/p99 latency and throughput per endpoint. "
+        "By default seeds a throwaway database and goes through the Django test "
+        "client; --url targets a running server seeded with seed_benchmark_data. "
+        "--output saves the report as JSON, --compare diffs against a saved one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=100000)
+        parser.add_argument('--comments-per-ticket', type=int, default=2)
+        parser.add_argument('--sessions', type=int, default=None,
+                            help="Scenario sessions to run (default 500 unless --duration is given)")
+        parser.add_argument('--duration', type=float, default=None,
+                            help="Seconds to run for instead of a session count")
+        parser.add_argument('--concurrency', type=int, default=1,
+                            help="Threads issuing sessions in parallel")
+        parser.add_argument('--users-per-role', type=int, default=10,
+                            help="Accounts per role each thread logs in as before timing starts")
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help="Relative weight of each scenario")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--url', help="Base URL of a running server, e.g. http://localhost:8000")
+        parser.add_argument('--manifest', default='benchmark-manifest.json',
+                            help="Accounts written by seed_benchmark_data (with --url)")
+        parser.add_argument('--output', help="Write the report to this JSON file")
+        parser.add_argument('--compare', help="Baseline report to diff against")
+        parser.add_argument('--threshold', type=float, default=10.0,
+                            help="Percent change that counts as a regression")
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help="Exit non-zero when --compare finds a regression")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['concurrency'] < 1:
+            raise CommandError("--concurrency must be at least 1")
+        if options['concurrency'] > 1 and not options['url'] and connection.vendor == 'sqlite':
+            # The throwaway SQLite database is a shared-cache in-memory one,
+            # which locks whole tables between threads
+            raise CommandError(
+                "In-process runs on SQLite need --concurrency 1; use PostgreSQL "
+                "or --url against a running server for concurrent load"
+            )
+        if options['sessions'] is None and options['duration'] is None:
+            options['sessions'] = 500
+        baseline = load_report(options['compare']) if options['compare'] else None
+
+        if options['url']:
+            report = self.run_http(mix, options)
+        else:
+            with throwaway_database():
+                report = self.run_in_process(mix, options)
+
+        for line in format_report(report):
+            self.stdout.write(line)
+        if options['output']:
+            save_report(report, options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Saved report to {options['output']}"))
+        if baseline is not None:
+            self.report_comparison(report, baseline, options)
+
+    def run_in_process(self, mix, options):
+        self.stdout.write(f"Seeding {options['tickets']} tickets on {connection.vendor}...")
+        data = seed_dataset(
+            tickets=options['tickets'],
+            comments_per_ticket=options['comments_per_ticket'],
+            seed=options['seed'],
+        )
+        rebuild_derived()
+        analyze()
+        users = {role: data[key] for role, (_, key) in SCENARIOS.items()}
+        return self.run(users, TestClientTransport, mix, options, transport='test-client')
+
+    def run_http(self, mix, options):
+        try:
+            with open(options['manifest']) as f:
+                manifest = json.load(f)
+        except OSError as e:
+            raise CommandError(f"Cannot read manifest {options['manifest']}: {e}")
+
+        def make_transport(recorder, username):
+            return HTTPTransport(recorder, options['url'], username, manifest['password'])
+
+        options = dict(options, tickets=manifest.get('tickets'),
+                       comments_per_ticket=manifest.get('comments_per_ticket'))
+        return self.run(manifest['users'], make_transport, mix, options, transport=options['url'])
+
+    def run(self, users, make_transport, mix, options, transport):
+        amount = options['sessions'] if options['sessions'] is not None else f"{options['duration']:g}s of"
+        self.stdout.write(f"Running {amount} sessions ({options['mix']}) "
+                          f"on {options['concurrency']} thread(s)...")
+        try:
+            recorder, elapsed = run_load(
+                users, make_transport, mix,
+                sessions=options['sessions'], duration=options['duration'],
+                concurrency=options['concurrency'], seed=options['seed'],
+                pool=options['users_per_role'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+        return summarize(
+            recorder, elapsed,
+            transport=transport,
+            tickets=options['tickets'],
+            comments_per_ticket=options['comments_per_ticket'],
+            concurrency=options['concurrency'],
+            users_per_role=options['users_per_role'],
+            mix=mix,
+            seed=options['seed'],
+        )
+
+    def report_comparison(self, report, baseline, options):
+        before, after = baseline['meta'], report['meta']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\nCompared with {before.get('revision')} ({before.get('recorded_at')})"
+        ))
+        for key in ('transport', 'database', 'tickets', 'concurrency', 'mix'):
+            if before.get(key) != after.get(key):
+                self.stdout.write(self.style.WARNING(
+                    f"  {key} differs: {before.get(key)} -> {after.get(key)}; numbers may not be comparable"
+                ))
+        rows, regressions = compare(report, baseline, options['threshold'])
+        for label, metric, old, new, change in rows:
+            line = f"  {label:<42} {metric:>10} {old:>10.2f} -> {new:>10.2f} ({change:+.1f}%)"
+            self.stdout.write(self.style.ERROR(line) if (label, metric, old, new, change) in regressions else line)
+        if regressions:
+            message = f"{len(regressions)} metrics regressed by more than {options['threshold']:.0f}%"
+            if options['fail_on_regression']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("No regressions beyond the threshold"))
@@ -0,0 +1,176 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.load import run_load, save_report, summarize
+from benchmarks.scenarios import DEFAULT_MIX, READ_SCENARIOS, parse_mix
+from benchmarks.transport import HTTPTransport
+from tickets.models import Ticket
+
+HOST = '127.0.0.1'
+
+
+def server_commands(options):
+    """
+    label -> (argv, ASYNC_READ_VIEWS) for the two deployments. Both run
+    under gunicorn with the same number of workers; the ASGI one with
+    uvicorn's worker class. (uvicorn --workers leaves Nagle's algorithm on
+    for its connections, which adds ~40ms to every kept-alive request.)
+    """
+    common = ['--workers', str(options['workers']), '--log-level', 'warning']
+    return {
+        'wsgi': ([
+            sys.executable, '-m', 'gunicorn', 'config.wsgi:application',
+            '--bind', f"{HOST}:{options['port']}", *common,
+            '--worker-class', 'gthread', '--threads', str(options['threads']),
+        ], False),
+        'asgi': ([
+            sys.executable, '-m', 'gunicorn', 'config.asgi:application',
+            '--bind', f"{HOST}:{options['port'] + 1}", *common,
+            '--worker-class', 'uvicorn_worker.UvicornWorker',
+        ], True),
+    }
+
+
+@contextmanager
+def running(argv, port, async_views, timeout=30):
+    """
+    Start a server from the backend directory, wait until it accepts
+    connections and stop it afterwards.
+    """
+    env = dict(os.environ, ASYNC_READ_VIEWS=str(async_views))
+    process = subprocess.Popen(argv, cwd=settings.BASE_DIR, env=env)
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            if process.poll() is not None:
+                raise CommandError(f"The server exited with status {process.returncode}")
+            try:
+                socket.create_connection((HOST, port), timeout=1).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise CommandError(f"The server did not listen on port {port} within {timeout}s")
+                time.sleep(0.2)
+        yield f'http://{HOST}:{port}'
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare concurrent-client throughput of the WSGI deployment (gunicorn, "
+        "threaded workers, DRF views) with the ASGI one (gunicorn with uvicorn "
+        "workers, ASYNC_READ_VIEWS on) on the read endpoints that have async variants. "
+        "Both servers run from this checkout against the CONFIGURED database, "
+        "which must be seeded with seed_benchmark_data; the load is read-only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--manifest', default='benchmark-manifest.json',
+                            help="Accounts written by seed_benchmark_data")
+        parser.add_argument('--concurrency', default='1,8,32,64',
+                            help="Comma-separated client thread counts to measure")
+        parser.add_argument('--duration', type=float, default=15.0,
+                            help="Seconds per server and concurrency level")
+        parser.add_argument('--workers', type=int, default=2,
+                            help="Worker processes per server")
+        parser.add_argument('--threads', type=int, default=8,
+                            help="Threads per gunicorn worker")
+        parser.add_argument('--port', type=int, default=8100,
+                            help="WSGI server port; the ASGI server uses the next one")
+        parser.add_argument('--users-per-role', type=int, default=10)
+        parser.add_argument('--mix', default=DEFAULT_MIX)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help="Write every run's report to this JSON file")
+
+    def handle(self, *args, **options):
+        try:
+            mix = parse_mix(options['mix'])
+            levels = [int(level) for level in options['concurrency'].split(',')]
+        except ValueError as e:
+            raise CommandError(str(e))
+        if not levels or min(levels) < 1:
+            raise CommandError("--concurrency needs positive thread counts")
+        try:
+            with open(options['manifest']) as f:
+                manifest = json.load(f)
+        except OSError as e:
+            raise CommandError(f"Cannot read manifest {options['manifest']}: {e}")
+        if not Ticket.objects.exists():
+            raise CommandError("The database has no tickets; run seed_benchmark_data first")
+
+        reports = {}
+        self.tokens = {}
+        for label, (argv, async_views) in server_commands(options).items():
+            port = options['port'] + (1 if async_views else 0)
+            self.stdout.write(f"Starting {label}: {' '.join(argv[1:])}")
+            with running(argv, port, async_views) as url:
+                # One client first: logs every account in (see measure())
+                # and warms the fragment caches before anything is measured
+                self.measure(url, manifest, mix, options, 1, duration=min(5.0, options['duration']))
+                for level in levels:
+                    report = self.measure(url, manifest, mix, options, level)
+                    reports[label, level] = report
+                    total = report['total']
+                    self.stdout.write(
+                        f"  {level:>4} clients: {total['throughput']:>8.1f} req/s  "
+                        f"p95 {total['p95']:>8.2f} ms  errors {total['errors']}"
+                    )
+
+        self.stdout.write(
+            f"\n{'clients':>7} {'WSGI req/s':>11} {'p95 ms':>8} {'ASGI req/s':>11} {'p95 ms':>8} {'ASGI/WSGI':>10}"
+        )
+        for level in levels:
+            wsgi, asgi = reports['wsgi', level]['total'], reports['asgi', level]['total']
+            ratio = asgi['throughput'] / wsgi['throughput'] if wsgi['throughput'] else 0.0
+            self.stdout.write(
+                f"{level:>7} {wsgi['throughput']:>11.1f} {wsgi['p95']:>8.2f} "
+                f"{asgi['throughput']:>11.1f} {asgi['p95']:>8.2f} {ratio:>9.2f}x"
+            )
+        errors = sum(report['total']['errors'] for report in reports.values())
+        if errors:
+            self.stdout.write(self.style.WARNING(f"{errors} requests failed; see the per-endpoint reports"))
+
+        if options['output']:
+            save_report({f'{label}@{level}': report for (label, level), report in reports.items()},
+                        options['output'])
+            self.stdout.write(self.style.SUCCESS(f"Saved reports to {options['output']}"))
+
+    def measure(self, url, manifest, mix, options, concurrency, duration=None):
+        tokens = self.tokens.setdefault(url, {})
+
+        def make_transport(recorder, username):
+            # Password hashing would dominate if every client thread logged
+            # in; each account logs in once per server, later runs reuse its
+            # access token
+            transport = HTTPTransport(recorder, url, username, manifest['password'], token=tokens.get(username))
+            tokens[username] = transport.token
+            return transport
+
+        recorder, elapsed = run_load(
+            manifest['users'], make_transport, mix,
+            duration=duration or options['duration'], concurrency=concurrency,
+            seed=options['seed'], pool=options['users_per_role'], scenarios=READ_SCENARIOS,
+        )
+        return summarize(
+            recorder, elapsed,
+            transport=url,
+            tickets=manifest.get('tickets'),
+            concurrency=concurrency,
+            users_per_role=options['users_per_role'],
+            mix=mix,
+            seed=options['seed'],
+        )
@@ -0,0 +1,103 @@
+import itertools
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from benchmarks.seed import rebuild_derived, seed_dataset
+from benchmarks.utils import analyze, authentication, throwaway_database
+from tickets.authentication import ClaimsRefreshToken, StatelessJWTAuthentication
+from tickets.models import Ticket
+
+# label -> authentication class every API view is switched to
+MODES = {
+    'stateful (User row per request)': JWTAuthentication,
+    'stateless (role claims)': StatelessJWTAuthentication,
+}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare API requests per second with simplejwt's JWTAuthentication, "
+        "which loads the User row on every request, against the stateless "
+        "role-claim tokens, on a throwaway database. Customers, agents and "
+        "IT Staff take turns calling /api/me/, the ticket list and ticket "
+        "detail with the same tokens in both modes; the role cache is warm."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=5000)
+        parser.add_argument('--requests', type=int, default=2000,
+                            help="Requests per mode and round")
+        parser.add_argument('--rounds', type=int, default=3,
+                            help="Modes alternate each round; the best round counts")
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            data = seed_dataset(tickets=options['tickets'], comments_per_ticket=1)
+            rebuild_derived()
+            analyze()
+            calls = self.calls(data)
+
+            results = {label: [] for label in MODES}
+            for _ in range(options['rounds']):
+                for label, auth_class in MODES.items():
+                    with authentication(auth_class):
+                        results[label].append(self.run(calls, options['requests']))
+
+        self.stdout.write(f"{'mode':<34} {'req/s':>9} {'mean ms':>9} {'queries/req':>12}")
+        best = {}
+        for label, runs in results.items():
+            rate, mean, queries = best[label] = max(runs)
+            self.stdout.write(f"{label:<34} {rate:>9.0f} {mean:>9.2f} {queries:>12.2f}")
+        (before, *_), (after, *_) = best.values()
+        self.stdout.write(self.style.SUCCESS(f"speed-up: {after / before:.2f}x"))
+
+    def calls(self, data):
+        """
+        (client, path) pairs for five users per role: /api/me/, the ticket
+        list and one ticket the user can see.
+        """
+        calls = []
+        users = [users[:5] for users in (data['customers'], data['agents'], data['it_staff'])]
+        for user in itertools.chain(*users):
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+            ticket_id = (
+                Ticket.objects.filter(created_by=user).values_list('id', flat=True).first()
+                or Ticket.objects.filter(assigned_to=user).values_list('id', flat=True).first()
+                or Ticket.objects.values_list('id', flat=True).first()
+            )
+            calls += [(client, '/api/me/'), (client, '/api/tickets/'), (client, f'/api/tickets/{ticket_id}/')]
+        return calls
+
+    def run(self, calls, requests):
+        """
+        Return (requests per second, mean latency in ms, queries per request).
+        """
+        cache.clear()
+        for client, path in calls:
+            # Warm the role and fragment caches
+            response = client.get(path)
+            if response.status_code != 200:
+                raise CommandError(f"GET {path} answered {response.status_code}; the numbers would not compare")
+        counter = QueryCounter()
+        schedule = itertools.islice(itertools.cycle(calls), requests)
+        with connection.execute_wrapper(counter):
+            start = time.perf_counter()
+            for client, path in schedule:
+                client.get(path)
+            elapsed = time.perf_counter() - start
+        return requests / elapsed, elapsed / requests * 1000, counter.count / requests
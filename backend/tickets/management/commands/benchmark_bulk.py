@@ -0,0 +1,48 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.test import APIClient
+
+from benchmarks.seed import seed_dataset
+from benchmarks.utils import throwaway_database
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare one POST /api/tickets/bulk/ call against the equivalent "
+        "per-ticket PATCH /api/tickets/<id>/ calls on a throwaway database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=5000)
+        parser.add_argument('--batch', type=int, default=1000,
+                            help="Number of tickets changed in each mode")
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            data = seed_dataset(tickets=options['tickets'], comments_per_ticket=1)
+            admin = data['it_staff'][0]
+            client = APIClient()
+            client.force_authenticate(admin)
+
+            ids = list(Ticket.objects.order_by('id').values_list('id', flat=True)[:options['batch'] * 2])
+            per_ticket_ids, bulk_ids = ids[:options['batch']], ids[options['batch']:]
+
+            start = time.perf_counter()
+            for ticket_id in per_ticket_ids:
+                client.patch(f'/api/tickets/{ticket_id}/', {'status': 'Resolved'}, format='json')
+            per_ticket = time.perf_counter() - start
+
+            start = time.perf_counter()
+            response = client.post('/api/tickets/bulk/', {
+                'ids': bulk_ids,
+                'changes': {'status': 'Resolved'},
+            }, format='json')
+            bulk = time.perf_counter() - start
+
+        self.stdout.write(f"per-ticket PATCH: {len(per_ticket_ids)} tickets in {per_ticket:.2f}s "
+                          f"({len(per_ticket_ids) / per_ticket:.0f} tickets/s)")
+        self.stdout.write(f"bulk endpoint:    {response.data['updated']} tickets in {bulk:.2f}s "
+                          f"({len(bulk_ids) / bulk:.0f} tickets/s)")
+        self.stdout.write(self.style.SUCCESS(f"speed-up: {per_ticket / bulk:.1f}x"))
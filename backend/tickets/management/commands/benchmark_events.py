@@ -0,0 +1,142 @@
+import asyncio
+import statistics
+import time
+import tracemalloc
+
+from asgiref.sync import sync_to_async
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+
+from benchmarks.seed import seed_dataset
+from benchmarks.utils import percentile, throwaway_database
+from tickets.authentication import ClaimsRefreshToken
+from tickets.events import get_broker
+from tickets.models import Ticket
+
+
+class StreamClient:
+    """
+    One SSE connection driven straight through the ASGI application, no
+    server or sockets involved: receive() hands over the empty request body
+    and then blocks until close() simulates the client going away.
+    """
+
+    def __init__(self, app, token):
+        self.app = app
+        self.token = token
+        self.events = 0
+        self.received = asyncio.Event()
+        self._gone = asyncio.Event()
+        self._body_sent = False
+        self.status = None
+
+    def scope(self):
+        return {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': '/api/tickets/events/',
+            'raw_path': b'/api/tickets/events/',
+            'root_path': '',
+            'query_string': f'token={self.token}'.encode(),
+            'headers': [(b'host', b'testserver'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 0),
+            'server': ('testserver', 80),
+        }
+
+    async def receive(self):
+        if not self._body_sent:
+            self._body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self._gone.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] == 'http.response.start':
+            self.status = message['status']
+        elif message['type'] == 'http.response.body' and message.get('body', b'').startswith(b'event:'):
+            self.events += 1
+            self.received.set()
+
+    def run(self):
+        return asyncio.ensure_future(self.app(self.scope(), self.receive, self.send))
+
+    def close(self):
+        self._gone.set()
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the /api/tickets/events/ SSE stream: hold --connections idle "
+        "connections open through the ASGI app on a throwaway database, report "
+        "memory per connection, then time how long ticket updates take to reach "
+        "every connection."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000)
+        parser.add_argument('--events', type=int, default=20)
+        parser.add_argument('--idle', type=float, default=2.0,
+                            help="Seconds to hold the connections idle before publishing")
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            data = seed_dataset(tickets=200, comments_per_ticket=0, it_staff=5)
+            tokens = [str(ClaimsRefreshToken.for_user(user).access_token) for user in data['it_staff']]
+            ticket_ids = data['ticket_ids'][:options['events']]
+            asyncio.run(self.run(tokens, ticket_ids, options))
+
+    async def run(self, tokens, ticket_ids, options):
+        app = get_asgi_application()
+        broker = get_broker()
+        count = options['connections']
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        clients = [StreamClient(app, tokens[i % len(tokens)]) for i in range(count)]
+        tasks = [client.run() for client in clients]
+        while broker.subscriber_count() < count:
+            failed = [client for client in clients if client.status not in (None, 200)]
+            if failed:
+                raise RuntimeError(f"{len(failed)} connections were refused (HTTP {failed[0].status})")
+            await asyncio.sleep(0.05)
+        connect = time.perf_counter() - start
+        await asyncio.sleep(options['idle'])
+        per_connection = (tracemalloc.get_traced_memory()[0] - baseline) / count
+        tracemalloc.stop()
+
+        self.stdout.write(f"{count} connections open in {connect:.2f}s, "
+                          f"~{per_connection / 1024:.1f} KiB Python heap each")
+
+        samples = []
+        for ticket_id in ticket_ids:
+            for client in clients:
+                client.received.clear()
+            start = time.perf_counter()
+            await sync_to_async(self.touch_ticket)(ticket_id)
+            await asyncio.gather(*(client.received.wait() for client in clients))
+            samples.append((time.perf_counter() - start) * 1000)
+
+        self.stdout.write(
+            f"fan-out to {count} connections ({len(samples)} events): "
+            f"p50 {statistics.median(samples):.1f} ms, p95 {percentile(samples, 95):.1f} ms, "
+            f"p99 {percentile(samples, 99):.1f} ms"
+        )
+
+        for client in clients:
+            client.close()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        remaining = broker.subscriber_count()
+        if remaining:
+            self.stdout.write(self.style.ERROR(f"{remaining} subscriptions leaked after disconnect"))
+        else:
+            self.stdout.write(self.style.SUCCESS("all subscriptions released on disconnect"))
+
+    @staticmethod
+    def touch_ticket(ticket_id):
+        ticket = Ticket.objects.get(id=ticket_id)
+        ticket.status = 'In progress' if ticket.status != 'In progress' else 'Open'
+        ticket.save(update_fields=ticket.edit_fields('status'))
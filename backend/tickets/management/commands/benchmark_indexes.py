@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from benchmarks.seed import seed_dataset
+from benchmarks.utils import analyze, throwaway_database, time_call
+from tickets.models import Ticket, TicketComment
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway database and compare EXPLAIN plans and latency of the "
+        "ticket hot-path queries with and without the indexes from migration 0005. "
+        "Uses the configured engine, so run it once with a SQLite DATABASE_URL "
+        "and once with a PostgreSQL one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=100000)
+        parser.add_argument('--comments-per-ticket', type=int, default=2)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--page-size', type=int, default=25)
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write(f"Seeding {options['tickets']} tickets on {connection.vendor}...")
+            data = seed_dataset(
+                tickets=options['tickets'],
+                comments_per_ticket=options['comments_per_ticket'],
+            )
+            analyze()
+
+            queries = self.hot_queries(data, options['page_size'])
+            indexed = [(Ticket, index) for index in Ticket._meta.indexes]
+            indexed += [(TicketComment, index) for index in TicketComment._meta.indexes]
+
+            with connection.schema_editor() as editor:
+                for model, index in indexed:
+                    editor.remove_index(model, index)
+            analyze()
+            before = self.run(queries, options['repeat'])
+
+            with connection.schema_editor() as editor:
+                for model, index in indexed:
+                    editor.add_index(model, index)
+            analyze()
+            after = self.run(queries, options['repeat'])
+
+        for name, _ in queries:
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name}"))
+            self.stdout.write(f"-- without indexes: p50 {before[name]['p50']:.2f} ms, "
+                              f"p95 {before[name]['p95']:.2f} ms")
+            self.stdout.write(before[name]['plan'])
+            self.stdout.write(f"-- with indexes:    p50 {after[name]['p50']:.2f} ms, "
+                              f"p95 {after[name]['p95']:.2f} ms")
+            self.stdout.write(after[name]['plan'])
+
+    def hot_queries(self, data, page_size):
+        customer = data['customers'][0]
+        agent = data['agents'][0]
+        ticket_id = data['ticket_ids'][len(data['ticket_ids']) // 2]
+        newest_first = ('-created_at', '-id')
+        return [
+            ("admin list", Ticket.objects.order_by(*newest_first)[:page_size + 1]),
+            ("customer list", Ticket.objects.filter(created_by=customer).order_by(*newest_first)[:page_size + 1]),
+            ("agent list", Ticket.objects.filter(assigned_to=agent).order_by(*newest_first)[:page_size + 1]),
+            ("unassigned list", Ticket.objects.filter(assigned_to__isnull=True).order_by(*newest_first)[:page_size + 1]),
+            ("open critical", Ticket.objects.filter(status='Open', priority='Critical').order_by(*newest_first)[:page_size + 1]),
+            ("ticket comments", TicketComment.objects.filter(ticket_id=ticket_id).order_by('-created_at')),
+            ("public ticket comments", TicketComment.objects.filter(ticket_id=ticket_id, is_internal=False).order_by('-created_at')),
+        ]
+
+    def run(self, queries, repeat):
+        results = {}
+        for name, queryset in queries:
+            stats = time_call(lambda: list(queryset.all()), repeat=repeat)
+            stats['plan'] = queryset.explain()
+            results[name] = stats
+        return results
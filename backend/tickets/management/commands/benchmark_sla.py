@@ -0,0 +1,96 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from benchmarks.seed import seed_dataset
+from benchmarks.utils import analyze, percentile, throwaway_database
+from tickets.models import Ticket
+from tickets.sla import late_tickets, scan_sla
+
+SLA_INDEXES = ('ticket_sla_due_idx', 'ticket_sla_response_idx')
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed --tickets open tickets with deadlines spread from a day ago to a "
+        "week ahead on a throwaway database, then time the SLA scanner: the "
+        "first scan that flags the backlog, and steady-state scans that each "
+        "advance the clock by --interval seconds, with and without the SLA "
+        "indexes. Try --tickets 1000000 for the full-size run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=200000)
+        parser.add_argument('--scans', type=int, default=30)
+        parser.add_argument('--interval', type=int, default=600,
+                            help="Simulated seconds between steady-state scans")
+
+    def handle(self, *args, **options):
+        with throwaway_database():
+            self.stdout.write(f"Seeding {options['tickets']} open tickets on {connection.vendor}...")
+            data = seed_dataset(tickets=options['tickets'], comments_per_ticket=0)
+            now = timezone.now()
+            self.spread_deadlines(data['ticket_ids'], now)
+            analyze()
+
+            open_tickets = Ticket.objects.filter(status__in=Ticket.OPEN_STATUSES)
+            for queryset in late_tickets(open_tickets, [Ticket.SLA_ON_TRACK, Ticket.SLA_AT_RISK], now):
+                self.stdout.write(queryset.values('id').explain())
+
+            start = time.perf_counter()
+            backlog = scan_sla(now=now)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f"backlog scan: {backlog['breached']} breached, {backlog['at_risk']} at risk "
+                f"in {elapsed:.2f}s ({(backlog['breached'] + backlog['at_risk']) / elapsed:.0f} tickets/s)"
+            )
+
+            clock = now
+            indexed, clock = self.steady_state(clock, options)
+            indexes = [index for index in Ticket._meta.indexes if index.name in SLA_INDEXES]
+            with connection.schema_editor() as editor:
+                for index in indexes:
+                    editor.remove_index(Ticket, index)
+            analyze()
+            unindexed, clock = self.steady_state(clock, options)
+
+        self.report("steady state with SLA indexes:   ", indexed)
+        self.report("steady state without SLA indexes:", unindexed)
+
+    def spread_deadlines(self, ticket_ids, now, buckets=768):
+        """
+        Mark every ticket open and give each id range its own deadline,
+        from a day ago to a week ahead in 15-minute steps; the response
+        deadline is twelve hours earlier. One UPDATE per range.
+        """
+        ticket_ids = sorted(ticket_ids)
+        size = -(-len(ticket_ids) // buckets)
+        step = timedelta(days=8) / buckets
+        for n, start in enumerate(range(0, len(ticket_ids), size)):
+            chunk = ticket_ids[start:start + size]
+            due_at = now - timedelta(days=1) + n * step
+            Ticket.objects.filter(id__gte=chunk[0], id__lte=chunk[-1]).update(
+                status='Open', sla_state=Ticket.SLA_ON_TRACK, first_responded_at=None,
+                due_at=due_at, first_response_due_at=due_at - timedelta(hours=12),
+            )
+
+    def steady_state(self, clock, options):
+        samples, flagged = [], 0
+        for _ in range(options['scans']):
+            clock += timedelta(seconds=options['interval'])
+            start = time.perf_counter()
+            result = scan_sla(now=clock)
+            samples.append((time.perf_counter() - start) * 1000)
+            flagged += result['breached'] + result['at_risk']
+        return (samples, flagged), clock
+
+    def report(self, label, result):
+        samples, flagged = result
+        self.stdout.write(
+            f"{label} {len(samples)} scans, {flagged} tickets flagged, "
+            f"p50 {percentile(samples, 50):.1f} ms, p95 {percentile(samples, 95):.1f} ms, "
+            f"p99 {percentile(samples, 99):.1f} ms"
+        )
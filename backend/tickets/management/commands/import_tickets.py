@@ -0,0 +1,232 @@
+import csv
+import json
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from tickets import changes, search, sla
+from tickets.activity import reconcile_ticket_activity
+from tickets.bulk import preserve_timestamps
+from tickets.models import Category, Ticket, TicketComment
+from tickets.stats import recompute_ticket_stats
+
+TRUE_VALUES = {'1', 'true', 'yes', 'y', 't'}
+
+
+def read_records(path):
+    """
+    Stream dict records from a .csv or .jsonl/.ndjson file, one at a time.
+    """
+    suffix = Path(path).suffix.lower()
+    with open(path, newline='', encoding='utf-8') as handle:
+        if suffix == '.csv':
+            yield from csv.DictReader(handle)
+        elif suffix in ('.jsonl', '.ndjson'):
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            raise CommandError(f"Unsupported file type for {path}: use .csv or .jsonl")
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def as_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value or '').strip().lower() in TRUE_VALUES
+
+
+def as_list(value):
+    if isinstance(value, list):
+        return value
+    return [item.strip() for item in str(value or '').split(';') if item.strip()]
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import users, tickets and comments from CSV or JSONL files. "
+        "Rows are streamed, resolved against in-memory username/category maps "
+        "and inserted with bulk_create in batches, one transaction per batch. "
+        "Original created_at/updated_at values are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', help="username,email,first_name,last_name,groups,is_staff,date_joined")
+        parser.add_argument('--tickets', help="id,title,description,category,priority,status,"
+                                              "created_by,assigned_to,created_at,updated_at")
+        parser.add_argument('--comments', help="ticket_id,author,content,is_internal,created_at,updated_at")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--skip-stats', action='store_true',
+                            help="Do not rebuild TicketStat counters afterwards")
+        parser.add_argument('--skip-search', action='store_true',
+                            help="Do not rebuild the search index afterwards")
+
+    def handle(self, *args, **options):
+        if not any(options[name] for name in ('users', 'tickets', 'comments')):
+            raise CommandError("Pass at least one of --users, --tickets, --comments")
+
+        self.batch_size = options['batch_size']
+        self.user_ids = dict(User.objects.values_list('username', 'id'))
+        self.category_ids = dict(Category.objects.values_list('name', 'id'))
+        self.group_ids = dict(Group.objects.values_list('name', 'id'))
+        self.now = timezone.now()
+
+        if options['users']:
+            self.run('users', options['users'], self.import_users)
+        if options['tickets']:
+            self.run('tickets', options['tickets'], self.import_tickets)
+            self.reset_sequences(Ticket)
+        if options['comments']:
+            self.run('comments', options['comments'], self.import_comments)
+            self.reset_sequences(TicketComment)
+
+        # bulk_create bypasses the signals that maintain these
+        if not options['skip_stats']:
+            recompute_ticket_stats()
+        if not options['skip_search'] and search.is_supported():
+            with transaction.atomic():
+                search.rebuild_index()
+
+    def run(self, label, path, importer):
+        total = 0
+        start = time.perf_counter()
+        for batch in batched(read_records(path), self.batch_size):
+            with transaction.atomic():
+                total += importer(batch)
+            elapsed = time.perf_counter() - start
+            self.stdout.write(f"{label}: {total} rows, {total / elapsed:.0f} rows/s", ending='\r')
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: imported {total} rows in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.0f} rows/s)"
+        ))
+
+    def timestamp(self, value):
+        parsed = parse_datetime(value) if value else None
+        if parsed is None:
+            return self.now
+        if settings.USE_TZ and timezone.is_naive(parsed):
+            # Values without an offset are read in the project's TIME_ZONE
+            parsed = timezone.make_aware(parsed)
+        return parsed
+
+    def user_id(self, username, required=True):
+        if not username:
+            if required:
+                raise CommandError("Missing username reference")
+            return None
+        try:
+            return self.user_ids[username]
+        except KeyError:
+            raise CommandError(f"Unknown user {username!r}; import users first")
+
+    def category_id(self, name):
+        if not name:
+            return None
+        if name not in self.category_ids:
+            self.category_ids[name] = Category.objects.create(name=name).id
+        return self.category_ids[name]
+
+    def import_users(self, batch):
+        unusable = make_password(None)
+        new = {}
+        for row in batch:
+            # A username repeated within the batch keeps its first row
+            if row['username'] not in self.user_ids:
+                new.setdefault(row['username'], row)
+        new = list(new.values())
+        User.objects.bulk_create([
+            User(
+                username=row['username'],
+                email=row.get('email', ''),
+                first_name=row.get('first_name', ''),
+                last_name=row.get('last_name', ''),
+                is_staff=as_bool(row.get('is_staff')),
+                date_joined=self.timestamp(row.get('date_joined')),
+                password=unusable,
+            )
+            for row in new
+        ], batch_size=self.batch_size)
+        self.user_ids.update(
+            User.objects.filter(username__in=[row['username'] for row in new]).values_list('username', 'id')
+        )
+
+        memberships = []
+        for row in new:
+            for name in as_list(row.get('groups')):
+                if name not in self.group_ids:
+                    self.group_ids[name] = Group.objects.create(name=name).id
+                memberships.append(User.groups.through(
+                    user_id=self.user_ids[row['username']], group_id=self.group_ids[name]
+                ))
+        User.groups.through.objects.bulk_create(memberships, batch_size=self.batch_size)
+        return len(new)
+
+    def import_tickets(self, batch):
+        tickets = []
+        for row in batch:
+            created_at = self.timestamp(row.get('created_at'))
+            category_id = self.category_id(row.get('category'))
+            priority = row.get('priority') or 'Medium'
+            first_response_due_at, due_at = sla.deadlines(priority, category_id, created_at)
+            updated_at = self.timestamp(row.get('updated_at')) if row.get('updated_at') else created_at
+            tickets.append(Ticket(
+                id=int(row['id']) if row.get('id') else None,
+                title=row['title'][:50],
+                description=row.get('description', ''),
+                category_id=category_id,
+                priority=priority,
+                status=row.get('status') or 'Open',
+                created_by_id=self.user_id(row.get('created_by')),
+                assigned_to_id=self.user_id(row.get('assigned_to'), required=False),
+                created_at=created_at,
+                updated_at=updated_at,
+                last_activity_at=updated_at,
+                first_response_due_at=first_response_due_at,
+                due_at=due_at,
+            ))
+        with preserve_timestamps(Ticket):
+            Ticket.objects.bulk_create(tickets, batch_size=self.batch_size)
+        # Let delta-sync clients pick the new tickets up
+        changes.record_ticket_changes([ticket.id for ticket in tickets if ticket.id])
+        return len(tickets)
+
+    def import_comments(self, batch):
+        comments = []
+        for row in batch:
+            created_at = self.timestamp(row.get('created_at'))
+            comments.append(TicketComment(
+                ticket_id=int(row['ticket_id']),
+                author_id=self.user_id(row.get('author')),
+                content=row.get('content', ''),
+                is_internal=as_bool(row.get('is_internal')),
+                created_at=created_at,
+                updated_at=self.timestamp(row.get('updated_at')) if row.get('updated_at') else created_at,
+            ))
+        with preserve_timestamps(TicketComment):
+            TicketComment.objects.bulk_create(comments, batch_size=self.batch_size)
+        commented = Ticket.objects.filter(id__in={comment.ticket_id for comment in comments})
+        sla.refresh_first_responses(commented)
+        reconcile_ticket_activity(commented)
+        return len(comments)
+
+    def reset_sequences(self, model):
+        # Tickets may be imported with their legacy ids; move the sequence past them
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
@@ -0,0 +1,20 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from tickets.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete delta-sync change log rows older than --days. Clients holding "
+        "an older cursor are told to reload their ticket list."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} change rows."))
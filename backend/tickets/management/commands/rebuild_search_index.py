@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from tickets.search import is_supported, rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ticket full-text search index (SQLite FTS5 / PostgreSQL tsvector)."
+
+    def handle(self, *args, **options):
+        if not is_supported():
+            self.stdout.write(self.style.WARNING(
+                f"No full-text index for the {connection.vendor} backend; search uses icontains."
+            ))
+            return
+        with transaction.atomic():
+            rebuild_index()
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
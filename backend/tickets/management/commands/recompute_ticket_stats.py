@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from tickets.stats import get_ticket_stats, recompute_ticket_stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the TicketStat counters from the ticket table to repair drift."
+
+    def handle(self, *args, **options):
+        before = get_ticket_stats()
+        recompute_ticket_stats()
+        after = get_ticket_stats()
+        if before == after:
+            self.stdout.write(self.style.SUCCESS("Ticket stats were already consistent."))
+        else:
+            self.stdout.write(self.style.WARNING(f"Repaired global ticket stats: {before} -> {after}"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from tickets.activity import reconcile_ticket_activity
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount each ticket's comments and last activity time to repair "
+        "drift in the denormalized columns, --chunk-size tickets at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help="Tickets checked per transaction")
+
+    def handle(self, *args, **options):
+        chunk = options['chunk_size']
+        last_id = Ticket.objects.aggregate(last=Max('id'))['last'] or 0
+        repaired = 0
+        for start in range(0, last_id, chunk):
+            with transaction.atomic():
+                repaired += reconcile_ticket_activity(
+                    Ticket.objects.filter(id__gt=start, id__lte=start + chunk)
+                )
+        if repaired:
+            self.stdout.write(self.style.WARNING(f"Repaired comment activity on {repaired} tickets."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Ticket comment activity was already consistent."))
@@ -0,0 +1,100 @@
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from django.utils import timezone
+
+from tickets.jobs import Worker, WorkerMetrics, prune_finished, queue_stats, requeue_stale, work_off
+
+
+class Command(BaseCommand):
+    help = (
+        "Run background job workers: --threads polling threads in each of "
+        "--processes processes. Prints throughput and queue depth every "
+        "--metrics-interval seconds. --burst drains the queue and exits."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=4)
+        parser.add_argument('--processes', type=int, default=1)
+        parser.add_argument('--batch-size', type=int, default=10,
+                            help="Jobs claimed per round trip")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to sleep when the queue is empty")
+        parser.add_argument('--metrics-interval', type=float, default=10.0)
+        parser.add_argument('--burst', action='store_true',
+                            help="Run until no due jobs are left, then exit")
+
+    def handle(self, *args, **options):
+        if options['burst']:
+            metrics = WorkerMetrics()
+            start = time.perf_counter()
+            ran = work_off(f'burst-{os.getpid()}', options['batch_size'], metrics=metrics)
+            elapsed = time.perf_counter() - start
+            self.report(metrics.snapshot(), queue_stats())
+            self.stdout.write(self.style.SUCCESS(
+                f"Ran {ran} jobs in {elapsed:.2f}s ({ran / max(elapsed, 1e-9):.0f} jobs/s)"
+            ))
+            return
+
+        if options['processes'] <= 1:
+            self.serve(options)
+            return
+
+        # Forked children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [context.Process(target=self.serve, args=(options,)) for _ in range(options['processes'])]
+        for child in children:
+            child.start()
+
+        def stop_children(*args):
+            for child in children:
+                if child.is_alive():
+                    os.kill(child.pid, signal.SIGTERM)
+
+        signal.signal(signal.SIGINT, stop_children)
+        signal.signal(signal.SIGTERM, stop_children)
+        for child in children:
+            child.join()
+
+    def serve(self, options):
+        # Ctrl+C or SIGTERM: let running jobs finish, then exit
+        stop = threading.Event()
+        signal.signal(signal.SIGINT, lambda *args: stop.set())
+        signal.signal(signal.SIGTERM, lambda *args: stop.set())
+        metrics = WorkerMetrics()
+        workers = [
+            Worker(f'{os.getpid()}-{n}', stop, metrics, options['batch_size'], options['poll_interval'])
+            for n in range(options['threads'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f"[{os.getpid()}] {len(workers)} worker threads started")
+
+        retention = timedelta(days=getattr(settings, 'JOB_RETENTION_DAYS', 7))
+        while not stop.wait(options['metrics_interval']):
+            close_old_connections()
+            requeued, failed = requeue_stale()
+            if requeued or failed:
+                self.stdout.write(f"[{os.getpid()}] requeued {requeued} stale jobs, failed {failed}")
+            prune_finished(timezone.now() - retention)
+            self.report(metrics.snapshot(), queue_stats())
+        for worker in workers:
+            worker.join()
+        connections.close_all()
+
+    def report(self, snapshot, queue):
+        self.stdout.write(
+            f"[{os.getpid()}] {snapshot['done']} done, {snapshot['retried']} retried, "
+            f"{snapshot['failed']} failed in {snapshot['elapsed']:.1f}s "
+            f"({snapshot['per_second']:.1f} jobs/s, p50 {snapshot['p50_ms']:.1f} ms, "
+            f"p95 {snapshot['p95_ms']:.1f} ms); queue: {queue['queued']} queued "
+            f"(lag {queue['lag_seconds']:.1f}s), {queue['running']} running, {queue['failed']} failed"
+        )
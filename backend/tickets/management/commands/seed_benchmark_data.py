@@ -0,0 +1,51 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.scenarios import SCENARIOS
+from benchmarks.seed import PASSWORD, rebuild_derived, seed_dataset
+from benchmarks.utils import analyze
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the CONFIGURED database with synthetic users, categories, tickets "
+        "and comments for load-testing a running server with "
+        "'benchmark_api --url'. Writes a manifest of the seeded accounts. "
+        "Meant for an empty, disposable database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tickets', type=int, default=100000)
+        parser.add_argument('--comments-per-ticket', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--manifest', default='benchmark-manifest.json',
+                            help="Where to write the seeded usernames per role")
+
+    def handle(self, *args, **options):
+        if Ticket.objects.exists():
+            raise CommandError("The database already has tickets; seed an empty one")
+
+        self.stdout.write(f"Seeding {options['tickets']} tickets on {connection.vendor}...")
+        data = seed_dataset(
+            tickets=options['tickets'],
+            comments_per_ticket=options['comments_per_ticket'],
+            seed=options['seed'],
+        )
+        rebuild_derived()
+        analyze()
+
+        manifest = {
+            'password': PASSWORD,
+            'tickets': options['tickets'],
+            'comments_per_ticket': options['comments_per_ticket'],
+            'users': {
+                role: [user.username for user in data[key]]
+                for role, (_, key) in SCENARIOS.items()
+            },
+        }
+        with open(options['manifest'], 'w') as f:
+            json.dump(manifest, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['manifest']}"))
@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, transaction
+
+from tickets import conditional, sla
+from tickets.models import Ticket
+
+
+class Command(BaseCommand):
+    help = (
+        "Flag open tickets that breached their SLA or are about to, every "
+        "SLA_SCAN_INTERVAL seconds (or once with --once). --recompute "
+        "re-applies the current SLA policies to all open tickets first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help="Run a single scan and exit")
+        parser.add_argument('--interval', type=int, default=None,
+                            help="Seconds between scans (default: SLA_SCAN_INTERVAL)")
+        parser.add_argument('--recompute', action='store_true',
+                            help="Recompute open tickets' deadlines from the current policies")
+        parser.add_argument('--batch-size', type=int, default=sla.SCAN_BATCH)
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+
+        if options['recompute']:
+            with transaction.atomic():
+                updated = sla.refresh_deadlines(Ticket.objects.filter(status__in=Ticket.OPEN_STATUSES))
+            conditional.bump_generation()
+            self.stdout.write(self.style.SUCCESS(f"Recomputed deadlines for {updated} open tickets."))
+
+        if options['once']:
+            self.scan()
+            return
+
+        import schedule
+
+        interval = options['interval'] or getattr(settings, 'SLA_SCAN_INTERVAL', 60)
+        schedule.every(interval).seconds.do(self.scan)
+        self.stdout.write(f"Scanning every {interval}s; Ctrl+C to stop.")
+        self.scan()
+        try:
+            while True:
+                schedule.run_pending()
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            schedule.clear()
+
+    def scan(self):
+        # Long-running process: drop connections the database may have closed
+        close_old_connections()
+        start = time.perf_counter()
+        result = sla.scan_sla(batch_size=self.batch_size)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.stdout.write(
+            f"SLA scan: {result['breached']} breached, {result['at_risk']} at risk ({elapsed:.0f} ms)"
+        )
@@ -0,0 +1,274 @@
+import hashlib
+import os
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+
+from .models import Ticket, TicketStat
+from .profiling import QUERY_TOTALS
+from .stats import OPEN_PRIORITY, STATUS, UNASSIGNED_OPEN
+
+# ---------------------------
+# Prometheus metrics
+# ---------------------------
+#
+# MetricsMiddleware records, per route (the URL name, so ticket ids do not
+# become labels):
+#
+# - helpdesk_http_requests_total and helpdesk_http_request_duration_seconds
+#   by method and status;
+# - helpdesk_http_requests_in_flight;
+# - helpdesk_db_queries_per_request, plus helpdesk_db_query_duration_seconds
+#   for every query, through connection.execute_wrapper().
+#
+# The ticket gauges are read at scrape time from the global TicketStat
+# counters (see stats.py): one indexed query over a few dozen rows, never a
+# COUNT over the ticket table.
+#
+# With REQUEST_PROFILING on, helpdesk_profiled_query_seconds_total and
+# helpdesk_profiled_queries_total export the slowest query fingerprints
+# seen in the profiled requests (profiling.QUERY_TOTALS). Those totals are
+# kept per process and are not merged across workers; the pid label keeps
+# each worker's series apart.
+#
+# Under gunicorn every worker has its own counters. With the
+# PROMETHEUS_MULTIPROC_DIR environment variable set (before the workers
+# start), prometheus_client keeps them in memory-mapped files in that
+# directory and /metrics merges the files of all workers, so any worker can
+# answer a scrape. gunicorn.conf.py wipes the directory on start and marks
+# exited workers dead. Streaming responses are timed up to the first byte.
+#
+# The middleware runs in whichever mode the rest of the stack does. Under
+# ASGI a request's ORM calls all run in its one thread-sensitive worker
+# thread, and database connections are thread-local, so the query wrappers
+# are installed and removed in that thread.
+
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+UNMATCHED = '<unmatched>'
+
+REQUESTS = Counter(
+    'helpdesk_http_requests_total', 'HTTP requests by route, method and status.',
+    ['route', 'method', 'status'],
+)
+LATENCY = Histogram(
+    'helpdesk_http_request_duration_seconds', 'Time to produce the response, by route.',
+    ['route', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+IN_FLIGHT = Gauge(
+    'helpdesk_http_requests_in_flight', 'Requests being handled, by route.',
+    ['route', 'method'], multiprocess_mode='livesum',
+)
+QUERIES = Histogram(
+    'helpdesk_db_queries_per_request', 'SQL queries run by one request, by route.',
+    ['route'],
+    buckets=(0, 1, 2, 4, 8, 16, 32, 64, 128),
+)
+QUERY_DURATION = Histogram(
+    'helpdesk_db_query_duration_seconds', 'Time per SQL query, by database alias.',
+    ['database'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+PRIORITIES = [value for value, _ in Ticket.PRIORITY_CHOICES]
+STATUSES = [value for value, _ in Ticket.STATUS_CHOICES]
+
+
+class TicketCollector:
+    """
+    Ticket gauges from the global TicketStat counters, collected on scrape.
+    """
+
+    def describe(self):
+        # Lets the registry learn the metric names without querying
+        return self.families()
+
+    def families(self):
+        return {
+            OPEN_PRIORITY: GaugeMetricFamily(
+                'helpdesk_open_tickets', 'Open and in-progress tickets by priority.', labels=['priority']
+            ),
+            UNASSIGNED_OPEN: GaugeMetricFamily(
+                'helpdesk_unassigned_open_tickets', 'Open tickets nobody is assigned to, by priority.',
+                labels=['priority'],
+            ),
+            STATUS: GaugeMetricFamily('helpdesk_tickets', 'Tickets by status.', labels=['status']),
+        }.values()
+
+    def collect(self):
+        counts = {
+            (dimension, value): count
+            for dimension, value, count in TicketStat.objects.filter(
+                scope=TicketStat.SCOPE_GLOBAL, owner_id=0,
+                dimension__in=[OPEN_PRIORITY, UNASSIGNED_OPEN, STATUS],
+            ).values_list('dimension', 'value', 'count')
+        }
+        open_tickets, unassigned, by_status = self.families()
+        # Every label value is always exported, so a series drops to 0
+        # instead of disappearing
+        for priority in PRIORITIES:
+            open_tickets.add_metric([priority], counts.get((OPEN_PRIORITY, priority), 0))
+            unassigned.add_metric([priority], counts.get((UNASSIGNED_OPEN, priority), 0))
+        for status in STATUSES:
+            by_status.add_metric([status], counts.get((STATUS, status), 0))
+        return [open_tickets, unassigned, by_status]
+
+
+# Fingerprints exported by SlowQueryCollector, and the length their SQL
+# label is cut to
+EXPORTED_FINGERPRINTS = 20
+SQL_LABEL_LENGTH = 200
+
+
+class SlowQueryCollector:
+    """
+    Totals of this process's slowest query fingerprints, collected on scrape.
+    """
+
+    def describe(self):
+        return self.families()
+
+    def families(self):
+        labels = ['fingerprint', 'sql', 'pid']
+        return (
+            CounterMetricFamily(
+                'helpdesk_profiled_query_seconds', 'Time spent in the slowest query fingerprints of '
+                'profiled requests, per process.', labels=labels,
+            ),
+            CounterMetricFamily(
+                'helpdesk_profiled_queries', 'Runs of the slowest query fingerprints of profiled '
+                'requests, per process.', labels=labels,
+            ),
+        )
+
+    def collect(self):
+        seconds, runs = self.families()
+        pid = str(os.getpid())
+        for sql, count, total in QUERY_TOTALS.slowest(EXPORTED_FINGERPRINTS):
+            # Truncated SQL may collide; the hash keeps label sets unique
+            labels = [hashlib.md5(sql.encode()).hexdigest()[:12], sql[:SQL_LABEL_LENGTH], pid]
+            seconds.add_metric(labels, total)
+            runs.add_metric(labels, count)
+        return [seconds, runs]
+
+
+# Collectors read at scrape time by whichever process answers it
+SCRAPE_REGISTRY = CollectorRegistry()
+SCRAPE_REGISTRY.register(TicketCollector())
+SCRAPE_REGISTRY.register(SlowQueryCollector())
+
+
+def exposition():
+    """
+    The /metrics body in the Prometheus text format.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry) + generate_latest(SCRAPE_REGISTRY)
+
+
+def route_of(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else UNMATCHED
+
+
+class QueryObserver:
+    """
+    connection.execute_wrapper() hook counting and timing one request's queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            QUERY_DURATION.labels(context['connection'].alias).observe(time.perf_counter() - start)
+
+
+def _observe_queries(stack, observer):
+    """
+    Install observer on this thread's connections until stack is closed.
+    """
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(observer))
+
+
+class MetricsMiddleware:
+    """
+    Put first in MIDDLEWARE so the latency covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would hand a plain process_view to sync_to_async
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        observer = QueryObserver()
+        try:
+            with ExitStack() as stack:
+                _observe_queries(stack, observer)
+                response = self.get_response(request)
+        finally:
+            self.leave(request)
+        self.record(request, response, start, observer)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        observer = QueryObserver()
+        stack = ExitStack()
+        await sync_to_async(_observe_queries)(stack, observer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+            self.leave(request)
+        self.record(request, response, start, observer)
+        return response
+
+    def leave(self, request):
+        in_flight = getattr(request, '_metrics_in_flight', None)
+        if in_flight is not None:
+            in_flight.dec()
+
+    def record(self, request, response, start, observer):
+        route = route_of(request)
+        LATENCY.labels(route, request.method).observe(time.perf_counter() - start)
+        REQUESTS.labels(route, request.method, response.status_code).inc()
+        QUERIES.labels(route).observe(observer.count)
+
+    def enter(self, request):
+        # The route is only known once the URL has been resolved
+        request._metrics_in_flight = IN_FLIGHT.labels(route_of(request), request.method)
+        request._metrics_in_flight.inc()
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.enter(request)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.enter(request)
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.1 on 2026-10-17 07:35
+
+from django.db import migrations, models
+
+
+def populate_ticket_stats(apps, schema_editor):
+    from tickets.stats import recompute_ticket_stats
+
+    recompute_ticket_stats(
+        ticket_model=apps.get_model('tickets', 'Ticket'),
+        stat_model=apps.get_model('tickets', 'TicketStat'),
+        user_model=apps.get_model('auth', 'User'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0005_ticket_indexes'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('global', 'Global'), ('creator', 'Per creator'), ('assignee', 'Per assignee')], max_length=10)),
+                ('owner_id', models.IntegerField(default=0)),
+                ('dimension', models.CharField(max_length=20)),
+                ('value', models.CharField(blank=True, default='', max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scope', 'owner_id', 'dimension', 'value'), name='ticket_stat_unique')],
+            },
+        ),
+        migrations.RunPython(populate_ticket_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 08:10
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from tickets.search import create_index_table, rebuild_index
+
+    create_index_table(schema_editor)
+    rebuild_index(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from tickets.search import drop_index_table
+
+    drop_index_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0006_ticketstat'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
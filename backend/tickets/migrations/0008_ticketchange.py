@@ -0,0 +1,27 @@
+# Generated by Django 6.0.1 on 2026-10-17 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0007_ticket_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketChange',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('ticket_id', models.IntegerField()),
+                ('created_by_id', models.IntegerField(null=True)),
+                ('assigned_to_id', models.IntegerField(null=True)),
+                ('previous_assigned_to_id', models.IntegerField(null=True)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['created_by_id', 'id'], name='ticket_change_creator_idx'), models.Index(fields=['assigned_to_id', 'id'], name='ticket_change_assignee_idx'), models.Index(condition=models.Q(('previous_assigned_to_id__isnull', False)), fields=['previous_assigned_to_id', 'id'], name='ticket_change_prev_idx')],
+            },
+        ),
+    ]
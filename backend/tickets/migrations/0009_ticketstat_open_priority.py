@@ -0,0 +1,25 @@
+# Generated by Django 6.0.1 on 2026-10-17 08:05
+
+from django.db import migrations
+
+
+def populate_open_priority(apps, schema_editor):
+    # Rebuilding every counter also fills the new open_priority rows
+    from tickets.stats import recompute_ticket_stats
+
+    recompute_ticket_stats(
+        ticket_model=apps.get_model('tickets', 'Ticket'),
+        stat_model=apps.get_model('tickets', 'TicketStat'),
+        user_model=apps.get_model('auth', 'User'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0008_ticketchange'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_open_priority, migrations.RunPython.noop),
+    ]
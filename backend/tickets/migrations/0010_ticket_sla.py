@@ -0,0 +1,92 @@
+# Generated by Django 6.0.1 on 2026-10-17 08:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# (priority, first response, resolution) in minutes; edit them in the admin
+DEFAULT_POLICIES = [
+    ('Critical', 60, 4 * 60),
+    ('High', 4 * 60, 24 * 60),
+    ('Medium', 8 * 60, 3 * 24 * 60),
+    ('Low', 24 * 60, 5 * 24 * 60),
+]
+
+
+def create_default_policies(apps, schema_editor):
+    from tickets.sla import load_policies, refresh_deadlines, refresh_first_responses
+
+    SLAPolicy = apps.get_model('tickets', 'SLAPolicy')
+    Ticket = apps.get_model('tickets', 'Ticket')
+    SLAPolicy.objects.bulk_create([
+        SLAPolicy(name=f'{priority} priority', priority=priority,
+                  first_response_minutes=first_response, resolution_minutes=resolution)
+        for priority, first_response, resolution in DEFAULT_POLICIES
+    ])
+    refresh_deadlines(Ticket.objects.all(), policies=load_policies(SLAPolicy))
+    refresh_first_responses(
+        Ticket.objects.all(), comment_model=apps.get_model('tickets', 'TicketComment')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0009_ticketstat_open_priority'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SLAPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('priority', models.CharField(blank=True, choices=[('Low', 'Low'), ('Medium', 'Medium'), ('High', 'High'), ('Critical', 'Critical')], default='', max_length=10)),
+                ('first_response_minutes', models.PositiveIntegerField(blank=True, null=True)),
+                ('resolution_minutes', models.PositiveIntegerField()),
+                ('is_active', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'SLA policy',
+                'verbose_name_plural': 'SLA policies',
+            },
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='escalated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='first_responded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='first_response_due_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='sla_state',
+            field=models.CharField(blank=True, choices=[('', 'On track'), ('at_risk', 'At risk'), ('breached', 'Breached')], default='', max_length=10),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('due_at__isnull', False)), fields=['status', 'sla_state', 'due_at'], name='ticket_sla_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(condition=models.Q(('first_responded_at__isnull', True), ('first_response_due_at__isnull', False)), fields=['status', 'sla_state', 'first_response_due_at'], name='ticket_sla_response_idx'),
+        ),
+        migrations.AddField(
+            model_name='slapolicy',
+            name='category',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='sla_policies', to='tickets.category'),
+        ),
+        migrations.RunPython(create_default_policies, migrations.RunPython.noop),
+    ]
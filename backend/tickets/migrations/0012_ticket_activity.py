@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-17 08:22
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_activity(apps, schema_editor):
+    from tickets.activity import reconcile_ticket_activity
+
+    Ticket = apps.get_model('tickets', 'Ticket')
+    Ticket.objects.update(last_activity_at=F('updated_at'))
+    reconcile_ticket_activity(
+        Ticket.objects.all(), comment_model=apps.get_model('tickets', 'TicketComment')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0011_job'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='public_comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='ticket_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['created_by', '-last_activity_at', '-id'], name='ticket_creator_activity_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['assigned_to', '-last_activity_at', '-id'], name='ticket_assignee_activity_idx'),
+        ),
+        migrations.RunPython(backfill_activity, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-17 09:10
+
+from django.db import migrations
+
+
+def populate_global_open(apps, schema_editor):
+    # Rebuilding every counter also fills the new global open_priority and
+    # unassigned_open rows
+    from tickets.stats import recompute_ticket_stats
+
+    recompute_ticket_stats(
+        ticket_model=apps.get_model('tickets', 'Ticket'),
+        stat_model=apps.get_model('tickets', 'TicketStat'),
+        user_model=apps.get_model('auth', 'User'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tickets', '0012_ticket_activity'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_global_open, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.contrib.auth.models import User
 
 class Category(models.Model):
@@ -23,6 +24,18 @@ class Ticket(models.Model):
         ('Closed', 'Closed')
     ]
 
+    # Statuses that still count against workloads and SLA deadlines
+    OPEN_STATUSES = ('Open', 'In progress')
+
+    SLA_ON_TRACK = ''
+    SLA_AT_RISK = 'at_risk'
+    SLA_BREACHED = 'breached'
+    SLA_STATE_CHOICES = [
+        (SLA_ON_TRACK, 'On track'),
+        (SLA_AT_RISK, 'At risk'),
+        (SLA_BREACHED, 'Breached'),
+    ]
+
     # 2. Basic Fields
     title = models.CharField(max_length=50)
 
@@ -71,10 +84,123 @@ class Ticket(models.Model):
     # auto_now updates the time every time you click save
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Denormalized from TicketComment (see activity.py): comment counts for
+    # staff and for customers (internal notes excluded), and the time of the
+    # latest ticket edit or comment
+    comment_count = models.PositiveIntegerField(default=0)
+    public_comment_count = models.PositiveIntegerField(default=0)
+    last_activity_at = models.DateTimeField(default=timezone.now)
+
+    # SLA tracking (see sla.py); the deadlines are null when no policy applies
+    first_response_due_at = models.DateTimeField(null=True, blank=True)
+    first_responded_at = models.DateTimeField(null=True, blank=True)
+    due_at = models.DateTimeField(null=True, blank=True)
+    sla_state = models.CharField(
+        max_length=10,
+        choices=SLA_STATE_CHOICES,
+        blank=True,
+        default=SLA_ON_TRACK
+    )
+    escalated_at = models.DateTimeField(null=True, blank=True)
+
     # 5. String Representation
     def __str__(self):
         return self.title
 
+    # Maintained only by relative UPDATEs (see activity.py)
+    COUNTER_FIELDS = ('comment_count', 'public_comment_count')
+
+    # Saves and deletes run in one transaction with the signal handlers that
+    # keep TicketStat in step (see stats.py)
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def edit_fields(self, *names):
+        """
+        Record an edit of the named fields as ticket activity and return the
+        update_fields to save it with. Edits of existing tickets should pass
+        these, since a full save would write back COUNTER_FIELDS as this
+        instance loaded them. Priority/category edits also write the SLA
+        deadlines that pre_save recomputes.
+        """
+        self.last_activity_at = timezone.now()
+        fields = [*names, 'updated_at', 'last_activity_at']
+        if {'priority', 'category'} & set(names):
+            fields += ['first_response_due_at', 'due_at', 'sla_state']
+        return fields
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
+
+    # 6. Indexes matching the list/dashboard access paths; each list is
+    # ordered by (-created_at, -id), see pagination.py
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='ticket_created_idx'),
+            models.Index(fields=['created_by', '-created_at', '-id'], name='ticket_creator_created_idx'),
+            models.Index(fields=['assigned_to', '-created_at', '-id'], name='ticket_assignee_created_idx'),
+            models.Index(fields=['status', 'priority', '-created_at', '-id'], name='ticket_status_priority_idx'),
+            models.Index(fields=['priority', 'status'], name='ticket_priority_status_idx'),
+            models.Index(
+                fields=['-created_at', '-id'],
+                name='ticket_unassigned_idx',
+                condition=models.Q(assigned_to__isnull=True),
+            ),
+            # "Recently active" lists, ordered by (-last_activity_at, -id)
+            models.Index(fields=['-last_activity_at', '-id'], name='ticket_activity_idx'),
+            models.Index(fields=['created_by', '-last_activity_at', '-id'], name='ticket_creator_activity_idx'),
+            models.Index(fields=['assigned_to', '-last_activity_at', '-id'], name='ticket_assignee_activity_idx'),
+            # Range scans for the SLA scanner by status, state and deadline.
+            # status is a key column rather than part of the condition:
+            # SQLite only uses a partial index when the query repeats its
+            # condition literally, and Django binds status IN (...) values
+            # as parameters.
+            models.Index(
+                fields=['status', 'sla_state', 'due_at'],
+                name='ticket_sla_due_idx',
+                condition=models.Q(due_at__isnull=False),
+            ),
+            models.Index(
+                fields=['status', 'sla_state', 'first_response_due_at'],
+                name='ticket_sla_response_idx',
+                condition=models.Q(first_responded_at__isnull=True, first_response_due_at__isnull=False),
+            ),
+        ]
+
+
+class SLAPolicy(models.Model):
+    """
+    Response and resolution targets for tickets of a priority and/or
+    category. Blank priority or category means "any"; the most specific
+    active policy wins (see sla.match_policy).
+    """
+    name = models.CharField(max_length=100)
+    priority = models.CharField(
+        max_length=10,
+        choices=Ticket.PRIORITY_CHOICES,
+        blank=True,
+        default=''
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='sla_policies'
+    )
+    first_response_minutes = models.PositiveIntegerField(null=True, blank=True)
+    resolution_minutes = models.PositiveIntegerField()
+    is_active = models.BooleanField(default=True)
+
+    class Meta:
+        verbose_name = 'SLA policy'
+        verbose_name_plural = 'SLA policies'
+
+    def __str__(self):
+        return self.name
+
 
 class TicketComment(models.Model):
     """
@@ -104,6 +230,139 @@ class TicketComment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['ticket', '-created_at'], name='comment_ticket_created_idx'),
+            models.Index(
+                fields=['ticket', '-created_at'],
+                name='comment_ticket_public_idx',
+                condition=models.Q(is_internal=False),
+            ),
+        ]
     
     def __str__(self):
-        return f"Comment on {self.ticket.title} by {self.author.username}"
\ No newline at end of file
+        return f"Comment on {self.ticket.title} by {self.author.username}"
+
+
+class TicketStat(models.Model):
+    """
+    Materialized ticket counters for the dashboards, maintained in the same
+    transaction as every Ticket save/delete (see stats.py). Each row is one
+    counter, e.g. (global, 0, status, Open) or (creator, 12, total, '').
+    """
+    SCOPE_GLOBAL = 'global'
+    SCOPE_CREATOR = 'creator'
+    SCOPE_ASSIGNEE = 'assignee'
+    SCOPE_CHOICES = [
+        (SCOPE_GLOBAL, 'Global'),
+        (SCOPE_CREATOR, 'Per creator'),
+        (SCOPE_ASSIGNEE, 'Per assignee'),
+    ]
+
+    scope = models.CharField(max_length=10, choices=SCOPE_CHOICES)
+    # User id for the creator/assignee scopes, 0 for global
+    owner_id = models.IntegerField(default=0)
+    dimension = models.CharField(max_length=20)
+    value = models.CharField(max_length=50, blank=True, default='')
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['scope', 'owner_id', 'dimension', 'value'],
+                name='ticket_stat_unique',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.owner_id} {self.dimension}={self.value} -> {self.count}"
+
+
+class TicketChange(models.Model):
+    """
+    Append-only change log behind /api/tickets/changes/. The auto-increment
+    id is the sync sequence; one row is written per ticket create, update,
+    delete or comment write (see changes.py). Ids are plain integers rather
+    than foreign keys so rows outlive deleted tickets as tombstones.
+    """
+    id = models.BigAutoField(primary_key=True)
+    ticket_id = models.IntegerField()
+    created_by_id = models.IntegerField(null=True)
+    assigned_to_id = models.IntegerField(null=True)
+    # Set when the change moved the ticket away from this assignee, so they
+    # still see it (as a tombstone) in their feed
+    previous_assigned_to_id = models.IntegerField(null=True)
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_by_id', 'id'], name='ticket_change_creator_idx'),
+            models.Index(fields=['assigned_to_id', 'id'], name='ticket_change_assignee_idx'),
+            models.Index(
+                fields=['previous_assigned_to_id', 'id'],
+                name='ticket_change_prev_idx',
+                condition=models.Q(previous_assigned_to_id__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} ticket {self.ticket_id}"
+
+
+class Job(models.Model):
+    """
+    A unit of background work run by manage.py run_workers (see jobs.py).
+    Rows are claimed by flipping status to running under a per-claim token
+    in locked_by.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    run_at = models.DateTimeField()
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Claiming: due jobs oldest first
+            models.Index(fields=['status', 'run_at', 'id'], name='job_status_run_at_idx'),
+            # Pruning and the finished-per-minute metric
+            models.Index(fields=['status', 'finished_at'], name='job_status_finished_idx'),
+            models.Index(fields=['locked_by'], name='job_locked_by_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.id} {self.name} ({self.status})"
+
+
+class UserTokenVersion(models.Model):
+    """
+    Per-user state behind the stateless access tokens (see authentication.py).
+    version is stamped into every token and bumped whenever the claims go
+    stale (groups, superuser flag, username, deactivation, password change);
+    refresh tokens issued before revoked_at are refused. Users without a row
+    are at version 0.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='token_version')
+    version = models.PositiveIntegerField(default=0)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
@@ -0,0 +1,135 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+# ---------------------------
+# Cursor (keyset) pagination
+# ---------------------------
+#
+# Pages are addressed by an opaque cursor holding the (key, id) of the
+# boundary row instead of a page number, so fetching page 1000 costs the
+# same index seek as page 1 and rows created while a client is paging do
+# not shift the rows it has not seen yet. Ticket lists are keyed by
+# created_at (newest first); other lists pass their own key.
+
+DEFAULT_PAGE_SIZE = 25
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, pk, direction):
+    """
+    Build an opaque cursor for the row (value, pk).
+    direction is 'n' (rows after this one) or 'p' (rows before it).
+    """
+    if hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    payload = json.dumps([value, pk, direction], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor(); raises InvalidCursor on anything malformed.
+    The key value is returned as encoded (datetimes as ISO strings).
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk, direction = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        raise InvalidCursor("Invalid cursor")
+    if value is None or direction not in ('n', 'p'):
+        raise InvalidCursor("Invalid cursor")
+    return value, pk, direction
+
+
+def get_page_size(request):
+    """
+    Read ?page_size= from the request, clamped to [1, MAX_PAGE_SIZE].
+    """
+    try:
+        size = int(request.GET.get('page_size', DEFAULT_PAGE_SIZE))
+    except (TypeError, ValueError):
+        size = DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _page_query(request, queryset, key, descending):
+    """
+    The sliced queryset for the requested page, one row longer than the
+    page to tell whether there is more, plus what _finish_page() needs.
+    """
+    page_size = get_page_size(request)
+    cursor = request.GET.get('cursor')
+
+    forward = (f'-{key}', '-id') if descending else (key, 'id')
+    backward = (key, 'id') if descending else (f'-{key}', '-id')
+    after, before = ('lt', 'gt') if descending else ('gt', 'lt')
+
+    if not cursor:
+        return queryset.order_by(*forward)[:page_size + 1], page_size, None
+
+    value, pk, direction = decode_cursor(cursor)
+    try:
+        value = queryset.model._meta.get_field(key).to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+    if value is None:
+        raise InvalidCursor("Invalid cursor")
+    lookup = after if direction == 'n' else before
+    page = queryset.filter(
+        Q(**{f'{key}__{lookup}': value}) | Q(**{key: value, f'id__{lookup}': pk})
+    ).order_by(*(forward if direction == 'n' else backward))[:page_size + 1]
+    return page, page_size, direction
+
+
+def _finish_page(rows, page_size, direction, key):
+    if direction is None:
+        has_next, has_prev = len(rows) > page_size, False
+        rows = rows[:page_size]
+    elif direction == 'n':
+        has_next, has_prev = len(rows) > page_size, True
+        rows = rows[:page_size]
+    else:
+        has_next, has_prev = True, len(rows) > page_size
+        rows = rows[:page_size][::-1]
+
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(getattr(rows[-1], key), rows[-1].id, 'n')
+    if rows and has_prev:
+        prev_cursor = encode_cursor(getattr(rows[0], key), rows[0].id, 'p')
+    return rows, next_cursor, prev_cursor
+
+
+def paginate_queryset(request, queryset, key='created_at', descending=True):
+    """
+    Slice a queryset by (key, id) using ?cursor=, newest first by default.
+
+    Returns (rows, next_cursor, prev_cursor). Raises InvalidCursor if the
+    client sent a cursor we did not issue.
+    """
+    page, page_size, direction = _page_query(request, queryset, key, descending)
+    return _finish_page(list(page), page_size, direction, key)
+
+
+async def apaginate_queryset(request, queryset, key='created_at', descending=True):
+    """
+    paginate_queryset() for async views, fetching the page with async iteration.
+    """
+    page, page_size, direction = _page_query(request, queryset, key, descending)
+    return _finish_page([row async for row in page], page_size, direction, key)
+
+
+def paginated_response_data(results, next_cursor, prev_cursor):
+    return {
+        "results": results,
+        "next": next_cursor,
+        "prev": prev_cursor,
+    }
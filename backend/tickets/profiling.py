@@ -0,0 +1,303 @@
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('tickets.profiling')
+
+# ---------------------------
+# Request profiling (opt-in)
+# ---------------------------
+#
+# With REQUEST_PROFILING on, ProfilingMiddleware times a sample of requests
+# (REQUEST_PROFILING_SAMPLE_RATE) and splits the total into:
+#
+# - db: every query, through connection.execute_wrapper(), with a count and
+#   per-fingerprint totals for the slow query summary;
+# - serialize: DRF serializer .data (see install_serializer_timing());
+# - render: response.render(), i.e. JSON/template rendering, measured with
+#   a post-render callback.
+#
+# Results go out as a Server-Timing header (browser dev tools show it) and
+# as one log line per request on the tickets.profiling logger, with the
+# fields also attached as record.profile for structured handlers.
+#
+# Each request's fingerprints are also added to QUERY_TOTALS, this
+# process's running totals across profiled requests. It holds at most
+# REQUEST_PROFILING_FINGERPRINTS entries, and /metrics exports the slowest
+# of them (see metrics.py).
+#
+# Switched off, the middleware raises MiddlewareNotUsed and Django drops it
+# from the chain, and serializers are never patched: no per-request cost.
+# Streaming responses are timed up to the first byte only. Under ASGI the
+# query wrappers go on the connections of the request's sync worker thread,
+# where its ORM calls run (see metrics.py); the profile itself travels in a
+# ContextVar, which sync_to_async carries over.
+
+_current = ContextVar('request_profile', default=None)
+
+
+def fingerprint(sql):
+    """
+    SQL with literals and IN lists collapsed, so queries that differ only
+    in their parameters compare equal.
+    """
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r"'(?:[^']|'')*'", '?', sql)
+    sql = re.sub(r'\b\d+(\.\d+)?\b', '?', sql)
+    sql = re.sub(r'\(\s*\?(\s*,\s*\?)*\s*\)', '(?...)', sql)
+    return re.sub(r'\s+', ' ', sql).strip()
+
+
+class RequestProfile:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.db = 0.0
+        self.queries = 0
+        # SQL as sent (placeholders, not values) -> [count, seconds]
+        self.fingerprints = {}
+        self.phases = {'serialize': 0.0, 'render': 0.0}
+        self._depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """
+        connection.execute_wrapper() hook: time one query.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.db += elapsed
+            self.queries += 1
+            entry = self.fingerprints.setdefault(sql, [0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+
+    def enter(self):
+        # Nested serializers (a ListSerializer's children, a serializer used
+        # inside another's method field) only count at the outermost level
+        self._depth += 1
+        return self._depth == 1
+
+    def leave(self, phase, started):
+        self._depth -= 1
+        if started is not None:
+            self.phases[phase] += time.perf_counter() - started
+
+    def by_fingerprint(self):
+        """
+        fingerprint -> [count, seconds], merging SQL that differs only in
+        its literals.
+        """
+        merged = {}
+        for sql, (count, seconds) in self.fingerprints.items():
+            entry = merged.setdefault(fingerprint(sql), [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+        return merged
+
+    def summary(self, total):
+        serialize, render = self.phases['serialize'], self.phases['render']
+        return {
+            'total_ms': round(total * 1000, 2),
+            'db_ms': round(self.db * 1000, 2),
+            'queries': self.queries,
+            'serialize_ms': round(serialize * 1000, 2),
+            'render_ms': round(render * 1000, 2),
+            # Whatever is left: middleware, auth, view logic, Python-side ORM work
+            'app_ms': round(max(total - self.db - serialize - render, 0) * 1000, 2),
+        }
+
+
+def slowest(fingerprints, limit):
+    """
+    The `limit` (fingerprint, count, seconds) with the most total time,
+    slowest first.
+    """
+    ranked = sorted(fingerprints.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+    return [(sql, count, seconds) for sql, (count, seconds) in ranked]
+
+
+class FingerprintTotals:
+    """
+    Query fingerprints summed over every profiled request of this process,
+    fingerprint -> [count, seconds]. Once `size` fingerprints are held, a
+    new one evicts the one with the least total time, so memory stays
+    bounded while the slowest ones are kept.
+    """
+
+    def __init__(self, size=None):
+        self.size = size
+        self.totals = {}
+        self.lock = threading.Lock()
+
+    def add(self, fingerprints):
+        size = self.size or getattr(settings, 'REQUEST_PROFILING_FINGERPRINTS', 200)
+        with self.lock:
+            for sql, (count, seconds) in fingerprints.items():
+                entry = self.totals.get(sql)
+                if entry is None:
+                    while len(self.totals) >= size:
+                        del self.totals[min(self.totals, key=lambda key: self.totals[key][1])]
+                    entry = self.totals[sql] = [0, 0.0]
+                entry[0] += count
+                entry[1] += seconds
+
+    def slowest(self, limit):
+        with self.lock:
+            return slowest(self.totals, limit)
+
+    def clear(self):
+        with self.lock:
+            self.totals.clear()
+
+
+QUERY_TOTALS = FingerprintTotals()
+
+
+def server_timing(fields):
+    return ', '.join([
+        f"total;dur={fields['total_ms']}",
+        f"db;dur={fields['db_ms']};desc=\"{fields['queries']} queries\"",
+        f"serialize;dur={fields['serialize_ms']}",
+        f"render;dur={fields['render_ms']}",
+        f"app;dur={fields['app_ms']}",
+    ])
+
+
+def install_serializer_timing():
+    """
+    Wrap Serializer.data and ListSerializer.data so they report to the
+    active profile. Done once, and only when profiling is enabled.
+    """
+    from rest_framework import serializers
+
+    for cls in (serializers.Serializer, serializers.ListSerializer):
+        original = cls.__dict__['data']
+        if getattr(original.fget, 'profiled', False):
+            continue
+
+        def data(self, _fget=original.fget):
+            profile = _current.get()
+            if profile is None:
+                return _fget(self)
+            started = time.perf_counter() if profile.enter() else None
+            try:
+                return _fget(self)
+            finally:
+                profile.leave('serialize', started)
+
+        data.profiled = True
+        setattr(cls, 'data', property(data, doc=original.__doc__))
+
+
+def _observe_queries(stack, profile):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(profile))
+
+
+class ProfilingMiddleware:
+    """
+    Put first in MIDDLEWARE so the total covers the whole stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'REQUEST_PROFILING_SAMPLE_RATE', 1.0)
+        self.slow_query_count = getattr(settings, 'REQUEST_PROFILING_SLOW_QUERIES', 5)
+        install_serializer_timing()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django would hand a plain hook to sync_to_async
+            self.process_template_response = self.aprocess_template_response
+
+    def sampled(self):
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        try:
+            with ExitStack() as stack:
+                _observe_queries(stack, profile)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.report(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        stack = ExitStack()
+        try:
+            await sync_to_async(_observe_queries)(stack, profile)
+            try:
+                response = await self.get_response(request)
+            finally:
+                await sync_to_async(stack.close)()
+        finally:
+            _current.reset(token)
+        return self.report(request, response, profile)
+
+    def report(self, request, response, profile):
+        fields = profile.summary(time.perf_counter() - profile.start)
+        response['Server-Timing'] = server_timing(fields)
+        fingerprints = profile.by_fingerprint()
+        QUERY_TOTALS.add(fingerprints)
+        slow = [
+            {'sql': sql, 'count': count, 'ms': round(seconds * 1000, 2)}
+            for sql, count, seconds in slowest(fingerprints, self.slow_query_count)
+        ]
+        logger.info(
+            "%s %s %s total=%.1fms db=%.1fms queries=%d serialize=%.1fms render=%.1fms",
+            request.method, request.path, response.status_code, fields['total_ms'],
+            fields['db_ms'], fields['queries'], fields['serialize_ms'], fields['render_ms'],
+            extra={'profile': {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **fields,
+                'slow_queries': slow,
+            }},
+        )
+        return response
+
+    def time_render(self, response):
+        # Called right before the handler renders the response (DRF
+        # Response, TemplateResponse); the callback fires right after
+        profile = _current.get()
+        if profile is not None:
+            started = time.perf_counter()
+
+            def rendered(response):
+                profile.phases['render'] += time.perf_counter() - started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def process_template_response(self, request, response):
+        return self.time_render(response)
+
+    async def aprocess_template_response(self, request, response):
+        return self.time_render(response)
@@ -0,0 +1,132 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+
+# ---------------------------
+# Role resolution
+# ---------------------------
+#
+# Group membership is loaded once per request (memoised on the user object)
+# and shared across requests through the default cache. signals.py drops the
+# cached entry whenever User.groups changes, so a permission check costs at
+# most one query and usually none.
+
+IT_STAFF = 'IT Staff'
+SUPPORT_TEAM = 'Support Team'
+
+_REQUEST_ATTR = '_helpdesk_group_names'
+
+
+def _cache_key(user_id):
+    return f'tickets:user-groups:{user_id}'
+
+
+def get_group_names(user):
+    """
+    Return the frozenset of group names for user.
+    """
+    if not getattr(user, 'is_authenticated', False):
+        return frozenset()
+
+    names = getattr(user, _REQUEST_ATTR, None)
+    if names is not None:
+        return names
+
+    key = _cache_key(user.pk)
+    names = cache.get(key)
+    if names is None:
+        names = frozenset(user.groups.values_list('name', flat=True))
+        cache.set(key, names, getattr(settings, 'ROLE_CACHE_TIMEOUT', 300))
+
+    setattr(user, _REQUEST_ATTR, names)
+    return names
+
+
+def set_group_names(user, names):
+    """
+    Seed the per-request memo with names known from elsewhere (token
+    claims, see authentication.py), so get_group_names() skips the lookup.
+    """
+    setattr(user, _REQUEST_ATTR, frozenset(names))
+
+
+def invalidate_group_names(*user_ids):
+    """
+    Forget cached group membership for the given user ids.
+    """
+    cache.delete_many([_cache_key(user_id) for user_id in user_ids])
+
+
+def is_it_staff(user):
+    return IT_STAFF in get_group_names(user)
+
+
+def is_support_agent(user):
+    return SUPPORT_TEAM in get_group_names(user)
+
+
+def is_admin(user):
+    """
+    Superusers and IT Staff: full visibility and admin APIs.
+    """
+    return user.is_superuser or is_it_staff(user)
+
+
+def is_support_staff(user):
+    """
+    Anyone on the support side (admin or Support Team): may see internal
+    comments and update tickets.
+    """
+    return is_admin(user) or is_support_agent(user)
+
+
+def support_agents():
+    """
+    Queryset of users in the Support Team group.
+    """
+    return User.objects.filter(groups__name=SUPPORT_TEAM)
+
+
+# ---------------------------
+# Capabilities (/api/me/)
+# ---------------------------
+#
+# What the frontend may offer the user, derived from the same checks the
+# API enforces, so pages never have to probe endpoints for a 403.
+
+VIEW_ALL = 'view_all'
+VIEW_ASSIGNED = 'view_assigned'
+VIEW_OWN = 'view_own'
+CREATE_TICKET = 'create_ticket'
+UPDATE_ANY = 'update_any'
+UPDATE_ASSIGNED = 'update_assigned'
+INTERNAL_COMMENTS = 'internal_comments'
+BULK_UPDATE = 'bulk_update'
+ASSIGN_TICKETS = 'assign_tickets'
+ADMIN = 'admin'
+
+
+def get_role(user):
+    if is_admin(user):
+        return 'admin'
+    if is_support_agent(user):
+        return 'support'
+    return 'customer'
+
+
+def get_capabilities(user):
+    """
+    Return the sorted list of capability names for user.
+    """
+    capabilities = {VIEW_OWN, CREATE_TICKET}
+    if is_admin(user):
+        capabilities |= {VIEW_ALL, ASSIGN_TICKETS, ADMIN}
+    if is_support_agent(user):
+        capabilities.add(VIEW_ASSIGNED)
+    if is_support_staff(user):
+        capabilities |= {UPDATE_ASSIGNED, INTERNAL_COMMENTS, BULK_UPDATE}
+        # Mirrors ticket_detail_api: agents are limited to their own
+        # tickets unless they are superusers
+        if not is_support_agent(user) or user.is_superuser:
+            capabilities.add(UPDATE_ANY)
+    return sorted(capabilities)
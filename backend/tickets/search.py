@@ -0,0 +1,197 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Ticket
+
+# ---------------------------
+# Full-text search index
+# ---------------------------
+#
+# One index row per ticket covering its title, description and public
+# (non-internal) comments, stored in a side table that migration 0007
+# creates for the active database:
+#
+# - SQLite: an FTS5 virtual table, ranked with bm25()
+# - PostgreSQL: a tsvector column with a GIN index, ranked with ts_rank()
+#
+# Other backends fall back to an unindexed icontains filter. signals.py
+# keeps rows current on ticket/comment writes; the rebuild_search_index
+# command repopulates the table in one set-based statement.
+
+SQLITE_TABLE = 'tickets_ticket_fts'
+POSTGRES_TABLE = 'tickets_ticketsearch'
+
+MAX_RESULTS = 100
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def vendor(conn=None):
+    return (conn or connection).vendor
+
+
+def is_supported(conn=None):
+    return vendor(conn) in ('sqlite', 'postgresql')
+
+
+# -- schema (used by migration 0007) --
+
+def create_index_table(schema_editor):
+    conn = schema_editor.connection
+    if vendor(conn) == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_TABLE} USING fts5("
+            "ticket_id UNINDEXED, title, description, comments, "
+            "tokenize = 'porter unicode61')"
+        )
+    elif vendor(conn) == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {POSTGRES_TABLE} ("
+            "ticket_id bigint PRIMARY KEY REFERENCES tickets_ticket(id) "
+            "ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRES_TABLE}_document_idx "
+            f"ON {POSTGRES_TABLE} USING GIN (document)"
+        )
+
+
+def drop_index_table(schema_editor):
+    conn = schema_editor.connection
+    if vendor(conn) == 'sqlite':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SQLITE_TABLE}")
+    elif vendor(conn) == 'postgresql':
+        schema_editor.execute(f"DROP TABLE IF EXISTS {POSTGRES_TABLE}")
+
+
+# -- maintenance --
+
+_SQLITE_DOCUMENT = """
+    SELECT t.id, t.title, t.description,
+           COALESCE((SELECT group_concat(c.content, ' ')
+                     FROM tickets_ticketcomment c
+                     WHERE c.ticket_id = t.id AND NOT c.is_internal), '')
+    FROM tickets_ticket t
+"""
+
+_POSTGRES_DOCUMENT = """
+    SELECT t.id,
+           setweight(to_tsvector('english', t.title), 'A') ||
+           setweight(to_tsvector('english', t.description), 'B') ||
+           setweight(to_tsvector('english', COALESCE(
+               (SELECT string_agg(c.content, ' ')
+                FROM tickets_ticketcomment c
+                WHERE c.ticket_id = t.id AND NOT c.is_internal), '')), 'C')
+    FROM tickets_ticket t
+"""
+
+
+def rebuild_index(conn=None):
+    """
+    Repopulate the whole index from the ticket and comment tables.
+    """
+    conn = conn or connection
+    with conn.cursor() as cursor:
+        if vendor(conn) == 'sqlite':
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} (ticket_id, title, description, comments) "
+                + _SQLITE_DOCUMENT
+            )
+        elif vendor(conn) == 'postgresql':
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+            cursor.execute(f"INSERT INTO {POSTGRES_TABLE} (ticket_id, document) " + _POSTGRES_DOCUMENT)
+
+
+def index_tickets(*ticket_ids):
+    """
+    Re-index the given tickets from their current rows.
+    """
+    if not ticket_ids or not is_supported():
+        return
+    placeholders = ', '.join(['%s'] * len(ticket_ids))
+    with connection.cursor() as cursor:
+        if vendor() == 'sqlite':
+            cursor.execute(
+                f"DELETE FROM {SQLITE_TABLE} WHERE ticket_id IN ({placeholders})", ticket_ids
+            )
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} (ticket_id, title, description, comments) "
+                + _SQLITE_DOCUMENT + f" WHERE t.id IN ({placeholders})",
+                ticket_ids,
+            )
+        else:
+            cursor.execute(
+                f"INSERT INTO {POSTGRES_TABLE} (ticket_id, document) "
+                + _POSTGRES_DOCUMENT + f" WHERE t.id IN ({placeholders}) "
+                "ON CONFLICT (ticket_id) DO UPDATE SET document = EXCLUDED.document",
+                ticket_ids,
+            )
+
+
+def unindex_tickets(*ticket_ids):
+    if not ticket_ids or vendor() != 'sqlite':
+        # PostgreSQL rows go with the ticket via ON DELETE CASCADE
+        return
+    placeholders = ', '.join(['%s'] * len(ticket_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {SQLITE_TABLE} WHERE ticket_id IN ({placeholders})", ticket_ids
+        )
+
+
+# -- querying --
+
+def _fts5_query(text):
+    # Quote every token so user input cannot inject FTS5 syntax; the last
+    # token is a prefix match so results show up while typing
+    tokens = _TOKEN_RE.findall(text)
+    if not tokens:
+        return None
+    quoted = [f'"{token}"' for token in tokens]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_ticket_ids(text, queryset=None, limit=MAX_RESULTS):
+    """
+    Return ids of tickets matching text, best match first, restricted to
+    queryset (the caller's visible tickets) when given.
+    """
+    queryset = queryset if queryset is not None else Ticket.objects.all()
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    if not is_supported():
+        terms = _TOKEN_RE.findall(text)
+        if not terms:
+            return []
+        condition = Q()
+        for term in terms:
+            condition &= Q(title__icontains=term) | Q(description__icontains=term)
+        return list(
+            queryset.filter(condition).order_by('-created_at', '-id').values_list('id', flat=True)[:limit]
+        )
+
+    visible_sql, visible_params = queryset.values('id').query.sql_with_params()
+    with connection.cursor() as cursor:
+        if vendor() == 'sqlite':
+            match = _fts5_query(text)
+            if match is None:
+                return []
+            cursor.execute(
+                f"SELECT ticket_id FROM {SQLITE_TABLE} "
+                f"WHERE {SQLITE_TABLE} MATCH %s AND ticket_id IN ({visible_sql}) "
+                f"ORDER BY bm25({SQLITE_TABLE}, 0, 10.0, 3.0, 1.0) LIMIT %s",
+                [match, *visible_params, limit],
+            )
+        else:
+            cursor.execute(
+                f"SELECT s.ticket_id FROM {POSTGRES_TABLE} s, plainto_tsquery('english', %s) q "
+                f"WHERE s.document @@ q AND s.ticket_id IN ({visible_sql}) "
+                "ORDER BY ts_rank(s.document, q) DESC, s.ticket_id DESC LIMIT %s",
+                [text, *visible_params, limit],
+            )
+        return [row[0] for row in cursor.fetchall()]
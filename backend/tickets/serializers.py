@@ -1,3 +1,4 @@
+from django.db.models import F, Prefetch
 from rest_framework import serializers
 from .models import Ticket, TicketComment
 
@@ -18,5 +19,57 @@ class TicketSerializers(serializers.ModelSerializer):
         model = Ticket
         fields = ['id', 'title', 'description', 'category', 'priority', 'status', 
                   'created_by', 'created_by_username', 'assigned_to', 'assigned_to_username', 
-                  'created_at', 'updated_at', 'comments']
-        read_only_fields = ['created_by', 'created_at']
\ No newline at end of file
+                  'created_at', 'updated_at', 'first_response_due_at', 'first_responded_at',
+                  'due_at', 'sla_state', 'last_activity_at', 'comments']
+        read_only_fields = ['created_by', 'created_at', 'first_response_due_at', 'first_responded_at',
+                            'due_at', 'sla_state', 'last_activity_at']
+
+    def update(self, instance, validated_data):
+        # Only the fields in the request are written (see Ticket.edit_fields())
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        if validated_data:
+            instance.save(update_fields=instance.edit_fields(*validated_data))
+        return instance
+
+
+class TicketSummarySerializer(serializers.ModelSerializer):
+    """
+    Slim ticket representation for list endpoints: no embedded comments,
+    just a comment_count. Expects a queryset built by summary_queryset()
+    so the usernames come from the same single query and the count from
+    the right denormalized column.
+    """
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+    assigned_to_username = serializers.CharField(source='assigned_to.username', read_only=True, allow_null=True)
+    comment_count = serializers.IntegerField(source='visible_comment_count', read_only=True)
+
+    class Meta:
+        model = Ticket
+        fields = ['id', 'title', 'description', 'category', 'priority', 'status',
+                  'created_by', 'created_by_username', 'assigned_to', 'assigned_to_username',
+                  'created_at', 'updated_at', 'due_at', 'sla_state', 'last_activity_at',
+                  'comment_count']
+        read_only_fields = fields
+
+
+def summary_queryset(queryset, include_internal=True):
+    """
+    Join the usernames and pick the comment counter for
+    TicketSummarySerializer. Customers pass include_internal=False so
+    internal notes are not counted.
+    """
+    counter = 'comment_count' if include_internal else 'public_comment_count'
+    return queryset.select_related('created_by', 'assigned_to').annotate(
+        visible_comment_count=F(counter)
+    )
+
+
+def detail_queryset(queryset):
+    """
+    Load everything TicketSerializers touches in a fixed number of queries:
+    one for the ticket and its users, one for comments with their authors.
+    """
+    return queryset.select_related('created_by', 'assigned_to').prefetch_related(
+        Prefetch('comments', queryset=TicketComment.objects.select_related('author'))
+    )
@@ -0,0 +1,232 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete, pre_save
+)
+from django.dispatch import receiver
+
+from . import activity, bulk, changes, conditional, events, search, sla, stats
+from .authentication import bump_token_versions
+from .fragments import invalidate_details
+from .models import SLAPolicy, Ticket, TicketComment
+from .roles import invalidate_group_names
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Drop cached role lookups when membership changes from either side
+    (user.groups.add(...) or group.user_set.add(...)).
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        stats.set_user_counts()
+
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate_group_names(instance.pk)
+            bump_token_versions([instance.pk])
+        return
+
+    if action == 'pre_clear':
+        # pk_set is not provided for clear(), so collect members beforehand
+        members = list(instance.user_set.values_list('id', flat=True))
+        invalidate_group_names(*members)
+        bump_token_versions(members)
+    elif action in ('post_add', 'post_remove'):
+        invalidate_group_names(*pk_set)
+        bump_token_versions(pk_set)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def group_changed(sender, instance, **kwargs):
+    """
+    Renaming or deleting a group changes the names cached for its members.
+    """
+    if instance.pk:
+        members = list(instance.user_set.values_list('id', flat=True))
+        invalidate_group_names(*members)
+        bump_token_versions(members)
+
+
+# User fields copied into access tokens or guarding them (see authentication.py)
+CLAIM_FIELDS = ('username', 'is_superuser', 'is_active', 'password')
+
+
+@receiver(pre_save, sender=User)
+def remember_claims(sender, instance, update_fields=None, **kwargs):
+    current = {field: getattr(instance, field) for field in CLAIM_FIELDS}
+    if instance._state.adding or (update_fields is not None and not set(CLAIM_FIELDS) & set(update_fields)):
+        instance._previous_claims = current
+        return
+    previous = User.objects.filter(pk=instance.pk).values(*CLAIM_FIELDS).first()
+    instance._previous_claims = previous or current
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.set_user_counts()
+        return
+
+    previous = getattr(instance, '_previous_claims', {})
+    changed = {field for field in CLAIM_FIELDS if previous.get(field, getattr(instance, field)) != getattr(instance, field)}
+    if changed:
+        # Deactivation and password changes also end existing sessions
+        bump_token_versions([instance.pk], revoke=bool(changed & {'is_active', 'password'}))
+
+    if 'username' in changed:
+        # Cached ticket detail fragments embed creator/assignee/author names
+        ticket_ids = set(
+            Ticket.objects.filter(created_by=instance).values_list('id', flat=True)
+        )
+        ticket_ids.update(
+            Ticket.objects.filter(assigned_to=instance).values_list('id', flat=True)
+        )
+        ticket_ids.update(
+            TicketComment.objects.filter(author=instance).values_list('ticket_id', flat=True)
+        )
+        invalidate_details(*ticket_ids)
+        # ...and so do list/detail/comment responses, which ETags cannot see
+        conditional.bump_generation()
+
+
+@receiver(pre_delete, sender=User)
+def unassign_deleted_user(sender, instance, **kwargs):
+    """
+    on_delete=SET_NULL clears assigned_to with a queryset UPDATE that no
+    Ticket signal sees, so unassign the tickets through the bulk path
+    beforehand: it applies the counter deltas and records the change log,
+    fragment invalidation and events. Tickets the user created are removed
+    by the cascade and handled by ticket_deleted instead.
+    """
+    bulk.unassign_tickets(Ticket.objects.filter(assigned_to=instance).exclude(created_by=instance))
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    stats.set_user_counts()
+
+
+# ---------------------------
+# Ticket statistics
+# ---------------------------
+
+_STATE_ATTR = '_stats_state'
+
+
+@receiver(pre_save, sender=Ticket)
+def load_previous_ticket_state(sender, instance, **kwargs):
+    """
+    Read the stored values of the counted fields (one primary-key lookup)
+    so post_save can apply only the difference. The row stays locked until
+    Ticket.save()'s transaction ends, so a concurrent save of the same
+    ticket reads the state this one writes instead of applying the same
+    delta twice. (SQLite has no row locks; IMMEDIATE transactions already
+    serialize its writers.)
+    """
+    previous = None
+    if instance.pk is not None and not instance._state.adding:
+        previous = Ticket.objects.select_for_update().filter(pk=instance.pk).values(
+            *stats.TRACKED_FIELDS, 'category_id'
+        ).first()
+    setattr(instance, _STATE_ATTR, previous)
+
+
+@receiver(pre_save, sender=Ticket)
+def set_sla_deadlines(sender, instance, update_fields=None, **kwargs):
+    # Saves that do not write due_at leave the deadlines alone
+    if update_fields is None or 'due_at' in update_fields:
+        sla.apply_deadlines(instance, getattr(instance, _STATE_ATTR, None))
+
+
+def _saved_state(instance, old_state, update_fields):
+    """
+    The counted fields as the row now stores them. A save limited to
+    update_fields leaves the other columns alone, so their stored values
+    win over whatever a stale instance holds.
+    """
+    state = stats.ticket_state(instance)
+    if old_state is None or update_fields is None:
+        return state
+    written = set(update_fields)
+    written.update(instance._meta.get_field(name).attname for name in update_fields)
+    return {name: value if name in written else old_state[name] for name, value in state.items()}
+
+
+@receiver(post_save, sender=Ticket)
+def ticket_saved(sender, instance, created, update_fields=None, **kwargs):
+    old_state = None if created else getattr(instance, _STATE_ATTR, None)
+    new_state = _saved_state(instance, old_state, update_fields)
+    stats.record_ticket_change(old_state, new_state)
+    changes.record_ticket_change(
+        instance.pk, new_state['created_by_id'], new_state['assigned_to_id'],
+        old_state['assigned_to_id'] if old_state else None,
+    )
+    search.index_tickets(instance.pk)
+    events.publish_ticket_changes(
+        [instance.pk], {instance.pk: old_state['assigned_to_id'] if old_state else None}, created=created
+    )
+    if not created:
+        invalidate_details(instance.pk)
+
+
+@receiver(post_delete, sender=Ticket)
+def ticket_deleted(sender, instance, **kwargs):
+    stats.record_ticket_change(stats.ticket_state(instance), None)
+    changes.record_ticket_change(instance.pk, instance.created_by_id, instance.assigned_to_id)
+    search.unindex_tickets(instance.pk)
+    invalidate_details(instance.pk)
+
+
+# ---------------------------
+# Comment changes
+# ---------------------------
+
+@receiver(pre_save, sender=TicketComment)
+def load_previous_visibility(sender, instance, **kwargs):
+    previous = None
+    if instance.pk is not None and not instance._state.adding:
+        previous = TicketComment.objects.filter(pk=instance.pk).values_list('is_internal', flat=True).first()
+    instance._was_internal = previous
+
+
+@receiver(post_save, sender=TicketComment)
+def comment_saved(sender, instance, created, **kwargs):
+    if created:
+        activity.record_comment_added(instance)
+    elif getattr(instance, '_was_internal', None) not in (None, instance.is_internal):
+        activity.record_visibility_change(instance)
+
+
+@receiver(post_delete, sender=TicketComment)
+def comment_deleted(sender, instance, **kwargs):
+    activity.record_comment_removed(instance)
+
+
+@receiver(post_save, sender=TicketComment)
+@receiver(post_delete, sender=TicketComment)
+def comment_changed(sender, instance, **kwargs):
+    invalidate_details(instance.ticket_id)
+    # comment_count is part of the summary, so sync clients need it too
+    changes.record_ticket_changes([instance.ticket_id])
+    # Comments flipped to internal must leave the index too, so re-index
+    # on any comment write rather than only public ones
+    search.index_tickets(instance.ticket_id)
+
+
+@receiver(post_save, sender=TicketComment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        events.publish_comment(instance)
+        if not instance.is_internal:
+            sla.record_first_response([instance.ticket_id], instance.author_id, instance.created_at)
+
+
+# ---------------------------
+# SLA policies
+# ---------------------------
+
+@receiver(post_save, sender=SLAPolicy)
+@receiver(post_delete, sender=SLAPolicy)
+def sla_policy_changed(sender, **kwargs):
+    sla.invalidate_policies()
@@ -0,0 +1,223 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Min, OuterRef, Subquery
+from django.utils import timezone
+
+from . import changes, events
+from .fragments import invalidate_details
+from .models import SLAPolicy, Ticket, TicketComment
+
+# ---------------------------
+# SLA deadlines
+# ---------------------------
+#
+# Each ticket stores its first-response and resolution deadlines, computed
+# from the most specific active SLAPolicy when it is created or its
+# priority/category changes. The scanner then only needs range queries on
+# the partial (status, sla_state, deadline) indexes, so its cost follows
+# the number of tickets crossing a deadline rather than the number open,
+# and it flags them with batched UPDATE ... WHERE id IN (...).
+#
+# Policies are a handful of rows, cached as tuples; signals.py drops the
+# cached copy whenever one is saved or deleted.
+
+Policy = namedtuple('Policy', 'priority category_id first_response_minutes resolution_minutes')
+
+POLICY_CACHE_KEY = 'tickets:sla-policies'
+
+SCAN_BATCH = 2000
+
+
+def warning_window():
+    return timedelta(minutes=getattr(settings, 'SLA_WARNING_MINUTES', 60))
+
+
+def active_policies():
+    policies = cache.get(POLICY_CACHE_KEY)
+    if policies is None:
+        policies = load_policies(SLAPolicy)
+        cache.set(POLICY_CACHE_KEY, policies, None)
+    return policies
+
+
+def load_policies(policy_model):
+    return [
+        Policy(*row)
+        for row in policy_model.objects.filter(is_active=True).order_by('id').values_list(
+            'priority', 'category_id', 'first_response_minutes', 'resolution_minutes'
+        )
+    ]
+
+
+def invalidate_policies():
+    cache.delete(POLICY_CACHE_KEY)
+
+
+def match_policy(policies, priority, category_id):
+    """
+    Most specific policy for a ticket: priority and category, then category
+    only, then priority only, then a catch-all. Ties go to the oldest policy.
+    """
+    best, best_rank = None, -1
+    for policy in policies:
+        if policy.priority and policy.priority != priority:
+            continue
+        if policy.category_id is not None and policy.category_id != category_id:
+            continue
+        rank = (2 if policy.category_id is not None else 0) + (1 if policy.priority else 0)
+        if rank > best_rank:
+            best, best_rank = policy, rank
+    return best
+
+
+def deadlines(priority, category_id, start, policies=None):
+    """
+    Return (first_response_due_at, due_at) for a ticket opened at start.
+    """
+    policy = match_policy(active_policies() if policies is None else policies, priority, category_id)
+    if policy is None:
+        return None, None
+    first_response = None
+    if policy.first_response_minutes is not None:
+        first_response = start + timedelta(minutes=policy.first_response_minutes)
+    return first_response, start + timedelta(minutes=policy.resolution_minutes)
+
+
+def apply_deadlines(ticket, previous=None):
+    """
+    Set the deadlines on a ticket about to be saved when it is new or its
+    priority/category changed (previous holds the stored values).
+    """
+    if previous is not None and (
+        previous['priority'] == ticket.priority and previous['category_id'] == ticket.category_id
+    ):
+        return
+    start = ticket.created_at or timezone.now()
+    ticket.first_response_due_at, ticket.due_at = deadlines(ticket.priority, ticket.category_id, start)
+    if previous is not None:
+        ticket.sla_state = Ticket.SLA_ON_TRACK
+
+
+def refresh_deadlines(queryset, policies=None):
+    """
+    Recompute the deadlines of every ticket in queryset with one UPDATE per
+    (priority, category) combination, measured from created_at. Tickets go
+    back to on-track; the next scan re-flags any that are still late.
+    """
+    if policies is None:
+        policies = active_policies()
+    combinations = queryset.order_by().values_list('priority', 'category_id').distinct()
+    updated = 0
+    for priority, category_id in list(combinations):
+        policy = match_policy(policies, priority, category_id)
+        values = {'first_response_due_at': None, 'due_at': None}
+        if policy is not None:
+            values['due_at'] = F('created_at') + timedelta(minutes=policy.resolution_minutes)
+            if policy.first_response_minutes is not None:
+                values['first_response_due_at'] = (
+                    F('created_at') + timedelta(minutes=policy.first_response_minutes)
+                )
+        updated += queryset.filter(priority=priority, category_id=category_id).update(
+            sla_state=Ticket.SLA_ON_TRACK, updated_at=timezone.now(), **values
+        )
+    return updated
+
+
+# ---------------------------
+# First response
+# ---------------------------
+
+def record_first_response(ticket_ids, author_id, responded_at):
+    """
+    Stamp first_responded_at on the given tickets that have not had a
+    response yet, unless author_id opened them. Called for public comments
+    only; one UPDATE however many tickets.
+    """
+    return (
+        Ticket.objects.filter(id__in=ticket_ids, first_responded_at__isnull=True)
+        .exclude(created_by_id=author_id)
+        .update(first_responded_at=responded_at, updated_at=responded_at)
+    )
+
+
+def refresh_first_responses(queryset, comment_model=TicketComment):
+    """
+    Backfill first_responded_at from existing public comments by anyone but
+    the ticket's creator, for rows written without signals (imports,
+    migrations).
+    """
+    first_reply = (
+        comment_model.objects.filter(ticket_id=OuterRef('pk'), is_internal=False)
+        .exclude(author_id=OuterRef('created_by_id'))
+        .order_by()
+        .values('ticket_id')
+        .annotate(first=Min('created_at'))
+        .values('first')
+    )
+    return queryset.filter(first_responded_at__isnull=True).update(
+        first_responded_at=Subquery(first_reply)
+    )
+
+
+# ---------------------------
+# Breach scanner
+# ---------------------------
+
+def late_tickets(open_tickets, states, cutoff):
+    """
+    Querysets of open tickets in states whose resolution or first-response
+    deadline is before cutoff; each is a range scan on its partial index.
+    """
+    in_state = open_tickets.filter(sla_state__in=states)
+    return (
+        in_state.filter(due_at__isnull=False, due_at__lt=cutoff),
+        in_state.filter(
+            first_responded_at__isnull=True,
+            first_response_due_at__isnull=False,
+            first_response_due_at__lt=cutoff,
+        ),
+    )
+
+
+def _escalate(querysets, states, new_state, now, batch_size):
+    total = 0
+    while True:
+        ids = set()
+        for queryset in querysets:
+            ids.update(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return total
+        ids = sorted(ids)
+        with transaction.atomic():
+            updated = Ticket.objects.filter(id__in=ids, sla_state__in=states).update(
+                sla_state=new_state, escalated_at=now, updated_at=now
+            )
+            changes.record_ticket_changes(ids)
+            events.publish_ticket_changes(ids)
+            invalidate_details(*ids)
+        total += updated
+
+
+def scan_sla(now=None, warning=None, batch_size=SCAN_BATCH):
+    """
+    Flag open tickets past a deadline as breached and those within the
+    warning window as at risk. Returns {"breached": n, "at_risk": n}.
+    """
+    now = now or timezone.now()
+    warning = warning_window() if warning is None else warning
+    open_tickets = Ticket.objects.filter(status__in=Ticket.OPEN_STATUSES)
+
+    not_breached = [Ticket.SLA_ON_TRACK, Ticket.SLA_AT_RISK]
+    breached = _escalate(
+        late_tickets(open_tickets, not_breached, now), not_breached, Ticket.SLA_BREACHED, now, batch_size
+    )
+    on_track = [Ticket.SLA_ON_TRACK]
+    at_risk = _escalate(
+        late_tickets(open_tickets, on_track, now + warning), on_track, Ticket.SLA_AT_RISK, now, batch_size
+    )
+    return {'breached': breached, 'at_risk': at_risk}
+
@@ -0,0 +1,228 @@
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Ticket, TicketStat
+from .roles import SUPPORT_TEAM
+
+# ---------------------------
+# Materialized ticket statistics
+# ---------------------------
+#
+# Every ticket contributes +1 to a handful of counters in up to three
+# scopes (global, its creator, its assignee). Saves and deletes apply the
+# difference between the old and new contribution, so the dashboards read a
+# dozen rows instead of running COUNT/GROUP BY over the ticket table.
+
+TOTAL = 'total'
+STATUS = 'status'
+PRIORITY = 'priority'
+ASSIGNED = 'assigned'
+USERS = 'users'
+# Open tickets by priority: per assignee (read by assignment.py) and
+# globally (read by the metrics endpoint)
+OPEN_PRIORITY = 'open_priority'
+# Global scope only: open tickets nobody is assigned to, by priority
+UNASSIGNED_OPEN = 'unassigned_open'
+
+# Values of the ASSIGNED dimension
+YES, NO = 'yes', 'no'
+
+# Statuses that count towards an agent's workload
+OPEN_STATUSES = Ticket.OPEN_STATUSES
+
+# Fields a ticket's counters depend on
+TRACKED_FIELDS = ('created_by_id', 'assigned_to_id', 'status', 'priority')
+
+
+def ticket_state(ticket):
+    """
+    Snapshot of the fields that decide which counters a ticket feeds.
+    """
+    return {name: getattr(ticket, name) for name in TRACKED_FIELDS}
+
+
+def contributions(state):
+    """
+    Counter of (scope, owner_id, dimension, value) -> +1 for one ticket.
+    """
+    assigned = state['assigned_to_id'] is not None
+    scopes = [(TicketStat.SCOPE_GLOBAL, 0), (TicketStat.SCOPE_CREATOR, state['created_by_id'])]
+    if assigned:
+        scopes.append((TicketStat.SCOPE_ASSIGNEE, state['assigned_to_id']))
+
+    result = Counter()
+    for scope, owner_id in scopes:
+        result[(scope, owner_id, TOTAL, '')] += 1
+        result[(scope, owner_id, STATUS, state['status'])] += 1
+        result[(scope, owner_id, PRIORITY, state['priority'])] += 1
+        result[(scope, owner_id, ASSIGNED, YES if assigned else NO)] += 1
+    if state['status'] in OPEN_STATUSES:
+        result[(TicketStat.SCOPE_GLOBAL, 0, OPEN_PRIORITY, state['priority'])] += 1
+        if assigned:
+            result[(TicketStat.SCOPE_ASSIGNEE, state['assigned_to_id'], OPEN_PRIORITY, state['priority'])] += 1
+        else:
+            result[(TicketStat.SCOPE_GLOBAL, 0, UNASSIGNED_OPEN, state['priority'])] += 1
+    return result
+
+
+def apply_deltas(deltas):
+    """
+    Add each delta to its counter row, creating rows on first use.
+    Must run inside the transaction that changed the tickets.
+    """
+    for (scope, owner_id, dimension, value), delta in sorted(deltas.items()):
+        if not delta:
+            continue
+        lookup = dict(scope=scope, owner_id=owner_id, dimension=dimension, value=value)
+        if TicketStat.objects.filter(**lookup).update(count=F('count') + delta):
+            continue
+        try:
+            with transaction.atomic():
+                TicketStat.objects.create(count=delta, **lookup)
+        except IntegrityError:
+            # A concurrent transaction created the row first
+            TicketStat.objects.filter(**lookup).update(count=F('count') + delta)
+
+
+def record_ticket_change(old_state, new_state):
+    """
+    Apply the counter difference between two ticket states; either side may
+    be None for a create or a delete.
+    """
+    record_ticket_changes([(old_state, new_state)])
+
+
+def record_ticket_changes(changes):
+    """
+    Batch form of record_ticket_change() for set-based writes: the deltas of
+    all (old_state, new_state) pairs are summed first, so a bulk update
+    touches each counter row once.
+    """
+    deltas = Counter()
+    for old_state, new_state in changes:
+        if new_state is not None:
+            deltas.update(contributions(new_state))
+        if old_state is not None:
+            deltas.subtract(contributions(old_state))
+    apply_deltas(deltas)
+
+
+def set_user_counts():
+    """
+    Refresh the user counters. Called when users are created/deleted or
+    Support Team membership changes; both are single indexed counts.
+    """
+    apply_absolute(TicketStat.SCOPE_GLOBAL, 0, USERS, TOTAL, User.objects.count())
+    apply_absolute(
+        TicketStat.SCOPE_GLOBAL, 0, USERS, SUPPORT_TEAM,
+        User.objects.filter(groups__name=SUPPORT_TEAM).count(),
+    )
+
+
+def apply_absolute(scope, owner_id, dimension, value, count):
+    TicketStat.objects.update_or_create(
+        scope=scope, owner_id=owner_id, dimension=dimension, value=value,
+        defaults={'count': count},
+    )
+
+
+def _stat_rows(scope, owner_id):
+    return TicketStat.objects.filter(scope=scope, owner_id=owner_id).values_list(
+        'dimension', 'value', 'count'
+    )
+
+
+def get_ticket_stats(scope=TicketStat.SCOPE_GLOBAL, owner_id=0):
+    """
+    Read the counters for one scope:
+    {total, by_status, by_priority, assigned, unassigned, users}.
+    Zero counters are omitted from the breakdowns, like a GROUP BY would.
+    """
+    return _stats_from_rows(_stat_rows(scope, owner_id))
+
+
+async def aget_ticket_stats(scope=TicketStat.SCOPE_GLOBAL, owner_id=0):
+    return _stats_from_rows([row async for row in _stat_rows(scope, owner_id)])
+
+
+def _stats_from_rows(rows):
+    stats = {
+        'total': 0,
+        'by_status': {},
+        'by_priority': {},
+        'assigned': 0,
+        'unassigned': 0,
+        'users': {},
+    }
+    for dimension, value, count in rows:
+        if dimension == TOTAL:
+            stats['total'] = count
+        elif dimension == STATUS and count:
+            stats['by_status'][value] = count
+        elif dimension == PRIORITY and count:
+            stats['by_priority'][value] = count
+        elif dimension == ASSIGNED:
+            stats['assigned' if value == YES else 'unassigned'] = count
+        elif dimension == USERS:
+            stats['users'][value] = count
+    return stats
+
+
+@transaction.atomic
+def recompute_ticket_stats(ticket_model=Ticket, stat_model=TicketStat, user_model=User):
+    """
+    Rebuild every counter from the ticket table. Used by the
+    recompute_ticket_stats command to repair drift (e.g. after raw SQL or
+    queryset.update() calls that bypass the signals); migration 0006 passes
+    its historical models.
+    """
+    deltas = Counter()
+    groupings = [
+        ((TicketStat.SCOPE_GLOBAL, None), ()),
+        ((TicketStat.SCOPE_CREATOR, 'created_by_id'), ('created_by_id',)),
+        ((TicketStat.SCOPE_ASSIGNEE, 'assigned_to_id'), ('assigned_to_id',)),
+    ]
+    for (scope, owner_field), group_by in groupings:
+        queryset = ticket_model.objects.all()
+        if scope == TicketStat.SCOPE_ASSIGNEE:
+            queryset = queryset.filter(assigned_to__isnull=False)
+        for dimension, field in ((STATUS, 'status'), (PRIORITY, 'priority')):
+            for row in queryset.values(*group_by, field).annotate(n=Count('id')).order_by():
+                owner_id = row[owner_field] if owner_field else 0
+                deltas[(scope, owner_id, dimension, row[field])] += row['n']
+                deltas[(scope, owner_id, TOTAL, '')] += row['n'] if dimension == STATUS else 0
+        totals = Count('id'), Count('assigned_to_id')
+        if group_by:
+            rows = queryset.values(*group_by).annotate(n=totals[0], assigned=totals[1]).order_by()
+        else:
+            rows = [queryset.aggregate(n=totals[0], assigned=totals[1])]
+        for row in rows:
+            owner_id = row[owner_field] if owner_field else 0
+            deltas[(scope, owner_id, ASSIGNED, YES)] += row['assigned']
+            deltas[(scope, owner_id, ASSIGNED, NO)] += row['n'] - row['assigned']
+
+    open_rows = (
+        ticket_model.objects.filter(status__in=OPEN_STATUSES)
+        .values('assigned_to_id', 'priority').annotate(n=Count('id')).order_by()
+    )
+    for row in open_rows:
+        deltas[(TicketStat.SCOPE_GLOBAL, 0, OPEN_PRIORITY, row['priority'])] += row['n']
+        if row['assigned_to_id'] is None:
+            deltas[(TicketStat.SCOPE_GLOBAL, 0, UNASSIGNED_OPEN, row['priority'])] += row['n']
+        else:
+            deltas[(TicketStat.SCOPE_ASSIGNEE, row['assigned_to_id'], OPEN_PRIORITY, row['priority'])] += row['n']
+
+    deltas[(TicketStat.SCOPE_GLOBAL, 0, USERS, TOTAL)] = user_model.objects.count()
+    deltas[(TicketStat.SCOPE_GLOBAL, 0, USERS, SUPPORT_TEAM)] = (
+        user_model.objects.filter(groups__name=SUPPORT_TEAM).count()
+    )
+
+    stat_model.objects.all().delete()
+    stat_model.objects.bulk_create([
+        stat_model(scope=scope, owner_id=owner_id, dimension=dimension, value=value, count=count)
+        for (scope, owner_id, dimension, value), count in deltas.items()
+        if count or dimension == USERS
+    ], batch_size=1000)
@@ -0,0 +1,36 @@
+from django.contrib.auth.models import User
+
+from .assignment import assign_unassigned
+from .jobs import job
+
+# ---------------------------
+# Job handlers (see jobs.py)
+# ---------------------------
+#
+# Work the API hands off to manage.py run_workers instead of doing inline.
+# Handlers must be safe to run again: a job is retried after a failure or
+# a lost worker.
+
+
+@job('users.delete')
+def delete_user(user_id):
+    """
+    Delete a user and everything that cascades from them (their tickets,
+    comments and the counters/index entries those signals maintain). The
+    tickets they were assigned are unassigned first (see
+    signals.unassign_deleted_user), so delta-sync clients and event
+    subscribers see them change.
+    """
+    deleted, _ = User.objects.filter(id=user_id).delete()
+    return {'deleted': deleted}
+
+
+@job('tickets.auto_assign')
+def auto_assign(user_id, limit):
+    """
+    Run assign_unassigned() on behalf of the admin who requested it.
+    """
+    user = User.objects.filter(id=user_id).first()
+    if user is None:
+        return {'assigned': 0}
+    return {'assigned': len(assign_unassigned(user, limit=limit))}
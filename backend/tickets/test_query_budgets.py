@@ -0,0 +1,259 @@
+import re
+from collections import Counter, namedtuple
+from types import SimpleNamespace
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .authentication import ClaimsRefreshToken
+from .models import Category, Job, Ticket, TicketComment
+from .profiling import fingerprint
+from .roles import IT_STAFF, SUPPORT_TEAM
+
+# ---------------------------
+# Query-count budgets
+# ---------------------------
+#
+# Every route in the URLconf is called as each role, once with N rows of
+# everything and once with 10N. The number of SQL queries must not change
+# between the two (no N+1) and must stay within the endpoint's budget.
+# New routes fail test_every_route_has_a_budget until they are declared
+# below, with the count they run at today.
+#
+# Budgets are the worst case over all roles with a cold cache, so cached
+# role checks and fragments do not hide queries.
+
+Call = namedtuple('Call', 'method budget kwargs data', defaults=(None, None))
+
+PASSWORD = 'pw'
+
+
+def _ticket(fx):
+    return {'ticket_id': fx.ticket.id}
+
+
+def _fresh_user(fx):
+    return {'user_id': User.objects.create_user(f'target-{User.objects.count()}').id}
+
+
+def _fresh_category(fx):
+    return {'category_id': Category.objects.create(name=f'target-{Category.objects.count()}').id}
+
+
+def _login(fx):
+    return {'username': fx.customer.username, 'password': PASSWORD}
+
+
+def _refresh(fx):
+    return {'refresh': str(ClaimsRefreshToken.for_user(fx.customer))}
+
+
+def _new_user(fx):
+    return {'username': f'created-{User.objects.count()}', 'password': PASSWORD,
+            'email': 'created@example.com', 'groups': [SUPPORT_TEAM]}
+
+
+def _new_category(fx):
+    return {'name': f'created-{Category.objects.count()}'}
+
+
+# route name -> calls made against it (one per method worth budgeting)
+BUDGETS = {
+    # Session-authenticated HTML views
+    'login': [Call('GET', 2), Call('POST', 9, data=_login)],
+    'logout': [Call('POST', 4)],
+    'ticket_list': [Call('GET', 4)],
+    'ticket_detail': [Call('GET', 5, _ticket)],
+    'new_ticket': [Call('GET', 3)],
+    'create_ticket': [Call('GET', 3),
+                      Call('POST', 19, data=lambda fx: {'title': 'Form ticket', 'description': 'd',
+                                                        'priority': 'Low'})],
+    'ticket_update': [Call('GET', 5, _ticket)],
+    'dashboard': [Call('GET', 4)],
+
+    # REST API (JWT)
+    'token_obtain_pair': [Call('POST', 3, data=_login)],
+    'token_refresh': [Call('POST', 3, data=_refresh)],
+    'api_me': [Call('GET', 1)],
+    'api_ticket_list': [Call('GET', 2)],
+    'api_ticket_search': [Call('GET', 2, data=lambda fx: {'q': 'printer'})],
+    'api_ticket_create': [Call('POST', 19, data=lambda fx: {'title': 'API ticket', 'description': 'd',
+                                                            'priority': 'High'})],
+    'api_ticket_changes': [Call('GET', 1)],
+    'api_ticket_export': [Call('GET', 1)],
+    'api_ticket_bulk_update': [Call('POST', 6, data=lambda fx: {'ids': [fx.ticket.id],
+                                                                 'changes': {'priority': 'High'}})],
+    'api_ticket_detail': [Call('GET', 3, _ticket),
+                          Call('PATCH', 9, _ticket, lambda fx: {'status': 'In progress'})],
+    'api_ticket_comments': [Call('GET', 3, _ticket)],
+    'api_add_comment': [Call('POST', 10, _ticket, lambda fx: {'content': 'Budgeted comment'})],
+    'api_admin_dashboard': [Call('GET', 3)],
+    'api_admin_users': [Call('GET', 2), Call('POST', 28, data=_new_user)],
+    'api_admin_user_detail': [Call('GET', 2, _fresh_user),
+                              Call('PATCH', 4, _fresh_user, lambda fx: {'first_name': 'Renamed'}),
+                              Call('DELETE', 6, _fresh_user)],
+    'api_admin_categories': [Call('GET', 1), Call('POST', 2, data=_new_category)],
+    'api_admin_category_detail': [Call('PATCH', 2, _fresh_category, lambda fx: {'name': 'renamed'}),
+                                  Call('DELETE', 4, _fresh_category)],
+    'api_admin_assignments': [Call('GET', 1)],
+    'api_admin_auto_assign': [Call('POST', 1, data=lambda fx: {'limit': 5})],
+    'api_admin_workload': [Call('GET', 2)],
+    'api_admin_jobs': [Call('GET', 2)],
+    'api_admin_job_detail': [Call('GET', 1, lambda fx: {'job_id': fx.job.id})],
+    'api_admin_assign_ticket': [Call('PATCH', 10, _ticket, lambda fx: {'assigned_to': fx.agent.id})],
+
+    # Prometheus scrape target
+    'metrics': [Call('GET', 1)],
+}
+
+# Routes deliberately left out, with the reason
+EXEMPT = {
+    'api_ticket_events': "server-sent event stream; stays open until the client goes away",
+}
+EXEMPT_NAMESPACES = {
+    'admin': "Django admin site",
+}
+
+
+def iter_routes(patterns=None, prefix='', namespace=None):
+    """
+    Yield (route, name, namespace) for every URL pattern, following includes.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(
+                pattern.url_patterns, prefix + str(pattern.pattern), pattern.namespace or namespace
+            )
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern), pattern.name, namespace
+
+
+def duplicated(queries):
+    counts = Counter(fingerprint(query['sql']) for query in queries)
+    return [(count, sql) for sql, count in counts.most_common() if count > 1]
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(TestCase):
+    N = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        support, _ = Group.objects.get_or_create(name=SUPPORT_TEAM)
+        it_staff, _ = Group.objects.get_or_create(name=IT_STAFF)
+        fx = cls.fx = SimpleNamespace()
+        fx.admin = User.objects.create_superuser('budget-admin', password=PASSWORD)
+        fx.it = User.objects.create_user('budget-it', password=PASSWORD)
+        fx.it.groups.add(it_staff)
+        fx.agent = User.objects.create_user('budget-agent', password=PASSWORD)
+        fx.agent.groups.add(support)
+        fx.customer = User.objects.create_user('budget-customer', password=PASSWORD)
+        fx.ticket = Ticket.objects.create(title='printer', description='d', created_by=fx.customer,
+                                          assigned_to=fx.agent)
+        TicketComment.objects.create(ticket=fx.ticket, author=fx.customer, content='hello')
+        fx.job = Job.objects.create(name='tickets.auto_assign', payload={}, run_at=timezone.now())
+        cls.roles = {'admin': fx.admin, 'it_staff': fx.it, 'agent': fx.agent, 'customer': fx.customer}
+        cls.seeded = 0
+
+    def seed(self, total):
+        """
+        Grow every table the endpoints read to `total` extra rows.
+        """
+        support = Group.objects.get(name=SUPPORT_TEAM)
+        for i in range(self.seeded, total):
+            customer = User.objects.create_user(f'seed-customer-{i}')
+            agent = User.objects.create_user(f'seed-agent-{i}')
+            agent.groups.add(support)
+            category = Category.objects.create(name=f'seed-{i}')
+            for owner in (customer, self.fx.customer):
+                ticket = Ticket.objects.create(
+                    title=f'seed printer {i}', description='d', category=category,
+                    created_by=owner, assigned_to=agent if i % 2 else self.fx.agent,
+                )
+                TicketComment.objects.create(ticket=ticket, author=owner, content='public')
+                TicketComment.objects.create(ticket=ticket, author=agent, content='note', is_internal=True)
+            Job.objects.create(name='tickets.auto_assign', payload={}, run_at=timezone.now())
+        self.seeded = total
+
+    def client_for(self, user):
+        client = APIClient()
+        client.force_login(user)
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {ClaimsRefreshToken.for_user(user).access_token}')
+        return client
+
+    def measure(self, route, call, role):
+        user = self.roles[role]
+        client = self.client_for(user)
+        kwargs = call.kwargs(self.fx) if call.kwargs else {}
+        data = call.data(self.fx) if call.data else None
+        path = '/' + re.sub(r'<(?:\w+:)?(\w+)>', lambda m: str(kwargs[m.group(1)]), route)
+        # Role checks, fragments and ETag generations are cached; start cold
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            if call.method == 'GET':
+                response = client.get(path, data)
+            else:
+                # HTML views take form posts, the API takes JSON
+                fmt = 'json' if route.startswith('api/') else 'multipart'
+                response = getattr(client, call.method.lower())(path, data, format=fmt)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response.status_code, list(ctx.captured_queries)
+
+    def measure_all(self):
+        results = {}
+        for route, name, _ in iter_routes():
+            for call in BUDGETS.get(name, ()):
+                for role in self.roles:
+                    results[(name, call.method, role)] = (route, call) + self.measure(route, call, role)
+        return results
+
+    def test_every_route_has_a_budget(self):
+        missing = [
+            f'{route} ({name})' for route, name, namespace in iter_routes()
+            if name not in BUDGETS and name not in EXEMPT and namespace not in EXEMPT_NAMESPACES
+        ]
+        self.assertEqual(missing, [], "Declare a query budget in BUDGETS (or an EXEMPT reason) for these routes")
+
+    def test_query_counts_are_constant_and_within_budget(self):
+        self.seed(self.N)
+        # Writes create their counter rows etc. on first use; only compare
+        # steady-state calls
+        self.measure_all()
+        small = self.measure_all()
+        self.seed(self.N * 10)
+        large = self.measure_all()
+
+        failures = []
+        for key, (route, call, status, queries) in large.items():
+            name, method, role = key
+            label = f'{method} /{route} as {role}'
+            _, _, small_status, small_queries = small[key]
+            if status >= 500:
+                failures.append(f'{label}: HTTP {status}')
+                continue
+            problems = []
+            if len(queries) != len(small_queries):
+                problems.append(f'{len(small_queries)} queries at N={self.N}, '
+                                f'{len(queries)} at N={self.N * 10}')
+            if len(queries) > call.budget:
+                problems.append(f'{len(queries)} queries, budget {call.budget}')
+            if problems:
+                lines = [f"{label}: {'; '.join(problems)}"]
+                lines += [f'    {count}x {sql}' for count, sql in duplicated(queries)]
+                failures.append('\n'.join(lines))
+
+        for name, calls in BUDGETS.items():
+            for call in calls:
+                if not any(large[(name, call.method, role)][2] < 400 for role in self.roles):
+                    failures.append(f'{call.method} {name}: no role got a successful response')
+
+        self.assertEqual(failures, [], '\n' + '\n'.join(failures))
@@ -1,3 +1,1360 @@
-from django.test import TestCase
+import asyncio
+import json
+import tempfile
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from pathlib import Path
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.test import TestCase, override_settings
+from django.urls import path
+from django.utils import timezone
+from prometheus_client import REGISTRY
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from config import urls as project_urls
+from .assignment import agent_workloads, assign_unassigned, pick_agent
+from .authentication import ClaimsRefreshToken
+from .changes import changed_ticket_ids, prune_changes
+from .events import STAFF_CHANNEL, assignee_channel, creator_channel, get_broker
+from .forms import TicketUpdateForm
+from .fragments import detail_key, fragment_cache
+from .jobs import claim, enqueue, job, requeue_stale, run_job, work_off
+from .metrics import SQL_LABEL_LENGTH
+from .models import Category, Job, SLAPolicy, Ticket, TicketChange, TicketComment, TicketStat
+from .pagination import encode_cursor
+from .profiling import QUERY_TOTALS, FingerprintTotals
+from .sla import scan_sla
+from .roles import SUPPORT_TEAM
+from .search import search_ticket_ids
+from .stats import UNASSIGNED_OPEN, get_ticket_stats, recompute_ticket_stats
+from .views import (
+    admin_dashboard_async, ticket_comments_api_async, ticket_detail_api_async, ticket_list_api_async
+)
+
+# The project's URLs as ASYNC_READ_VIEWS=True routes them (ROOT_URLCONF for
+# AsyncReadViewTests)
+ASYNC_VIEWS = {
+    'api_ticket_list': ticket_list_api_async,
+    'api_ticket_detail': ticket_detail_api_async,
+    'api_ticket_comments': ticket_comments_api_async,
+    'api_admin_dashboard': admin_dashboard_async,
+}
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS[pattern.name], name=pattern.name)
+    if getattr(pattern, 'name', None) in ASYNC_VIEWS else pattern
+    for pattern in project_urls.urlpatterns
+]
+
+
+@job('tests.broken')
+def broken_job():
+    raise RuntimeError('broken')
+
+
+@job('tests.noop')
+def noop_job():
+    return 'ok'
+
+
+class TicketExportTests(TestCase):
+    ROWS = 20000
+    # Peak Python heap allowed while streaming the whole export. Building the
+    # full response in memory takes several times this for ROWS tickets.
+    MEMORY_CEILING = 8 * 1024 * 1024
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('export-admin', password='pw')
+        customer = User.objects.create_user('export-customer', password='pw')
+        category = Category.objects.create(name='Export')
+        Ticket.objects.bulk_create(
+            [
+                Ticket(
+                    title=f'Ticket {i}',
+                    description='x' * 200,
+                    category=category,
+                    created_by=customer,
+                )
+                for i in range(cls.ROWS)
+            ],
+            batch_size=2000,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def consume(self, response):
+        lines = 0
+        tracemalloc.start()
+        try:
+            for chunk in response.streaming_content:
+                lines += chunk.count(b'\n')
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return lines, peak
+
+    def test_csv_export_streams_under_memory_ceiling(self):
+        response = self.client.get('/api/tickets/export/', {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+
+        lines, peak = self.consume(response)
+        self.assertEqual(lines, self.ROWS + 1)
+        self.assertLess(peak, self.MEMORY_CEILING)
+
+    def test_ndjson_export_streams_under_memory_ceiling(self):
+        response = self.client.get('/api/tickets/export/', {'format': 'ndjson'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+
+        lines, peak = self.consume(response)
+        self.assertEqual(lines, self.ROWS)
+        self.assertLess(peak, self.MEMORY_CEILING)
+
+    def test_customer_export_is_scoped(self):
+        other = User.objects.create_user('export-other', password='pw')
+        self.client.force_authenticate(other)
+        response = self.client.get('/api/tickets/export/', {'format': 'ndjson'})
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+    def test_invalid_filters_are_rejected_before_streaming(self):
+        for params in [{'created_after': 'yesterday'}, {'category': 'x'},
+                       {'assigned_to': '1.5'}, {'status': 'Gone'}]:
+            response = self.client.get('/api/tickets/export/', {'format': 'ndjson', **params})
+            self.assertEqual(response.status_code, 400, params)
+            self.assertFalse(response.streaming, params)
+            self.assertIn(next(iter(params)), json.loads(response.content))
+
+        response = self.client.get('/api/tickets/export/', {
+            'format': 'ndjson', 'created_after': '2999-01-01T00:00:00Z', 'category': '', 'status': 'Open',
+        })
+        self.assertEqual(b''.join(response.streaming_content), b'')
+
+
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('profile-admin', password='pw')
+        Ticket.objects.create(title='Profiled', description='x', created_by=cls.admin)
+
+    def get_tickets(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        return client.get('/api/tickets/')
+
+    def test_disabled_by_default(self):
+        self.assertNotIn('Server-Timing', self.get_tickets())
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_server_timing_and_log_fields(self):
+        # Cached fragments would skip serialization altogether
+        cache.clear()
+        with self.assertLogs('tickets.profiling', 'INFO') as logs:
+            response = self.get_tickets()
+        self.assertEqual(response.status_code, 200)
+        for metric in ('total', 'db', 'serialize', 'render', 'app'):
+            self.assertIn(f'{metric};dur=', response['Server-Timing'])
+
+        profile = logs.records[0].profile
+        self.assertEqual((profile['path'], profile['status']), ('/api/tickets/', 200))
+        self.assertGreater(profile['queries'], 0)
+        self.assertGreater(profile['serialize_ms'], 0)
+        self.assertTrue(profile['slow_queries'])
+        self.assertNotIn('%s', profile['slow_queries'][0]['sql'])
+
+    @override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_untouched(self):
+        self.assertNotIn('Server-Timing', self.get_tickets())
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_fingerprints_are_totalled_across_requests(self):
+        QUERY_TOTALS.clear()
+        self.addCleanup(QUERY_TOTALS.clear)
+        with self.assertLogs('tickets.profiling', 'INFO'):
+            self.get_tickets()
+        once = {sql: count for sql, count, _ in QUERY_TOTALS.slowest(100)}
+        with self.assertLogs('tickets.profiling', 'INFO'):
+            self.get_tickets()
+        twice = {sql: count for sql, count, _ in QUERY_TOTALS.slowest(100)}
+        self.assertTrue(once)
+        self.assertEqual(twice, {sql: count * 2 for sql, count in once.items()})
+
+        families = {
+            family.name: family for family in text_string_to_metric_families(self.client.get('/metrics').text)
+        }
+        samples = families['helpdesk_profiled_queries'].samples
+        self.assertEqual(sum(sample.value for sample in samples), sum(twice.values()))
+        self.assertLessEqual({sample.labels['sql'] for sample in samples}, {sql[:SQL_LABEL_LENGTH] for sql in twice})
+
+    def test_fingerprint_totals_are_bounded(self):
+        totals = FingerprintTotals(size=2)
+        totals.add({'fast': [1, 0.001], 'slow': [1, 0.5]})
+        totals.add({'slower': [1, 0.9], 'slow': [1, 0.1]})
+        # 'fast' made room; the slowest ones stay
+        self.assertEqual(totals.slowest(10), [('slower', 1, 0.9), ('slow', 2, 0.6)])
+
+
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('metrics-admin', password='pw')
+        cls.agent = User.objects.create_user('metrics-agent', password='pw')
+        for priority in ('High', 'High', 'Low'):
+            Ticket.objects.create(title='Open', description='x', priority=priority, created_by=cls.admin)
+        Ticket.objects.create(title='Mine', description='x', priority='High', created_by=cls.admin,
+                              assigned_to=cls.agent)
+        Ticket.objects.create(title='Done', description='x', priority='Low', created_by=cls.admin,
+                              status='Closed')
+
+    def scrape(self, **headers):
+        response = self.client.get('/metrics', **headers)
+        samples = {}
+        if response.status_code == 200:
+            for family in text_string_to_metric_families(response.content.decode()):
+                for sample in family.samples:
+                    samples[(sample.name, tuple(sorted(sample.labels.items())))] = sample.value
+        return response, samples
+
+    def test_request_and_query_metrics(self):
+        key = ('helpdesk_http_requests_total',
+               (('method', 'GET'), ('route', 'api_ticket_list'), ('status', '200')))
+        _, before = self.scrape()
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        self.assertEqual(client.get('/api/tickets/').status_code, 200)
+
+        response, after = self.scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain'))
+        self.assertEqual(after[key] - before.get(key, 0), 1)
+        self.assertIn(('helpdesk_http_request_duration_seconds_count',
+                       (('method', 'GET'), ('route', 'api_ticket_list'))), after)
+        self.assertGreater(after[('helpdesk_db_queries_per_request_sum', (('route', 'api_ticket_list'),))], 0)
+        self.assertEqual(after[('helpdesk_http_requests_in_flight',
+                                (('method', 'GET'), ('route', 'api_ticket_list')))], 0)
+        # The scrape itself is in flight while it renders
+        self.assertEqual(after[('helpdesk_http_requests_in_flight', (('method', 'GET'), ('route', 'metrics')))], 1)
+
+    def test_ticket_gauges_come_from_counters(self):
+        with self.assertNumQueries(1):
+            _, samples = self.scrape()
+        self.assertEqual(samples[('helpdesk_open_tickets', (('priority', 'High'),))], 3)
+        self.assertEqual(samples[('helpdesk_open_tickets', (('priority', 'Low'),))], 1)
+        self.assertEqual(samples[('helpdesk_open_tickets', (('priority', 'Critical'),))], 0)
+        self.assertEqual(samples[('helpdesk_unassigned_open_tickets', (('priority', 'High'),))], 2)
+        self.assertEqual(samples[('helpdesk_tickets', (('status', 'Closed'),))], 1)
+
+        ticket = Ticket.objects.get(title='Open', priority='Low')
+        ticket.assigned_to = self.agent
+        ticket.status = 'Resolved'
+        ticket.save()
+        _, samples = self.scrape()
+        self.assertEqual(samples[('helpdesk_open_tickets', (('priority', 'Low'),))], 0)
+        self.assertEqual(samples[('helpdesk_unassigned_open_tickets', (('priority', 'Low'),))], 0)
+
+        # The incremental counters agree with a full rebuild
+        rows = lambda: set(TicketStat.objects.values_list('scope', 'owner_id', 'dimension', 'value', 'count'))
+        incremental = rows()
+        recompute_ticket_stats()
+        self.assertEqual({row for row in rows() if row[4]}, {row for row in incremental if row[4]})
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token(self):
+        self.assertEqual(self.scrape()[0].status_code, 401)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer wrong')[0].status_code, 401)
+        self.assertEqual(self.scrape(HTTP_AUTHORIZATION='Bearer s3cret')[0].status_code, 200)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class StatelessAuthenticationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('claims-admin', password='pw')
+        cls.user = User.objects.create_user('claims-user', password='pw')
+        Group.objects.get_or_create(name=SUPPORT_TEAM)
+
+    def setUp(self):
+        cache.clear()
+
+    def login(self, username):
+        response = self.client.post('/api/token/', {'username': username, 'password': 'pw'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def me(self, access):
+        return self.client.get('/api/me/', HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def test_requests_do_not_load_the_user(self):
+        tokens = self.login('claims-user')
+        # Only the profile fields; roles come from the token
+        with self.assertNumQueries(1):
+            response = self.me(tokens['access'])
+        self.assertEqual((response.json()['username'], response.json()['role']), ('claims-user', 'customer'))
+
+    def test_role_change_takes_effect_on_refresh(self):
+        tokens = self.login('claims-user')
+        admin_access = self.login('claims-admin')['access']
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                f'/api/admin/users/{self.user.id}/', {'groups': [SUPPORT_TEAM]},
+                content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {admin_access}',
+            )
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.me(tokens['access']).status_code, 401)
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 200)
+        me = self.me(response.json()['access']).json()
+        self.assertEqual((me['groups'], me['role']), ([SUPPORT_TEAM], 'support'))
+
+    def test_deactivation_revokes_refresh_tokens(self):
+        tokens = self.login('claims-user')
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.me(tokens['access']).status_code, 401)
+        response = self.client.post('/api/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(response.status_code, 401)
+
+    def test_tokens_without_claims_are_refused(self):
+        response = self.me(str(AccessToken.for_user(self.user)))
+        self.assertEqual(response.status_code, 401)
+
+
+class AdminUsersApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('users-admin', password='pw')
+        cls.agent = User.objects.create_user('users-agent', password='pw')
+        cls.agent.groups.add(Group.objects.get_or_create(name=SUPPORT_TEAM)[0])
+        cls.staff = User.objects.create_user('users-staff', password='pw', is_staff=True)
+        cls.customer = User.objects.create_user('customer-users', password='pw')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def usernames(self, **params):
+        response = self.client.get('/api/admin/users/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['username'] for row in response.json()['results']]
+
+    def test_fields_projection(self):
+        results = self.client.get('/api/admin/users/', {'fields': 'id,username'}).json()['results']
+        self.assertEqual({frozenset(row) for row in results}, {frozenset({'id', 'username'})})
+        self.assertIn({'id': self.agent.id, 'username': 'users-agent'}, results)
+
+        results = self.client.get('/api/admin/users/', {'fields': 'username, groups'}).json()['results']
+        self.assertIn({'username': 'users-agent', 'groups': [SUPPORT_TEAM]}, results)
+
+        response = self.client.get('/api/admin/users/', {'fields': 'username,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Unknown fields: password'})
+
+    def test_filters_narrow_the_results(self):
+        self.assertEqual(self.usernames(), ['customer-users', 'users-admin', 'users-agent', 'users-staff'])
+        self.assertEqual(self.usernames(group=SUPPORT_TEAM), ['users-agent'])
+        self.assertEqual(self.usernames(username='users-'), ['users-admin', 'users-agent', 'users-staff'])
+        self.assertEqual(self.usernames(is_staff='true'), ['users-admin', 'users-staff'])
+        self.assertEqual(self.usernames(is_staff='false', username='users-'), ['users-agent'])
+
+    def test_superusers_only(self):
+        self.client.force_authenticate(self.staff)
+        self.assertEqual(self.client.get('/api/admin/users/').status_code, 403)
+
+
+class MeApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        support, _ = Group.objects.get_or_create(name=SUPPORT_TEAM)
+        it_staff, _ = Group.objects.get_or_create(name='IT Staff')
+        cls.customer = User.objects.create_user('me-customer', password='pw')
+        cls.agent = User.objects.create_user('me-agent', password='pw')
+        cls.agent.groups.add(support)
+        cls.it_staff = User.objects.create_user('me-it-staff', password='pw')
+        cls.it_staff.groups.add(it_staff)
+        cls.superuser_agent = User.objects.create_superuser('me-super-agent', password='pw')
+        cls.superuser_agent.groups.add(support)
+
+    def me(self, user):
+        # Roles come from the access token's claims, as in production
+        token = ClaimsRefreshToken.for_user(user).access_token
+        response = self.client.get('/api/me/', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_capabilities_per_role(self):
+        expected = {
+            self.customer: ('customer', ['create_ticket', 'view_own']),
+            # Agents update only the tickets assigned to them
+            self.agent: ('support', [
+                'bulk_update', 'create_ticket', 'internal_comments', 'update_assigned', 'view_assigned', 'view_own',
+            ]),
+            self.it_staff: ('admin', [
+                'admin', 'assign_tickets', 'bulk_update', 'create_ticket', 'internal_comments', 'update_any',
+                'update_assigned', 'view_all', 'view_own',
+            ]),
+            # ...unless they are also superusers
+            self.superuser_agent: ('admin', [
+                'admin', 'assign_tickets', 'bulk_update', 'create_ticket', 'internal_comments', 'update_any',
+                'update_assigned', 'view_all', 'view_assigned', 'view_own',
+            ]),
+        }
+        for user, (role, capabilities) in expected.items():
+            with self.subTest(user=user.username):
+                data = self.me(user)
+                self.assertEqual((data['id'], data['username']), (user.id, user.username))
+                self.assertEqual((data['role'], data['capabilities']), (role, capabilities))
+
+    def test_groups_and_caching(self):
+        data = self.me(self.agent)
+        self.assertEqual((data['groups'], data['is_superuser']), ([SUPPORT_TEAM], False))
+        token = ClaimsRefreshToken.for_user(self.agent).access_token
+        response = self.client.get('/api/me/', headers={'Authorization': f'Bearer {token}'})
+        self.assertIn('private', response['Cache-Control'])
+        response = self.client.get('/api/me/', headers={
+            'Authorization': f'Bearer {token}', 'If-None-Match': response['ETag'],
+        })
+        self.assertEqual(response.status_code, 304)
+
+
+class AsyncReadViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('async-admin', password='pw')
+        cls.agent = User.objects.create_user('async-agent', password='pw')
+        cls.agent.groups.add(Group.objects.get_or_create(name=SUPPORT_TEAM)[0])
+        cls.customer = User.objects.create_user('async-customer', password='pw')
+        Category.objects.create(name='Hardware')
+        for n in range(3):
+            cls.ticket = Ticket.objects.create(title=f'Ticket {n}', description='x', priority='High',
+                                               created_by=cls.customer, assigned_to=cls.agent)
+        TicketComment.objects.create(ticket=cls.ticket, author=cls.agent, content='Public')
+        TicketComment.objects.create(ticket=cls.ticket, author=cls.agent, content='Note', is_internal=True)
+        Ticket.objects.create(title='Other', description='x', priority='Low', created_by=cls.admin)
+
+    def setUp(self):
+        cache.clear()
+        self.auth = {
+            user.username: {'Authorization': f'Bearer {ClaimsRefreshToken.for_user(user).access_token}'}
+            for user in (self.admin, self.agent, self.customer)
+        }
+
+    async def compare(self, username, url):
+        """
+        GET url from the DRF view, then from the async one; return the latter.
+        """
+        expected = await self.async_client.get(url, headers=self.auth[username])
+        with override_settings(ROOT_URLCONF=__name__):
+            response = await self.async_client.get(url, headers=self.auth[username])
+        self.assertEqual(response.status_code, expected.status_code, url)
+        self.assertEqual(response.json(), expected.json(), url)
+        self.assertEqual(response.get('ETag'), expected.get('ETag'), url)
+        return response
+
+    async def test_same_responses_as_drf_views(self):
+        ticket = self.ticket.id
+        for username, url in [
+            ('async-customer', '/api/tickets/'),
+            ('async-customer', '/api/tickets/?page_size=2'),
+            ('async-agent', '/api/tickets/?sort=activity'),
+            ('async-admin', '/api/tickets/'),
+            ('async-customer', f'/api/tickets/{ticket}/'),
+            ('async-agent', f'/api/tickets/{ticket}/'),
+            ('async-customer', f'/api/tickets/{ticket}/comments/'),
+            ('async-agent', f'/api/tickets/{ticket}/comments/'),
+            ('async-admin', '/api/admin/dashboard/'),
+            ('async-customer', '/api/admin/dashboard/'),
+            ('async-customer', '/api/tickets/999999/'),
+            ('async-customer', '/api/tickets/?cursor=bogus'),
+        ]:
+            await self.compare(username, url)
+
+        # Second page through the cursor, customers never see internal notes
+        first = (await self.compare('async-customer', '/api/tickets/?page_size=2')).json()
+        await self.compare('async-customer', f"/api/tickets/?page_size=2&cursor={first['next']}")
+        comments = (await self.compare('async-customer', f'/api/tickets/{ticket}/comments/')).json()
+        self.assertEqual([comment['content'] for comment in comments], ['Public'])
+
+    async def test_detail_hides_internal_comments_from_customers(self):
+        # Staff render (and cache) the detail first; the customer's fragment
+        # is a separate entry without the internal note
+        url = f'/api/tickets/{self.ticket.id}/'
+        agent = (await self.compare('async-agent', url)).json()
+        self.assertEqual({comment['content'] for comment in agent['comments']}, {'Public', 'Note'})
+        customer = (await self.compare('async-customer', url)).json()
+        self.assertEqual([comment['content'] for comment in customer['comments']], ['Public'])
+
+    @override_settings(ROOT_URLCONF=__name__, REQUEST_PROFILING=True)
+    async def test_metrics_and_profiling_in_async_mode(self):
+        cache.clear()
+        requests = lambda: REGISTRY.get_sample_value(
+            'helpdesk_http_requests_total', {'route': 'api_ticket_list', 'method': 'GET', 'status': '200'}
+        ) or 0
+        queries = lambda: REGISTRY.get_sample_value(
+            'helpdesk_db_queries_per_request_sum', {'route': 'api_ticket_list'}
+        ) or 0
+        before = requests(), queries()
+        with self.assertLogs('tickets.profiling', 'INFO') as logs:
+            response = await self.async_client.get('/api/tickets/', headers=self.auth['async-agent'])
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('db;dur=', response['Server-Timing'])
+        # The query wrappers saw the ORM calls made in the request's worker thread
+        self.assertGreater(logs.records[0].profile['queries'], 0)
+        self.assertEqual(requests() - before[0], 1)
+        self.assertEqual(queries() - before[1], logs.records[0].profile['queries'])
+
+        # DRF responses are rendered by the handler, after the template hook
+        with self.assertLogs('tickets.profiling', 'INFO') as logs:
+            response = await self.async_client.patch(
+                f'/api/tickets/{self.ticket.id}/', {'status': 'Resolved'},
+                content_type='application/json', headers=self.auth['async-agent'],
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(logs.records[0].profile['render_ms'], 0)
+        in_flight = REGISTRY.get_sample_value(
+            'helpdesk_http_requests_in_flight', {'route': 'api_ticket_detail', 'method': 'PATCH'}
+        )
+        self.assertEqual(in_flight, 0)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_conditional_get(self):
+        url = f'/api/tickets/{self.ticket.id}/'
+        response = await self.async_client.get(url, headers=self.auth['async-agent'])
+        response = await self.async_client.get(
+            url, headers={**self.auth['async-agent'], 'If-None-Match': response['ETag']}
+        )
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_authentication(self):
+        response = await self.async_client.get('/api/tickets/')
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('error', response.json())
+        self.assertTrue(response.has_header('WWW-Authenticate'))
+        response = await self.async_client.get('/api/tickets/', headers={'Authorization': 'Bearer nonsense'})
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_patch_goes_to_drf_view(self):
+        response = await self.async_client.patch(
+            f'/api/tickets/{self.ticket.id}/', {'status': 'Resolved'},
+            content_type='application/json', headers=self.auth['async-agent'],
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'Resolved')
+        response = await self.async_client.patch(
+            f'/api/tickets/{self.ticket.id}/', {'status': 'Closed'},
+            content_type='application/json', headers=self.auth['async-customer'],
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('etag-customer', password='pw')
+        cls.older = Ticket.objects.create(title='Older', description='x', created_by=cls.customer)
+        cls.newer = Ticket.objects.create(title='Newer', description='x', created_by=cls.customer)
+        for content in ('First', 'Second', 'Third'):
+            TicketComment.objects.create(ticket=cls.newer, author=cls.customer, content=content)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def assertRevalidates(self, url, etag):
+        """
+        The response at url has changed since etag; return the new ETag
+        after checking that it is answered with 304 in turn.
+        """
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+        return response['ETag']
+
+    def test_list(self):
+        url = '/api/tickets/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # max(updated_at) cannot see deletes, so no Last-Modified is offered...
+        self.assertNotIn('Last-Modified', response)
+        etag = response['ETag']
+        self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+        self.older.title = 'Older, edited'
+        self.older.save(update_fields=self.older.edit_fields('title'))
+        etag = self.assertRevalidates(url, etag)
+        # ...and If-Modified-Since alone never produces a stale 304
+        Ticket.objects.get(pk=self.older.pk).delete()
+        response = self.client.get(url, headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+        self.assertEqual((response.status_code, len(response.json()['results'])), (200, 1))
+        self.assertRevalidates(url, etag)
+
+    def test_detail_and_comments(self):
+        for url in (f'/api/tickets/{self.newer.id}/', f'/api/tickets/{self.newer.id}/comments/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('Last-Modified', response)
+                etag = response['ETag']
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+
+                comment = TicketComment.objects.filter(ticket=self.newer).latest('id')
+                comment.content += ' (edited)'
+                comment.save()
+                etag = self.assertRevalidates(url, etag)
+                # Not the newest comment, so max(updated_at) stays put
+                TicketComment.objects.filter(ticket=self.newer).earliest('id').delete()
+                self.assertRevalidates(url, etag)
+
+
+class TicketUpdateFormTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.agent = User.objects.create_user('form-agent', password='pw')
+        cls.customer = User.objects.create_user('form-customer', password='pw')
+
+    def assignees(self):
+        return sorted(user.id for user in TicketUpdateForm().fields['assigned_to'].queryset)
+
+    def test_assignees_are_the_support_team(self):
+        Group.objects.filter(name=SUPPORT_TEAM).delete()
+        # A fresh install has no Support Team yet: anyone can be picked
+        self.assertEqual(self.assignees(), sorted(User.objects.values_list('id', flat=True)))
+        self.agent.groups.add(Group.objects.create(name=SUPPORT_TEAM), Group.objects.get_or_create(name='IT Staff')[0])
+        # ...and once it does, only its members, each listed once
+        self.assertEqual(self.assignees(), [self.agent.id])
+
+
+class TicketStatTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('stats-customer', password='pw')
+        cls.agent = User.objects.create_user('stats-agent', password='pw')
+        cls.other_agent = User.objects.create_user('stats-other-agent', password='pw')
+        cls.agent.groups.add(Group.objects.get_or_create(name=SUPPORT_TEAM)[0])
+
+    def counters(self):
+        return {
+            row for row in TicketStat.objects.values_list('scope', 'owner_id', 'dimension', 'value', 'count')
+            if row[4]
+        }
+
+    def assertCountersMatchRecompute(self):
+        incremental = self.counters()
+        recompute_ticket_stats()
+        self.assertEqual(incremental, self.counters())
+
+    def test_counters_follow_every_write(self):
+        first = Ticket.objects.create(title='One', description='x', priority='High', created_by=self.customer)
+        second = Ticket.objects.create(title='Two', description='x', priority='Low', created_by=self.customer,
+                                       assigned_to=self.agent)
+        self.assertCountersMatchRecompute()
+
+        first.status = 'In progress'
+        first.priority = 'Critical'
+        first.save()
+        self.assertCountersMatchRecompute()
+
+        second.assigned_to = self.other_agent
+        second.save()
+        first.assigned_to = self.agent
+        first.save(update_fields=['assigned_to'])
+        self.assertCountersMatchRecompute()
+
+        second.delete()
+        self.assertCountersMatchRecompute()
+
+    def test_stale_instance_applies_the_stored_state(self):
+        ticket = Ticket.objects.create(title='One', description='x', created_by=self.customer)
+        stale = Ticket.objects.get(pk=ticket.pk)
+        ticket.status = 'Closed'
+        ticket.save(update_fields=['status'])
+        # The delta is taken from the row as stored, not as this copy loaded it
+        stale.assigned_to = self.agent
+        stale.save(update_fields=['assigned_to'])
+        self.assertCountersMatchRecompute()
+
+    def test_deleting_an_assignee_unassigns_their_tickets(self):
+        leaving = User.objects.create_user('stats-leaving-agent', password='pw')
+        Ticket.objects.create(title='Theirs', description='x', created_by=self.customer, assigned_to=leaving)
+        Ticket.objects.create(title='Own', description='x', created_by=leaving, assigned_to=leaving)
+        leaving.delete()
+        global_stats = get_ticket_stats()
+        self.assertEqual((global_stats['assigned'], global_stats['unassigned']), (0, 1))
+        self.assertTrue(TicketStat.objects.filter(dimension=UNASSIGNED_OPEN, count=1).exists())
+        self.assertCountersMatchRecompute()
+
+
+class TicketEditTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('edit-admin', password='pw')
+        cls.agent = User.objects.create_user('edit-agent', password='pw')
+        cls.agent.groups.add(Group.objects.get_or_create(name=SUPPORT_TEAM)[0])
+        SLAPolicy.objects.create(name='High', priority='High', resolution_minutes=60)
+        SLAPolicy.objects.create(name='Low', priority='Low', resolution_minutes=600)
+
+    def test_edits_leave_comment_counters_alone(self):
+        ticket = Ticket.objects.create(title='One', description='x', priority='Low', created_by=self.admin)
+        loaded = Ticket.objects.get(pk=ticket.pk)
+        TicketComment.objects.create(ticket=ticket, author=self.agent, content='Hi')
+        before = Ticket.objects.get(pk=ticket.pk)
+
+        loaded.status = 'In progress'
+        loaded.priority = 'High'
+        loaded.save(update_fields=loaded.edit_fields('status', 'priority'))
+        after = Ticket.objects.get(pk=ticket.pk)
+        self.assertEqual((after.comment_count, after.public_comment_count), (1, 1))
+        self.assertEqual((after.status, after.priority), ('In progress', 'High'))
+        self.assertGreater(after.last_activity_at, before.last_activity_at)
+        # High's policy is the tighter one
+        self.assertLess(after.due_at, before.due_at)
+
+    def test_api_and_admin_edits(self):
+        ticket = Ticket.objects.create(title='One', description='x', created_by=self.admin)
+        saves = []
+        def record(sender, update_fields, **kwargs):
+            saves.append(update_fields)
+        post_save.connect(record, sender=Ticket)
+        self.addCleanup(post_save.disconnect, record, sender=Ticket)
+
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.patch(f'/api/tickets/{ticket.id}/', {'status': 'Resolved'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        response = client.patch(f'/api/admin/tickets/{ticket.id}/assign/', {'assigned_to': self.agent.id},
+                                format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_login(self.admin)
+        response = self.client.post(f'/admin/tickets/ticket/{ticket.id}/change/', {
+            'title': 'Renamed', 'description': 'x', 'priority': 'Medium', 'status': 'Resolved',
+            'created_by': self.admin.id, 'assigned_to': self.agent.id, 'sla_state': '',
+            'last_activity_at_0': '2024-01-01', 'last_activity_at_1': '00:00:00',
+        })
+        self.assertEqual(response.status_code, 302)
+
+        # Each edit wrote only what it changed, never the comment counters
+        api_patch, assign, admin_form = [set(fields) - {'updated_at', 'last_activity_at'} for fields in saves]
+        self.assertEqual((api_patch, assign), ({'status'}, {'assigned_to'}))
+        self.assertIn('title', admin_form)
+        self.assertFalse(admin_form & {'comment_count', 'public_comment_count', 'status'})
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        self.assertEqual((ticket.title, ticket.status, ticket.assigned_to_id), ('Renamed', 'Resolved', self.agent.id))
+
+
+class ReconcileActivityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('reconcile-customer', password='pw')
+
+    def test_command_repairs_drifted_counters(self):
+        commented = Ticket.objects.create(title='Commented', description='x', created_by=self.customer)
+        TicketComment.objects.create(ticket=commented, author=self.customer, content='Public')
+        latest = TicketComment.objects.create(ticket=commented, author=self.customer, content='Note', is_internal=True)
+        quiet = Ticket.objects.create(title='Quiet', description='x', created_by=self.customer)
+        ahead = timezone.now() + timedelta(days=1)
+        # queryset.update() bypasses the signals that keep these in step
+        Ticket.objects.filter(pk=commented.pk).update(
+            comment_count=0, public_comment_count=5, last_activity_at=timezone.now() - timedelta(days=30)
+        )
+        Ticket.objects.filter(pk=quiet.pk).update(comment_count=3, last_activity_at=ahead)
+
+        out = StringIO()
+        call_command('reconcile_ticket_activity', chunk_size=1, stdout=out)
+        self.assertIn('Repaired comment activity on 2 tickets', out.getvalue())
+        commented, quiet = Ticket.objects.get(pk=commented.pk), Ticket.objects.get(pk=quiet.pk)
+        self.assertEqual((commented.comment_count, commented.public_comment_count, commented.last_activity_at),
+                         (2, 1, latest.created_at))
+        # last_activity_at only ever moves forward
+        self.assertEqual((quiet.comment_count, quiet.public_comment_count, quiet.last_activity_at), (0, 0, ahead))
+
+        out = StringIO()
+        call_command('reconcile_ticket_activity', stdout=out)
+        self.assertIn('already consistent', out.getvalue())
+
+
+class BulkUpdateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('bulk-admin', password='pw')
+        cls.agent = User.objects.create_user('bulk-agent', password='pw')
+        cls.agent.groups.add(Group.objects.get_or_create(name=SUPPORT_TEAM)[0])
+        cls.customer = User.objects.create_user('bulk-customer', password='pw')
+        cls.mine = Ticket.objects.create(title='Mine', description='x', created_by=cls.customer,
+                                         assigned_to=cls.agent)
+        cls.unassigned = Ticket.objects.create(title='Unassigned', description='x', created_by=cls.customer)
+
+    def bulk(self, user, data):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post('/api/tickets/bulk/', data, format='json')
+
+    def test_per_ticket_permissions(self):
+        ids = [self.mine.id, self.unassigned.id, 999999]
+        response = self.bulk(self.agent, {
+            'ids': ids, 'changes': {'status': 'In progress'},
+            'comment': {'content': 'On it', 'is_internal': False},
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'updated': 1, 'results': [
+            {'id': self.mine.id, 'result': 'updated'},
+            {'id': self.unassigned.id, 'result': 'forbidden'},
+            {'id': 999999, 'result': 'not_found'},
+        ]})
+        self.assertEqual(Ticket.objects.get(pk=self.mine.pk).status, 'In progress')
+        self.assertEqual(Ticket.objects.get(pk=self.unassigned.pk).status, 'Open')
+        self.assertEqual(list(TicketComment.objects.values_list('ticket_id', flat=True)), [self.mine.id])
+
+        response = self.bulk(self.admin, {'ids': ids[:2], 'changes': {'priority': 'High'}})
+        self.assertEqual(response.json()['updated'], 2)
+        self.assertEqual(self.bulk(self.customer, {'ids': ids[:1], 'changes': {'status': 'Closed'}}).status_code, 403)
+
+    def test_malformed_input_is_a_bad_request(self):
+        ids = [self.mine.id]
+        for data in [
+            {'ids': ids, 'changes': ['status']},
+            {'ids': ids, 'changes': {'assigned_to': 'abc'}},
+            {'ids': ids, 'changes': {'category': 'x'}},
+            {'ids': ids, 'changes': {'status': ['Open']}},
+            {'ids': ids, 'changes': {'priority': {'High': 1}}},
+            {'ids': ids, 'comment': 'hello'},
+            {'ids': ids, 'comment': {'content': 5}},
+            {'ids': ids, 'comment': {'content': 'x', 'is_internal': 'no'}},
+            {'ids': '12', 'changes': {'status': 'Closed'}},
+            {'ids': [True], 'changes': {'status': 'Closed'}},
+        ]:
+            response = self.bulk(self.admin, data)
+            self.assertEqual(response.status_code, 400, data)
+            self.assertIn('error', response.json())
+        self.assertEqual(Ticket.objects.get(pk=self.mine.pk).status, 'Open')
+
+
+class ImportTicketsTests(TestCase):
+    USERS = (
+        "username,email,first_name,last_name,groups,is_staff,date_joined\n"
+        "import-customer,customer@example.com,Cy,Customer,,false,2020-01-01 08:00:00\n"
+        "import-customer,duplicate@example.com,Du,Plicate,,false,\n"
+        "import-agent,agent@example.com,Ann,Agent,Support Team;Night Shift,true,2020-01-02T03:04:05Z\n"
+    )
+    TICKETS = [
+        {'id': 500, 'title': 'Printer jam', 'description': 'Tray 2', 'category': 'Hardware',
+         'priority': 'High', 'status': 'Open', 'created_by': 'import-customer', 'assigned_to': 'import-agent',
+         'created_at': '2021-03-01T10:00:00Z', 'updated_at': '2021-03-02T10:00:00Z'},
+        {'id': 501, 'title': 'VPN drops', 'description': 'Every hour', 'category': '',
+         'priority': 'Low', 'status': 'Open', 'created_by': 'import-customer', 'assigned_to': '',
+         'created_at': '2021-03-05T10:00:00'},
+    ]
+    COMMENTS = (
+        "ticket_id,author,content,is_internal,created_at,updated_at\n"
+        "500,import-agent,Replaced the fuser,false,2021-03-03T09:00:00Z,\n"
+        "500,import-agent,Vendor note,true,2021-03-04T09:00:00Z,2021-03-04T10:00:00Z\n"
+    )
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.paths = {name: Path(directory.name) / name for name in ('users.csv', 'tickets.jsonl', 'comments.csv')}
+        self.paths['users.csv'].write_text(self.USERS)
+        self.paths['tickets.jsonl'].write_text(''.join(json.dumps(row) + '\n' for row in self.TICKETS))
+        self.paths['comments.csv'].write_text(self.COMMENTS)
+
+    def test_import(self):
+        # Naive timestamps would make Django warn when they are saved
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', RuntimeWarning)
+            call_command(
+                'import_tickets', users=self.paths['users.csv'], tickets=self.paths['tickets.jsonl'],
+                comments=self.paths['comments.csv'], batch_size=2, stdout=StringIO(),
+            )
+        at = lambda *args: datetime(*args, tzinfo=dt_timezone.utc)
+
+        # The repeated username keeps its first row; naive times are made aware
+        customer = User.objects.get(username='import-customer')
+        self.assertEqual((customer.email, customer.date_joined), ('customer@example.com', at(2020, 1, 1, 8)))
+        agent = User.objects.get(username='import-agent')
+        self.assertEqual(set(agent.groups.values_list('name', flat=True)), {SUPPORT_TEAM, 'Night Shift'})
+
+        jam, vpn = Ticket.objects.select_related('category').order_by('id')
+        self.assertEqual((jam.id, jam.created_by, jam.assigned_to, jam.category.name),
+                         (500, customer, agent, 'Hardware'))
+        self.assertEqual((jam.created_at, jam.updated_at), (at(2021, 3, 1, 10), at(2021, 3, 2, 10)))
+        self.assertEqual((vpn.created_at, vpn.updated_at, vpn.assigned_to, vpn.category),
+                         (at(2021, 3, 5, 10), at(2021, 3, 5, 10), None, None))
+        note = TicketComment.objects.get(is_internal=True)
+        self.assertEqual((note.created_at, note.updated_at), (at(2021, 3, 4, 9), at(2021, 3, 4, 10)))
+
+        # Derived data that bulk_create skipped is rebuilt
+        self.assertEqual((jam.comment_count, jam.public_comment_count, jam.last_activity_at),
+                         (2, 1, at(2021, 3, 4, 9)))
+        self.assertEqual(vpn.last_activity_at, vpn.created_at)
+        global_stats = get_ticket_stats()
+        self.assertEqual((global_stats['total'], global_stats['assigned'], global_stats['by_priority']),
+                         (2, 1, {'High': 1, 'Low': 1}))
+        self.assertEqual(search_ticket_ids('fuser'), [500])
+
+        # New tickets are numbered after the imported ids
+        self.assertGreater(Ticket.objects.create(title='New', description='x', created_by=customer).id, 501)
+
+
+class JobQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('jobs-admin', password='pw')
+
+    def test_claim_takes_due_jobs_once(self):
+        due = enqueue(broken_job)
+        enqueue(broken_job, delay=timedelta(hours=1))
+        claimed = claim('w1', limit=10)
+        self.assertEqual([(j.id, j.status, j.attempts) for j in claimed], [(due.id, Job.RUNNING, 1)])
+        self.assertEqual(claim('w2', limit=10), [])
+
+    @override_settings(JOB_RETRY_BASE=10)
+    def test_failures_retry_with_backoff_then_fail(self):
+        queued = enqueue(broken_job, max_attempts=2)
+        self.assertEqual(work_off(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts, queued.locked_by), (Job.QUEUED, 1, ''))
+        self.assertIn('RuntimeError', queued.last_error)
+        self.assertGreater(queued.run_at, timezone.now())
+
+        Job.objects.filter(id=queued.id).update(run_at=timezone.now())
+        self.assertEqual(work_off(), 1)
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.FAILED, 2))
+
+    def test_requeue_stale(self):
+        first, second = enqueue(broken_job), enqueue(broken_job, max_attempts=1)
+        batch = claim('w1', limit=10)
+        Job.objects.update(locked_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(requeue_stale(timeout=60), (1, 1))
+        self.assertEqual(Job.objects.get(id=first.id).status, Job.QUEUED)
+        self.assertEqual(Job.objects.get(id=second.id).status, Job.FAILED)
+        # The old claim no longer owns the requeued job
+        self.assertFalse(run_job(batch[0]))
+        self.assertEqual(Job.objects.get(id=first.id).attempts, 1)
+
+    def test_locked_at_is_stamped_when_each_job_starts(self):
+        enqueue(noop_job)
+        enqueue(noop_job)
+        first, second = claim('w1', limit=10)
+        # The batch's first job ran for an hour before second started
+        long_ago = timezone.now() - timedelta(hours=1)
+        Job.objects.update(locked_at=long_ago)
+        started = timezone.now()
+        self.assertTrue(run_job(second))
+        self.assertGreaterEqual(Job.objects.get(id=second.id).locked_at, started)
+        self.assertEqual(Job.objects.get(id=first.id).locked_at, long_ago)
+
+    def test_user_delete_is_queued(self):
+        target = User.objects.create_user('jobs-target', password='pw')
+        Ticket.objects.create(title='Gone', description='x', created_by=target)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.delete(f'/api/admin/users/{target.id}/')
+        self.assertEqual(response.status_code, 202)
+        target.refresh_from_db()
+        self.assertFalse(target.is_active)
+
+        self.assertEqual(work_off(ids=[response.json()['job']]), 1)
+        self.assertFalse(User.objects.filter(id=target.id).exists())
+        self.assertFalse(Ticket.objects.filter(title='Gone').exists())
+        response = client.get(f"/api/admin/jobs/{response.json()['job']}/")
+        self.assertEqual(response.json()['status'], Job.DONE)
+
+    def test_user_delete_unassigns_their_tickets(self):
+        agent = User.objects.create_user('jobs-agent', password='pw')
+        customer = User.objects.create_user('jobs-customer', password='pw')
+        ticket = Ticket.objects.create(title='Theirs', description='x', created_by=customer, assigned_to=agent)
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        # Caches the detail fragment with the assignee in it
+        self.assertEqual(client.get(f'/api/tickets/{ticket.id}/').json()['assigned_to'], agent.id)
+        queued = client.delete(f'/api/admin/users/{agent.id}/').json()['job']
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        broker = get_broker()
+
+        async def subscribe():
+            return broker.subscribe(creator_channel(customer.id))
+        subscription = loop.run_until_complete(subscribe())
+        self.addCleanup(broker.unsubscribe, subscription)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(work_off(ids=[queued]), 1)
+        loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertEqual(subscription.queue.get_nowait()['type'], 'ticket.assigned')
+        change = TicketChange.objects.filter(ticket_id=ticket.id).latest('id')
+        self.assertEqual((change.assigned_to_id, change.previous_assigned_to_id), (None, agent.id))
+        self.assertIsNone(fragment_cache().get(detail_key(ticket.id)))
+        self.assertIsNone(client.get(f'/api/tickets/{ticket.id}/').json()['assigned_to'])
+        self.assertEqual(get_ticket_stats()['unassigned'], 1)
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('cursor-admin', password='pw')
+        tickets = [Ticket.objects.create(title=f'Ticket {n}', description='x', created_by=cls.admin)
+                   for n in range(7)]
+        # Four tickets share one created_at; id breaks the tie
+        Ticket.objects.filter(id__in=[t.id for t in tickets[1:5]]).update(created_at=tickets[1].created_at)
+        cls.expected = list(Ticket.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def page(self, **params):
+        response = self.client.get('/api/tickets/', {'page_size': 3, **params})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [ticket['id'] for ticket in data['results']], data['next'], data['prev']
+
+    def test_round_trip(self):
+        pages = []
+        ids, next_cursor, prev_cursor = self.page()
+        self.assertIsNone(prev_cursor)
+        pages.append(ids)
+        while next_cursor:
+            ids, next_cursor, prev_cursor = self.page(cursor=next_cursor)
+            pages.append(ids)
+        self.assertEqual([ticket_id for ids in pages for ticket_id in ids], self.expected)
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 1])
+
+        # And back again through the prev cursors
+        back = [pages[-1]]
+        while prev_cursor:
+            ids, _, prev_cursor = self.page(cursor=prev_cursor)
+            back.append(ids)
+        self.assertEqual(back[::-1], pages)
+
+    def test_new_rows_do_not_shift_later_pages(self):
+        _, next_cursor, _ = self.page()
+        Ticket.objects.create(title='Newer', description='x', created_by=self.admin)
+        ids, _, _ = self.page(cursor=next_cursor)
+        self.assertEqual(ids, self.expected[3:6])
+
+    def test_invalid_cursors(self):
+        for cursor in ['bogus', encode_cursor('not-a-date', 1, 'n'),
+                       encode_cursor('2024-01-01T00:00:00+00:00', 1, 'x'),
+                       encode_cursor('2024-01-01T00:00:00+00:00', 'one', 'n')]:
+            response = self.client.get('/api/tickets/', {'cursor': cursor})
+            self.assertEqual(response.status_code, 400, cursor)
+            self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+
+class TicketSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('search-customer', password='pw')
+        cls.other = User.objects.create_user('search-other', password='pw')
+        cls.agent = User.objects.create_user('search-agent', password='pw')
+        cls.agent.groups.add(Group.objects.get_or_create(name=SUPPORT_TEAM)[0])
+        cls.in_title = Ticket.objects.create(title='Printer jammed', description='Paper stuck',
+                                             created_by=cls.customer)
+        cls.in_description = Ticket.objects.create(title='Office issue', description='The printer is offline',
+                                                   created_by=cls.customer, assigned_to=cls.agent)
+        cls.in_comment = Ticket.objects.create(title='Help', description='Something broke',
+                                               created_by=cls.customer)
+        TicketComment.objects.create(ticket=cls.in_comment, author=cls.agent, content='Rebooted the printer')
+        cls.internal = TicketComment.objects.create(ticket=cls.in_comment, author=cls.agent,
+                                                    content='Vendor escalation needed', is_internal=True)
+        Ticket.objects.create(title='Printer on floor 2', description='x', created_by=cls.other)
+
+    def search(self, user, q):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/tickets/search/', {'q': q})
+        self.assertEqual(response.status_code, 200)
+        return [ticket['id'] for ticket in response.json()['results']]
+
+    def test_ranking_and_prefix_match(self):
+        expected = [self.in_title.id, self.in_description.id, self.in_comment.id]
+        self.assertEqual(self.search(self.customer, 'printer'), expected)
+        self.assertEqual(self.search(self.customer, 'print'), expected)
+        # Quotes and operators are searched as plain words, all of them required
+        self.assertEqual(self.search(self.customer, 'jammed "printer'), [self.in_title.id])
+        self.assertEqual(self.search(self.customer, 'jammed OR offline'), [])
+
+    def test_visibility(self):
+        self.assertEqual(self.search(self.agent, 'printer'), [self.in_description.id])
+        self.assertEqual(len(self.search(User.objects.create_superuser('search-admin', password='pw'), 'printer')), 4)
+
+    def test_internal_comments_never_match(self):
+        self.assertEqual(self.search(self.customer, 'escalation'), [])
+        self.internal.is_internal = False
+        self.internal.save()
+        self.assertEqual(self.search(self.customer, 'escalation'), [self.in_comment.id])
+
+    def test_query_is_required(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        self.assertEqual(client.get('/api/tickets/search/', {'q': '  '}).status_code, 400)
+
+
+class ChangesFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('changes-customer', password='pw')
+        cls.agent = User.objects.create_user('changes-agent', password='pw')
+        cls.other_agent = User.objects.create_user('changes-other-agent', password='pw')
+        team = Group.objects.get_or_create(name=SUPPORT_TEAM)[0]
+        cls.agent.groups.add(team)
+        cls.other_agent.groups.add(team)
+
+    def changes(self, user, since=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get('/api/tickets/changes/', {} if since is None else {'since': since})
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def settle(self):
+        TicketChange.objects.update(recorded_at=timezone.now() - timedelta(minutes=1))
+
+    def test_updates_and_tombstones(self):
+        baseline = self.changes(self.agent)
+        self.assertEqual((baseline['updated'], baseline['reset']), ([], False))
+        kept = Ticket.objects.create(title='Kept', description='x', created_by=self.customer,
+                                     assigned_to=self.agent)
+        moved = Ticket.objects.create(title='Moved', description='x', created_by=self.customer,
+                                      assigned_to=self.agent)
+        moved.assigned_to = self.other_agent
+        moved.save(update_fields=moved.edit_fields('assigned_to'))
+        self.settle()
+
+        feed = self.changes(self.agent, baseline['cursor'])
+        self.assertEqual([ticket['id'] for ticket in feed['updated']], [kept.id])
+        self.assertEqual(feed['deleted'], [moved.id])
+        self.assertEqual((feed['has_more'], feed['reset']), (False, False))
+        self.assertEqual(self.changes(self.agent, feed['cursor'])['updated'], [])
+
+        customer_cursor = self.changes(self.customer, baseline['cursor'])['cursor']
+        kept_id = kept.id
+        kept.delete()
+        self.settle()
+        feed = self.changes(self.customer, customer_cursor)
+        self.assertEqual((feed['updated'], feed['deleted']), ([], [kept_id]))
+
+    def test_unsettled_changes_are_sent_again(self):
+        since = self.changes(self.customer)['cursor']
+        ticket = Ticket.objects.create(title='New', description='x', created_by=self.customer)
+        feed = self.changes(self.customer, since)
+        self.assertEqual([t['id'] for t in feed['updated']], [ticket.id])
+        self.assertEqual(feed['cursor'], since)
+
+    def test_full_pages_always_advance(self):
+        for n in range(3):
+            Ticket.objects.create(title=f'Ticket {n}', description='x', created_by=self.customer)
+        first = TicketChange.objects.order_by('id').first().id
+        ticket_ids, cursor, has_more = changed_ticket_ids(Q(), first - 1, limit=2)
+        self.assertEqual((len(ticket_ids), cursor, has_more), (2, first + 1, True))
+
+    def test_reset(self):
+        Ticket.objects.create(title='Old', description='x', created_by=self.customer)
+        stale = self.changes(self.customer)['cursor']
+        self.assertTrue(self.changes(self.customer, int(stale) + 100)['reset'])
+        Ticket.objects.create(title='New', description='x', created_by=self.customer)
+        Ticket.objects.create(title='Newer', description='x', created_by=self.customer)
+        prune_changes(TicketChange.objects.order_by('-id')[0].recorded_at)
+        self.assertTrue(self.changes(self.customer, int(stale) - 1)['reset'])
+
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        self.assertEqual(client.get('/api/tickets/changes/', {'since': 'abc'}).status_code, 400)
+
+
+class TicketEventTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('events-customer', password='pw')
+        cls.agent = User.objects.create_user('events-agent', password='pw')
+        cls.other_agent = User.objects.create_user('events-other-agent', password='pw')
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        broker = get_broker()
+
+        async def subscribe():
+            return {
+                'staff': broker.subscribe(STAFF_CHANNEL),
+                'creator': broker.subscribe(creator_channel(self.customer.id)),
+                'agent': broker.subscribe(assignee_channel(self.agent.id)),
+                'other_agent': broker.subscribe(assignee_channel(self.other_agent.id)),
+            }
+        self.subscriptions = self.loop.run_until_complete(subscribe())
+        for subscription in self.subscriptions.values():
+            self.addCleanup(broker.unsubscribe, subscription)
+
+    def received(self):
+        # Deliveries are scheduled on the subscribers' loop
+        self.loop.run_until_complete(asyncio.sleep(0))
+        events = {}
+        for name, subscription in self.subscriptions.items():
+            events[name] = []
+            while not subscription.queue.empty():
+                event = subscription.queue.get_nowait()
+                events[name].append(event['comment']['content'] if 'comment' in event else event['type'])
+        return events
+
+    def test_fan_out_follows_visibility(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket = Ticket.objects.create(title='One', description='x', created_by=self.customer,
+                                           assigned_to=self.agent)
+        with self.captureOnCommitCallbacks(execute=True):
+            TicketComment.objects.create(ticket=ticket, author=self.agent, content='Public')
+            TicketComment.objects.create(ticket=ticket, author=self.agent, content='Note', is_internal=True)
+        self.assertEqual(self.received(), {
+            'staff': ['ticket.created', 'Public', 'Note'],
+            'creator': ['ticket.created', 'Public'],
+            'agent': ['ticket.created', 'Public', 'Note'],
+            'other_agent': [],
+        })
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ticket.assigned_to = self.other_agent
+            ticket.save(update_fields=ticket.edit_fields('assigned_to'))
+        # The previous assignee hears about it too, so it can drop the ticket
+        self.assertEqual(self.received(), {
+            'staff': ['ticket.assigned'],
+            'creator': ['ticket.assigned'],
+            'agent': ['ticket.assigned'],
+            'other_agent': ['ticket.assigned'],
+        })
+
+    def test_rolled_back_writes_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Ticket.objects.create(title='One', description='x', created_by=self.customer)
+                raise RuntimeError
+        self.assertEqual(self.received()['staff'], [])
+
+
+class AutoAssignTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('assign-admin', password='pw')
+        cls.customer = User.objects.create_user('assign-customer', password='pw')
+        team = Group.objects.get_or_create(name=SUPPORT_TEAM)[0]
+        cls.busy = User.objects.create_user('assign-busy', password='pw')
+        cls.light = User.objects.create_user('assign-light', password='pw')
+        cls.away = User.objects.create_user('assign-away', password='pw', is_active=False)
+        for agent in (cls.busy, cls.light, cls.away):
+            agent.groups.add(team)
+        # busy: one Critical (load 5); light: two Low (load 2)
+        for assignee, priority in [(cls.busy, 'Critical'), (cls.light, 'Low'), (cls.light, 'Low')]:
+            Ticket.objects.create(title='Open', description='x', priority=priority,
+                                  created_by=cls.customer, assigned_to=assignee)
+        Ticket.objects.create(title='Done', description='x', priority='Critical', status='Closed',
+                              created_by=cls.customer, assigned_to=cls.light)
+
+    def test_workloads_come_from_open_tickets(self):
+        workloads = agent_workloads()
+        self.assertEqual(set(workloads), {self.busy.id, self.light.id})
+        self.assertEqual(workloads[self.busy.id]['load'], 5)
+        self.assertEqual(workloads[self.light.id]['by_priority'], {'Low': 2})
+        self.assertEqual(workloads[self.light.id]['load'], 2)
+
+    def test_pick_agent(self):
+        self.assertEqual(pick_agent('High'), self.light.id)
+        with override_settings(TICKET_ASSIGNMENT_WEIGHTED=False):
+            self.assertEqual(pick_agent('High'), self.busy.id)
+
+    def test_assign_unassigned_balances_load(self):
+        critical, high, low = [
+            Ticket.objects.create(title=priority, description='x', priority=priority, created_by=self.customer)
+            for priority in ('Low', 'High', 'Critical')
+        ][::-1]
+        plan = assign_unassigned(self.admin)
+        # light 2 -> 7 (Critical), busy 5 -> 8 (High), light 7 -> 8 (Low)
+        self.assertEqual(plan, [
+            {'id': critical.id, 'assigned_to': self.light.id},
+            {'id': high.id, 'assigned_to': self.busy.id},
+            {'id': low.id, 'assigned_to': self.light.id},
+        ])
+        self.assertEqual({w['load'] for w in agent_workloads().values()}, {8})
+        self.assertEqual(assign_unassigned(self.admin), [])
+
+    @override_settings(TICKET_AUTO_ASSIGN=True)
+    def test_new_tickets_go_to_the_least_loaded_agent(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        response = client.post('/api/tickets/create/', {'title': 'New', 'description': 'x', 'priority': 'High'},
+                               format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Ticket.objects.get(id=response.json()['id']).assigned_to_id, self.light.id)
+
+
+class SLAScanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.customer = User.objects.create_user('sla-customer', password='pw')
+        cls.agent = User.objects.create_user('sla-agent', password='pw')
+        SLAPolicy.objects.all().delete()
+        SLAPolicy.objects.create(name='Default', first_response_minutes=60, resolution_minutes=240)
+        SLAPolicy.objects.create(name='Critical', priority='Critical', first_response_minutes=15,
+                                 resolution_minutes=60)
+
+    def ticket(self, **fields):
+        return Ticket.objects.create(title='SLA', description='x', created_by=self.customer, **fields)
+
+    def states(self, *tickets):
+        return [Ticket.objects.get(pk=ticket.pk).sla_state for ticket in tickets]
+
+    def test_deadlines_follow_the_policy(self):
+        ticket = self.ticket()
+        # New tickets measure from the moment before created_at is stamped
+        second = timedelta(seconds=1)
+        self.assertAlmostEqual(ticket.first_response_due_at, ticket.created_at + timedelta(minutes=60), delta=second)
+        self.assertAlmostEqual(ticket.due_at, ticket.created_at + timedelta(minutes=240), delta=second)
+        ticket.priority = 'Critical'
+        ticket.save(update_fields=ticket.edit_fields('priority'))
+        self.assertEqual(Ticket.objects.get(pk=ticket.pk).due_at, ticket.created_at + timedelta(minutes=60))
+
+    def test_scan_flags_at_risk_then_breached(self):
+        waiting, answered, closed = self.ticket(), self.ticket(), self.ticket(status='Closed')
+        TicketComment.objects.create(ticket=answered, author=self.agent, content='On it')
+        start = waiting.created_at
+        warning = timedelta(minutes=60)
+
+        self.assertEqual(scan_sla(now=start, warning=warning), {'breached': 0, 'at_risk': 1})
+        self.assertEqual(self.states(waiting, answered, closed), ['at_risk', '', ''])
+
+        # First response missed; answered is only near its resolution deadline
+        result = scan_sla(now=start + timedelta(minutes=200), warning=warning)
+        self.assertEqual(result, {'breached': 1, 'at_risk': 1})
+        self.assertEqual(self.states(waiting, answered, closed), ['breached', 'at_risk', ''])
+
+        # Nothing left to flag; rescans are no-ops
+        self.assertEqual(scan_sla(now=start + timedelta(minutes=200), warning=warning),
+                         {'breached': 0, 'at_risk': 0})
+        self.assertEqual(scan_sla(now=start + timedelta(minutes=300), warning=warning),
+                         {'breached': 1, 'at_risk': 0})
+        self.assertEqual(self.states(waiting, answered, closed), ['breached', 'breached', ''])
+
+    def test_new_deadlines_reset_the_state(self):
+        ticket = self.ticket()
+        scan_sla(now=ticket.created_at + timedelta(minutes=300))
+        self.assertEqual(self.states(ticket), ['breached'])
+        ticket = Ticket.objects.get(pk=ticket.pk)
+        ticket.priority = 'Low'
+        ticket.save(update_fields=ticket.edit_fields('priority'))
+        self.assertEqual(self.states(ticket), [''])
@@ -1,17 +1,54 @@
+import asyncio
+import hashlib
+import json
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login
-from django.contrib.auth.models import Group
-from django.db.models import Count
-from django.http import HttpResponseForbidden
-from rest_framework.decorators import api_view, permission_classes
+from django.contrib.auth.models import Group, User
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.csrf import csrf_exempt
+from prometheus_client import CONTENT_TYPE_LATEST
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
 
+from . import tasks
+from .assignment import MAX_AUTO_ASSIGN, agent_workloads, is_weighted, pick_agent
+from .authentication import StatelessJWTAuthentication
+from .bulk import BulkUpdateError, bulk_update_tickets
+from .changes import changed_ticket_ids, is_expired, latest_sequence, scope_filter
+from .events import channel_for, get_broker
+from .conditional import (
+    add_etag, aresponse_etag, aticket_list_version, aticket_version, not_modified,
+    response_etag, ticket_list_version, ticket_version
+)
+from .export import (
+    CSVStreamRenderer, ExportFilterSerializer, NDJSONStreamRenderer, export_rows, stream_csv,
+    stream_ndjson
+)
 from .forms import TicketCreateForm, TicketUpdateForm
-from .models import Ticket, Category
-from .serializers import TicketSerializers
+from .fragments import arender_detail, arender_summaries, render_detail, render_summaries
+from .jobs import enqueue, queue_stats
+from .metrics import exposition
+from .models import Ticket, Category, Job, TicketStat
+from .pagination import InvalidCursor, apaginate_queryset, paginate_queryset, paginated_response_data
+from .roles import (
+    SUPPORT_TEAM, get_capabilities, get_group_names, get_role,
+    is_admin, is_support_agent, is_support_staff
+)
+from .search import MAX_RESULTS, search_ticket_ids
+from .serializers import (
+    TicketCommentSerializer, TicketSerializers, summary_queryset, detail_queryset
+)
+from .stats import aget_ticket_stats, get_ticket_stats
 
 # ---------------------------
 # Frontend / Template Views
@@ -39,17 +76,21 @@ def dashboard(request):
     Dashboard view showing summaries
     """
     user = request.user
-    if user.groups.filter(name='IT Staff').exists() or user.is_superuser:
-        tickets = Ticket.objects.all()
+    if is_admin(user):
+        stats = get_ticket_stats()
     else:
-        tickets = Ticket.objects.filter(created_by=user)
+        stats = get_ticket_stats(TicketStat.SCOPE_CREATOR, user.id)
 
     context = {
-        'tickets_by_status': tickets.values('status').annotate(count=Count('id')),
-        'tickets_by_priority': tickets.values('priority').annotate(count=Count('id')),
-        'assigned_count': tickets.filter(assigned_to__isnull=False).count(),
-        'unassigned_count': tickets.filter(assigned_to__isnull=True).count(),
-        'total_tickets': tickets.count(),
+        'tickets_by_status': [
+            {'status': key, 'count': count} for key, count in stats['by_status'].items()
+        ],
+        'tickets_by_priority': [
+            {'priority': key, 'count': count} for key, count in stats['by_priority'].items()
+        ],
+        'assigned_count': stats['assigned'],
+        'unassigned_count': stats['unassigned'],
+        'total_tickets': stats['total'],
     }
     return render(request, "tickets/dashboard.html", context)
 
@@ -60,11 +101,13 @@ def ticket_list(request):
     Show tickets depending on user role
     """
     user = request.user
-    if user.groups.filter(name='IT Staff').exists() or user.is_superuser:
+    if is_admin(user):
         tickets = Ticket.objects.all().order_by('-created_at')
     else:
-        tickets = Ticket.objects.filter(created_by=user).order_by('-created_at')
+        tickets = Ticket.objects.filter(created_by_id=user.id).order_by('-created_at')
 
+    # The template shows each ticket's category
+    tickets = tickets.select_related('category')
     return render(request, "tickets/ticket_list.html", {"tickets": tickets})
 
 
@@ -73,10 +116,10 @@ def ticket_detail(request, ticket_id):
     """
     Show ticket details depending on role
     """
-    ticket = get_object_or_404(Ticket, id=ticket_id)
+    ticket = get_object_or_404(Ticket.objects.select_related('category', 'assigned_to'), id=ticket_id)
     user = request.user
 
-    if ticket.created_by != user and not user.groups.filter(name='IT Staff').exists() and not user.is_superuser:
+    if ticket.created_by_id != user.id and not is_admin(user):
         return HttpResponseForbidden("You do not have permission to view this ticket.")
 
     return render(request, "tickets/ticket_detail.html", {"ticket": ticket})
@@ -108,13 +151,15 @@ def ticket_update(request, ticket_id):
     ticket = get_object_or_404(Ticket, id=ticket_id)
     user = request.user
 
-    if not user.groups.filter(name='IT Staff').exists() and not user.is_superuser:
+    if not is_admin(user):
         return HttpResponseForbidden("You do not have permission to update this ticket.")
 
     if request.method == "POST":
         form = TicketUpdateForm(request.POST, instance=ticket)
         if form.is_valid():
-            form.save()
+            ticket = form.save(commit=False)
+            if form.changed_data:
+                ticket.save(update_fields=ticket.edit_fields(*form.changed_data))
             return redirect("ticket_detail", ticket_id=ticket.id)
     else:
         form = TicketUpdateForm(instance=ticket)
@@ -125,29 +170,187 @@ def ticket_update(request, ticket_id):
 # API Views (DRF)
 # ---------------------------
 
+# Seconds the browser may reuse /api/me/ before revalidating
+ME_MAX_AGE = 60
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def me_api(request):
+    """
+    API: The current user, their groups, role and capability set
+    - Cheap (roles come from the token claims, profile fields in one
+      query), privately cacheable for ME_MAX_AGE seconds and revalidated
+      with an ETag after that
+    """
+    user = request.user
+    profile = User.objects.filter(pk=user.id).values("email", "first_name", "last_name").first()
+    if profile is None:
+        return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+    data = {
+        "id": user.id,
+        "username": user.username,
+        **profile,
+        "is_superuser": user.is_superuser,
+        "groups": sorted(get_group_names(user)),
+        "role": get_role(user),
+        "capabilities": get_capabilities(user),
+    }
+    etag = '"%s"' % hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = Response(data)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, max_age=ME_MAX_AGE)
+    patch_vary_headers(response, ["Authorization"])
+    return response
+
+
+def _visible_tickets(user):
+    if is_admin(user):
+        # IT Staff can see all tickets
+        return Ticket.objects.all()
+    if is_support_agent(user):
+        # Support Team agents can see tickets assigned to them
+        return Ticket.objects.filter(assigned_to_id=user.id)
+    # Regular users can only see their own tickets
+    return Ticket.objects.filter(created_by_id=user.id)
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def ticket_list_api(request):
     """
-    API: List tickets based on user role
+    API: List tickets based on user role, newest first, one cursor page at a time
     - IT Staff/Admin: See all tickets
     - Support/Agent: See only tickets assigned to them
     - Regular User: See only their own tickets
+    ?sort=activity orders by last activity (newest comment or edit) instead
+    Supports If-None-Match (304 when nothing changed)
     """
     user = request.user
+    visible = _visible_tickets(user)
+    include_internal = is_support_staff(user)
     
-    if user.groups.filter(name='IT Staff').exists() or user.is_superuser:
-        # IT Staff can see all tickets
-        tickets = Ticket.objects.all().order_by('-created_at')
-    elif user.groups.filter(name='Support Team').exists():
-        # Support Team agents can see tickets assigned to them
-        tickets = Ticket.objects.filter(assigned_to=user).order_by('-created_at')
-    else:
-        # Regular users can only see their own tickets
-        tickets = Ticket.objects.filter(created_by=user).order_by('-created_at')
+    sort = request.query_params.get('sort', 'created')
+    if sort not in ('created', 'activity'):
+        return Response({"error": "sort must be 'created' or 'activity'"}, status=status.HTTP_400_BAD_REQUEST)
     
-    serializer = TicketSerializers(tickets, many=True)
-    return Response(serializer.data)
+    etag = response_etag(request, ticket_list_version(visible, include_internal))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
+    tickets = summary_queryset(visible, include_internal=include_internal)
+    try:
+        page, next_cursor, prev_cursor = paginate_queryset(
+            request, tickets, key='last_activity_at' if sort == 'activity' else 'created_at'
+        )
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    response = Response(paginated_response_data(render_summaries(page), next_cursor, prev_cursor))
+    return add_etag(response, etag)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ticket_search_api(request):
+    """
+    API: Full-text search over ticket title, description and public comments
+    - Same visibility rules as the ticket list
+    - Results are ranked best match first (?q=, optional ?limit=)
+    """
+    user = request.user
+    query = request.query_params.get("q", "").strip()
+    if not query:
+        return Response(
+            {"error": "Search query (q) is required"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        limit = int(request.query_params.get("limit", 25))
+    except ValueError:
+        limit = 25
+    
+    ids = search_ticket_ids(query, _visible_tickets(user), limit=min(limit, MAX_RESULTS))
+    tickets = summary_queryset(Ticket.objects.filter(id__in=ids), include_internal=is_support_staff(user))
+    by_id = {ticket.id: ticket for ticket in tickets}
+    ranked = [by_id[ticket_id] for ticket_id in ids if ticket_id in by_id]
+    return Response({"results": render_summaries(ranked)})
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def ticket_changes_api(request):
+    """
+    API: Tickets created, updated, reassigned or deleted since a cursor
+    - Same visibility rules as the ticket list
+    - Without ?since= only the current cursor is returned (sync baseline)
+    - Tickets no longer visible (deleted or reassigned away) come back as ids
+      in "deleted"; "reset": true means the cursor expired and the client
+      should reload the full list
+    """
+    user = request.user
+    since = request.query_params.get("since")
+    
+    if since in (None, ""):
+        return Response({"updated": [], "deleted": [], "cursor": str(latest_sequence()),
+                         "has_more": False, "reset": False})
+    try:
+        since = int(since)
+    except ValueError:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if is_expired(since):
+        return Response({"updated": [], "deleted": [], "cursor": str(latest_sequence()),
+                         "has_more": False, "reset": True})
+    
+    ticket_ids, cursor, has_more = changed_ticket_ids(
+        scope_filter(user, is_admin(user), is_support_agent(user)), since
+    )
+    tickets = list(
+        summary_queryset(_visible_tickets(user).filter(id__in=ticket_ids),
+                         include_internal=is_support_staff(user))
+        .order_by('-created_at', '-id')
+    )
+    found = {ticket.id for ticket in tickets}
+    return Response({
+        "updated": render_summaries(tickets),
+        "deleted": [ticket_id for ticket_id in ticket_ids if ticket_id not in found],
+        "cursor": str(cursor),
+        "has_more": has_more,
+        "reset": False,
+    })
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+@renderer_classes([CSVStreamRenderer, NDJSONStreamRenderer])
+def ticket_export_api(request):
+    """
+    API: Stream visible tickets as CSV or NDJSON (?format=csv|ndjson)
+    - Same visibility rules as the ticket list
+    - Optional filters: status, priority, category, assigned_to, created_by,
+      created_after, created_before (400 on invalid values)
+    """
+    filters = ExportFilterSerializer(data={
+        name: value for name, value in request.query_params.items() if value != ''
+    })
+    if not filters.is_valid():
+        return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    rows = export_rows(_visible_tickets(request.user), filters.validated_data)
+    if request.accepted_renderer.format == "ndjson":
+        response = StreamingHttpResponse(stream_ndjson(rows), content_type="application/x-ndjson")
+        filename = "tickets.ndjson"
+    else:
+        response = StreamingHttpResponse(stream_csv(rows), content_type="text/csv")
+        filename = "tickets.csv"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
 
 
 @api_view(["POST"])
@@ -155,10 +358,16 @@ def ticket_list_api(request):
 def ticket_create_api(request):
     """
     API: Create a new ticket (customers only)
+    - With TICKET_AUTO_ASSIGN on, tickets without an assignee go to the
+      least-loaded Support Team agent
     """
     serializer = TicketSerializers(data=request.data)
     if serializer.is_valid():
-        serializer.save(created_by=request.user)
+        extra = {}
+        if (getattr(settings, "TICKET_AUTO_ASSIGN", False)
+                and not serializer.validated_data.get("assigned_to")):
+            extra["assigned_to_id"] = pick_agent(serializer.validated_data.get("priority", "Medium"))
+        serializer.save(created_by_id=request.user.id, **extra)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -170,38 +379,39 @@ def ticket_detail_api(request, ticket_id):
     API: Get ticket details or update status/assignment (Support Team only)
     """
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
+        ticket = Ticket.objects.select_related('created_by', 'assigned_to').get(id=ticket_id)
     except Ticket.DoesNotExist:
         return Response({"error": "Ticket not found"}, status=status.HTTP_404_NOT_FOUND)
     
     user = request.user
     
     # Check permissions
-    if not (user.is_superuser or 
-            user.groups.filter(name='IT Staff').exists() or 
-            user.groups.filter(name='Support Team').exists() or
-            ticket.created_by == user):
+    if not (is_support_staff(user) or ticket.created_by_id == user.id):
         return Response(
             {"error": "You do not have permission to view this ticket"},
             status=status.HTTP_403_FORBIDDEN
         )
     
     if request.method == "GET":
-        serializer = TicketSerializers(ticket)
-        return Response(serializer.data)
+        include_internal = is_support_staff(user)
+        etag = response_etag(request, ticket_version(ticket, include_internal))
+        response = not_modified(request, etag)
+        if response is None:
+            response = add_etag(
+                Response(render_detail(ticket, include_internal)), etag
+            )
+        return response
     
     # PATCH: Update ticket (Support Team or IT Staff only)
-    if not (user.is_superuser or 
-            user.groups.filter(name='IT Staff').exists() or 
-            user.groups.filter(name='Support Team').exists()):
+    if not is_support_staff(user):
         return Response(
             {"error": "Only support staff can update tickets"},
             status=status.HTTP_403_FORBIDDEN
         )
     
     # Support agents can only update their assigned tickets
-    if (user.groups.filter(name='Support Team').exists() and 
-        ticket.assigned_to != user and not user.is_superuser):
+    if (is_support_agent(user) and
+        ticket.assigned_to_id != user.id and not user.is_superuser):
         return Response(
             {"error": "You can only update tickets assigned to you"},
             status=status.HTTP_403_FORBIDDEN
@@ -210,10 +420,41 @@ def ticket_detail_api(request, ticket_id):
     serializer = TicketSerializers(ticket, data=request.data, partial=True)
     if serializer.is_valid():
         serializer.save()
-        return Response(serializer.data)
+        return Response(render_detail(ticket))
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def ticket_bulk_update_api(request):
+    """
+    API: Apply status/priority/assignment/category changes and an optional
+    shared comment to many tickets in one transaction (Support Team only)
+    Body: {"ids": [...], "changes": {...}, "comment": {"content": ..., "is_internal": ...}}
+    Returns a per-ticket result: updated, not_found or forbidden
+    """
+    if not is_support_staff(request.user):
+        return Response(
+            {"error": "Only support staff can update tickets"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        results = bulk_update_tickets(
+            request.user,
+            request.data.get("ids") or [],
+            changes=request.data.get("changes"),
+            comment=request.data.get("comment"),
+        )
+    except BulkUpdateError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response({
+        "updated": sum(1 for r in results if r["result"] == "updated"),
+        "results": results,
+    })
+
+
 @api_view(["POST"])
 @permission_classes([IsAuthenticated])
 def add_ticket_comment(request, ticket_id):
@@ -228,10 +469,7 @@ def add_ticket_comment(request, ticket_id):
     user = request.user
     
     # Only support staff or ticket creator can comment
-    if not (user.is_superuser or 
-            user.groups.filter(name='IT Staff').exists() or 
-            user.groups.filter(name='Support Team').exists() or
-            ticket.created_by == user):
+    if not (is_support_staff(user) or ticket.created_by_id == user.id):
         return Response(
             {"error": "You do not have permission to comment on this ticket"},
             status=status.HTTP_403_FORBIDDEN
@@ -246,7 +484,7 @@ def add_ticket_comment(request, ticket_id):
     
     serializer = TicketCommentSerializer(data=data)
     if serializer.is_valid():
-        serializer.save(author=user, ticket=ticket)
+        serializer.save(author_id=user.id, ticket=ticket)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -265,10 +503,7 @@ def ticket_comments_api(request, ticket_id):
     user = request.user
     
     # Check permissions
-    if not (user.is_superuser or 
-            user.groups.filter(name='IT Staff').exists() or 
-            user.groups.filter(name='Support Team').exists() or
-            ticket.created_by == user):
+    if not (is_support_staff(user) or ticket.created_by_id == user.id):
         return Response(
             {"error": "You do not have permission to view this ticket"},
             status=status.HTTP_403_FORBIDDEN
@@ -277,15 +512,19 @@ def ticket_comments_api(request, ticket_id):
     from .models import TicketComment
     from .serializers import TicketCommentSerializer
     
+    include_internal = is_support_staff(user)
+    etag = response_etag(request, ticket_version(ticket, include_internal))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
     # Filter comments - hide internal comments from customers
-    comments = ticket.comments.all()
-    if not (user.is_superuser or 
-            user.groups.filter(name='IT Staff').exists() or 
-            user.groups.filter(name='Support Team').exists()):
+    comments = ticket.comments.select_related('author')
+    if not include_internal:
         comments = comments.filter(is_internal=False)
     
     serializer = TicketCommentSerializer(comments, many=True)
-    return Response(serializer.data)
+    return add_etag(Response(serializer.data), etag)
 
 # ---------------------------
 # Admin/Dashboard Views (DRF)
@@ -301,44 +540,47 @@ def admin_dashboard(request):
     user = request.user
     
     # Check admin permissions
-    if not (user.is_superuser or user.groups.filter(name='IT Staff').exists()):
+    if not is_admin(user):
         return Response(
             {"error": "Admin access required"},
             status=status.HTTP_403_FORBIDDEN
         )
     
-    from django.contrib.auth.models import User
-    from django.db.models import Q
-    
-    all_tickets = Ticket.objects.all()
+    # Counters are maintained on write (see stats.py), so this is one small read
+    stats = get_ticket_stats()
     
     dashboard_data = {
-        "total_tickets": all_tickets.count(),
-        "tickets_by_status": dict(
-            all_tickets.values('status').annotate(count=Count('id')).values_list('status', 'count')
-        ),
-        "tickets_by_priority": dict(
-            all_tickets.values('priority').annotate(count=Count('id')).values_list('priority', 'count')
-        ),
-        "unassigned_tickets": all_tickets.filter(assigned_to__isnull=True).count(),
-        "total_users": User.objects.count(),
-        "support_team_count": User.objects.filter(groups__name='Support Team').count(),
+        "total_tickets": stats['total'],
+        "tickets_by_status": stats['by_status'],
+        "tickets_by_priority": stats['by_priority'],
+        "unassigned_tickets": stats['unassigned'],
+        "total_users": stats['users'].get('total', 0),
+        "support_team_count": stats['users'].get(SUPPORT_TEAM, 0),
         "total_categories": Category.objects.count(),
-        "recent_tickets": TicketSerializers(
-            all_tickets.order_by('-created_at')[:5],
-            many=True
-        ).data,
+        "recent_tickets": render_summaries(
+            list(summary_queryset(Ticket.objects.all()).order_by('-created_at', '-id')[:5])
+        ),
     }
     
     return Response(dashboard_data)
 
 
+# Fields admin_users can return; ?fields= picks a subset
+USER_FIELDS = [
+    "id", "username", "email", "first_name", "last_name",
+    "is_staff", "is_superuser", "groups", "date_joined",
+]
+
+
 @api_view(["GET", "POST"])
 @permission_classes([IsAuthenticated])
 def admin_users(request):
     """
     API: Manage users (list and create)
     Only accessible to superusers
+    - GET is cursor-paginated by username and accepts ?group=,
+      ?username= (prefix), ?is_staff=true|false and ?fields=id,username,...
+      to return only the listed fields (e.g. for assignee pickers)
     """
     user = request.user
     
@@ -351,22 +593,42 @@ def admin_users(request):
     from django.contrib.auth.models import User
     
     if request.method == "GET":
+        params = request.query_params
+        fields = [f.strip() for f in params.get("fields", "").split(",") if f.strip()] or USER_FIELDS
+        unknown = set(fields) - set(USER_FIELDS)
+        if unknown:
+            return Response(
+                {"error": f"Unknown fields: {', '.join(sorted(unknown))}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
         users = User.objects.all()
+        if params.get("group"):
+            users = users.filter(groups__name=params["group"])
+        if params.get("username"):
+            users = users.filter(username__startswith=params["username"])
+        if params.get("is_staff") in ("true", "false"):
+            users = users.filter(is_staff=params["is_staff"] == "true")
+        
+        # Only load the columns asked for; groups come in one extra query per page
+        users = users.only("id", "username", *[f for f in fields if f not in ("id", "username", "groups")])
+        if "groups" in fields:
+            users = users.prefetch_related("groups")
+        
+        try:
+            page, next_cursor, prev_cursor = paginate_queryset(
+                request, users, key="username", descending=False
+            )
+        except InvalidCursor as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
         user_data = []
-        for u in users:
-            groups = list(u.groups.values_list('name', flat=True))
-            user_data.append({
-                "id": u.id,
-                "username": u.username,
-                "email": u.email,
-                "first_name": u.first_name,
-                "last_name": u.last_name,
-                "is_staff": u.is_staff,
-                "is_superuser": u.is_superuser,
-                "groups": groups,
-                "date_joined": u.date_joined,
-            })
-        return Response(user_data)
+        for u in page:
+            row = {field: getattr(u, field) for field in fields if field != "groups"}
+            if "groups" in fields:
+                row["groups"] = [g.name for g in u.groups.all()]
+            user_data.append(row)
+        return Response(paginated_response_data(user_data, next_cursor, prev_cursor))
     
     elif request.method == "POST":
         from django.contrib.auth.models import User
@@ -490,8 +752,15 @@ def admin_user_detail(request, user_id):
         })
     
     elif request.method == "DELETE":
-        target_user.delete()
-        return Response({"message": "User deleted successfully"})
+        # Deleting cascades through all of the user's tickets and comments,
+        # so it runs in a background job; deactivating first locks them out
+        target_user.is_active = False
+        target_user.save(update_fields=["is_active"])
+        queued = enqueue(tasks.delete_user, {"user_id": target_user.id})
+        return Response(
+            {"message": "User deletion scheduled", "job": queued.id},
+            status=status.HTTP_202_ACCEPTED
+        )
 
 
 @api_view(["GET", "POST"])
@@ -503,7 +772,7 @@ def admin_categories(request):
     """
     user = request.user
     
-    if not (user.is_superuser or user.groups.filter(name='IT Staff').exists()):
+    if not is_admin(user):
         return Response(
             {"error": "Admin access required"},
             status=status.HTTP_403_FORBIDDEN
@@ -545,7 +814,7 @@ def admin_category_detail(request, category_id):
     """
     user = request.user
     
-    if not (user.is_superuser or user.groups.filter(name='IT Staff').exists()):
+    if not is_admin(user):
         return Response(
             {"error": "Admin access required"},
             status=status.HTTP_403_FORBIDDEN
@@ -572,20 +841,114 @@ def admin_category_detail(request, category_id):
 @permission_classes([IsAuthenticated])
 def admin_ticket_assignments(request):
     """
-    API: Get unassigned tickets for admin assignment
+    API: Get unassigned tickets for admin assignment (cursor paginated)
     Only accessible to superusers and IT Staff
     """
     user = request.user
     
-    if not (user.is_superuser or user.groups.filter(name='IT Staff').exists()):
+    if not is_admin(user):
         return Response(
             {"error": "Admin access required"},
             status=status.HTTP_403_FORBIDDEN
         )
     
-    unassigned = Ticket.objects.filter(assigned_to__isnull=True).order_by('-created_at')
-    serializer = TicketSerializers(unassigned, many=True)
-    return Response(serializer.data)
+    unassigned = summary_queryset(Ticket.objects.filter(assigned_to__isnull=True))
+    
+    try:
+        page, next_cursor, prev_cursor = paginate_queryset(request, unassigned)
+    except InvalidCursor as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    return Response(paginated_response_data(render_summaries(page), next_cursor, prev_cursor))
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def admin_auto_assign(request):
+    """
+    API: Queue a job assigning all open unassigned tickets to the
+    least-loaded agents, highest priority first (optional body: {"limit": n})
+    Poll /api/admin/jobs/<id>/ for the result
+    Only accessible to superusers and IT Staff
+    """
+    user = request.user
+    
+    if not is_admin(user):
+        return Response(
+            {"error": "Admin access required"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    try:
+        limit = int(request.data.get("limit", MAX_AUTO_ASSIGN))
+    except (TypeError, ValueError):
+        return Response({"error": "limit must be a number"}, status=status.HTTP_400_BAD_REQUEST)
+    
+    queued = enqueue(tasks.auto_assign, {
+        "user_id": user.id,
+        "limit": max(0, min(limit, MAX_AUTO_ASSIGN)),
+    })
+    return Response({"job": queued.id, "status": queued.status}, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_jobs(request):
+    """
+    API: Background job queue depth, lag and recent throughput
+    Only accessible to superusers and IT Staff
+    """
+    if not is_admin(request.user):
+        return Response(
+            {"error": "Admin access required"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    return Response(queue_stats())
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_job_detail(request, job_id):
+    """
+    API: Status and result of one background job
+    Only accessible to superusers and IT Staff
+    """
+    if not is_admin(request.user):
+        return Response(
+            {"error": "Admin access required"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    job = Job.objects.filter(id=job_id).values(
+        "id", "name", "status", "attempts", "max_attempts", "result",
+        "last_error", "created_at", "run_at", "finished_at"
+    ).first()
+    if job is None:
+        return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+    return Response(job)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def admin_workload(request):
+    """
+    API: Open-ticket workload per Support Team agent, least loaded first
+    Only accessible to superusers and IT Staff
+    """
+    user = request.user
+    
+    if not is_admin(user):
+        return Response(
+            {"error": "Admin access required"},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    
+    workloads = agent_workloads(is_weighted())
+    data = [
+        {"id": agent_id, **workload}
+        for agent_id, workload in sorted(workloads.items(), key=lambda item: (item[1]["load"], item[0]))
+    ]
+    return Response(data)
 
 
 @api_view(["PATCH"])
@@ -597,14 +960,14 @@ def admin_assign_ticket(request, ticket_id):
     """
     user = request.user
     
-    if not (user.is_superuser or user.groups.filter(name='IT Staff').exists()):
+    if not is_admin(user):
         return Response(
             {"error": "Admin access required"},
             status=status.HTTP_403_FORBIDDEN
         )
     
     try:
-        ticket = Ticket.objects.get(id=ticket_id)
+        ticket = detail_queryset(Ticket.objects.all()).get(id=ticket_id)
     except Ticket.DoesNotExist:
         return Response({"error": "Ticket not found"}, status=status.HTTP_404_NOT_FOUND)
     
@@ -626,7 +989,262 @@ def admin_assign_ticket(request, ticket_id):
         )
     
     ticket.assigned_to = assigned_user
-    ticket.save()
+    ticket.save(update_fields=ticket.edit_fields('assigned_to'))
     
     serializer = TicketSerializers(ticket)
-    return Response(serializer.data)
\ No newline at end of file
+    return Response(serializer.data)
+
+
+# ---------------------------
+# Real-time Events (ASGI)
+# ---------------------------
+
+def _authenticate_stream(raw_token):
+    jwt = StatelessJWTAuthentication()
+    user = jwt.get_user(jwt.get_validated_token(raw_token))
+    return user, is_admin(user), is_support_agent(user)
+
+
+async def _event_stream(channel, heartbeat):
+    # Subscribe on first iteration so the finally below always unsubscribes
+    broker = get_broker()
+    subscription = broker.subscribe(channel)
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield "retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # Comment line keeps idle connections open through proxies
+                yield ": ping\n\n"
+                continue
+            if subscription.overflowed:
+                # Too far behind: the client reconnects and catches up via
+                # /api/tickets/changes/
+                yield "event: reset\ndata: {}\n\n"
+                return
+            yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    finally:
+        broker.unsubscribe(subscription)
+
+
+async def ticket_events_stream(request):
+    """
+    API: Server-Sent Events stream of ticket.created / ticket.updated /
+    ticket.assigned / comment.created events (ASGI only)
+    - Same visibility rules as the ticket list; internal comments are never
+      sent to customers
+    - EventSource cannot set headers, so the JWT access token may be passed
+      as ?token= instead of an Authorization header
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    if "wsgi.version" in request.META:
+        # A WSGI worker would be tied up for the life of the connection
+        return JsonResponse({"error": "Event streams require the ASGI server"}, status=501)
+    
+    header = request.headers.get("Authorization", "")
+    raw_token = header[7:] if header.startswith("Bearer ") else request.GET.get("token")
+    if not raw_token:
+        return JsonResponse({"error": "Authentication credentials were not provided."}, status=401)
+    try:
+        user, admin, agent = await sync_to_async(_authenticate_stream)(raw_token)
+    except (InvalidToken, AuthenticationFailed) as e:
+        return JsonResponse({"error": str(e.detail)}, status=401)
+    
+    heartbeat = getattr(settings, "TICKET_EVENTS_HEARTBEAT", 15)
+    response = StreamingHttpResponse(
+        _event_stream(channel_for(user, admin, agent), heartbeat), content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+# ---------------------------
+# Async read views (ASGI)
+# ---------------------------
+#
+# Async twins of the busiest read endpoints, routed instead of the DRF views
+# when ASYNC_READ_VIEWS is on (see config/urls.py). Under an ASGI server a
+# request waiting on the database or cache is then a suspended coroutine
+# rather than a blocked worker thread. Authentication, visibility rules,
+# ETags, fragment caches and response bodies are those of the DRF
+# views; any method but GET (PATCH on a ticket) is handed to the DRF view.
+#
+# Django's async ORM and cache calls still run in a thread (sync_to_async,
+# one per request), so queries get no faster; manage.py benchmark_asgi
+# compares the throughput with the WSGI deployment.
+
+def _unauthorized(jwt, request, detail):
+    # simplejwt puts a dict in detail when no token type accepts the token
+    if isinstance(detail, dict):
+        detail = detail.get("detail", detail)
+    response = JsonResponse({"error": str(detail)}, status=401)
+    response["WWW-Authenticate"] = jwt.authenticate_header(request)
+    return response
+
+
+def async_read_view(sync_view):
+    """
+    Turn an async GET handler into a view authenticated like sync_view
+    (StatelessJWTAuthentication, IsAuthenticated); other methods go to
+    sync_view
+    """
+    def decorator(handler):
+        @csrf_exempt
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method != "GET":
+                return await sync_to_async(sync_view)(request, *args, **kwargs)
+            
+            jwt = StatelessJWTAuthentication()
+            try:
+                credentials = await jwt.aauthenticate(request)
+            except (InvalidToken, AuthenticationFailed) as e:
+                return _unauthorized(jwt, request, e.detail)
+            if credentials is None:
+                return _unauthorized(jwt, request, "Authentication credentials were not provided.")
+            request.user = credentials[0]
+            return await handler(request, *args, **kwargs)
+        return view
+    return decorator
+
+
+@async_read_view(ticket_list_api)
+async def ticket_list_api_async(request):
+    """
+    API: ticket_list_api on the async ORM
+    """
+    user = request.user
+    visible = _visible_tickets(user)
+    include_internal = is_support_staff(user)
+    
+    sort = request.GET.get('sort', 'created')
+    if sort not in ('created', 'activity'):
+        return JsonResponse({"error": "sort must be 'created' or 'activity'"}, status=400)
+    
+    etag = await aresponse_etag(request, await aticket_list_version(visible, include_internal))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
+    tickets = summary_queryset(visible, include_internal=include_internal)
+    try:
+        page, next_cursor, prev_cursor = await apaginate_queryset(
+            request, tickets, key='last_activity_at' if sort == 'activity' else 'created_at'
+        )
+    except InvalidCursor as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    
+    data = paginated_response_data(await arender_summaries(page), next_cursor, prev_cursor)
+    return add_etag(JsonResponse(data), etag)
+
+
+async def _aget_visible_ticket(request, ticket_id, queryset):
+    """
+    (ticket, None) if the caller may view the ticket, else (None, error response)
+    """
+    try:
+        ticket = await queryset.aget(id=ticket_id)
+    except Ticket.DoesNotExist:
+        return None, JsonResponse({"error": "Ticket not found"}, status=404)
+    user = request.user
+    if not (is_support_staff(user) or ticket.created_by_id == user.id):
+        return None, JsonResponse({"error": "You do not have permission to view this ticket"}, status=403)
+    return ticket, None
+
+
+@async_read_view(ticket_detail_api)
+async def ticket_detail_api_async(request, ticket_id):
+    """
+    API: ticket_detail_api on the async ORM; PATCH goes to ticket_detail_api
+    """
+    ticket, error = await _aget_visible_ticket(
+        request, ticket_id, Ticket.objects.select_related('created_by', 'assigned_to')
+    )
+    if error is not None:
+        return error
+    
+    include_internal = is_support_staff(request.user)
+    etag = await aresponse_etag(request, await aticket_version(ticket, include_internal))
+    response = not_modified(request, etag)
+    if response is None:
+        response = add_etag(
+            JsonResponse(await arender_detail(ticket, include_internal)), etag
+        )
+    return response
+
+
+@async_read_view(ticket_comments_api)
+async def ticket_comments_api_async(request, ticket_id):
+    """
+    API: ticket_comments_api on the async ORM
+    """
+    ticket, error = await _aget_visible_ticket(request, ticket_id, Ticket.objects.all())
+    if error is not None:
+        return error
+    
+    include_internal = is_support_staff(request.user)
+    etag = await aresponse_etag(request, await aticket_version(ticket, include_internal))
+    response = not_modified(request, etag)
+    if response is not None:
+        return response
+    
+    # Filter comments - hide internal comments from customers
+    comments = ticket.comments.select_related('author')
+    if not include_internal:
+        comments = comments.filter(is_internal=False)
+    
+    data = TicketCommentSerializer([comment async for comment in comments], many=True).data
+    return add_etag(JsonResponse(data, safe=False), etag)
+
+
+@async_read_view(admin_dashboard)
+async def admin_dashboard_async(request):
+    """
+    API: admin_dashboard on the async ORM
+    """
+    if not is_admin(request.user):
+        return JsonResponse({"error": "Admin access required"}, status=403)
+    
+    stats = await aget_ticket_stats()
+    recent = summary_queryset(Ticket.objects.all()).order_by('-created_at', '-id')[:5]
+    
+    return JsonResponse({
+        "total_tickets": stats['total'],
+        "tickets_by_status": stats['by_status'],
+        "tickets_by_priority": stats['by_priority'],
+        "unassigned_tickets": stats['unassigned'],
+        "total_users": stats['users'].get('total', 0),
+        "support_team_count": stats['users'].get(SUPPORT_TEAM, 0),
+        "total_categories": await Category.objects.acount(),
+        "recent_tickets": await arender_summaries([ticket async for ticket in recent]),
+    })
+
+
+# ---------------------------
+# Metrics (Prometheus)
+# ---------------------------
+
+def metrics_view(request):
+    """
+    Prometheus scrape target: request, latency and query metrics of every
+    worker plus the ticket gauges, in the text exposition format
+    - Plain Django view, so scrapes skip JWT authentication; when
+      METRICS_TOKEN is set the scraper must send it as a Bearer token
+    """
+    if request.method != "GET":
+        return JsonResponse({"error": "Method not allowed"}, status=405)
+    if not getattr(settings, "METRICS_ENABLED", True):
+        return JsonResponse({"error": "Metrics are disabled"}, status=404)
+    
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return JsonResponse({"error": "Invalid metrics token"}, status=401)
+    
+    response = HttpResponse(exposition(), content_type=CONTENT_TYPE_LATEST)
+    response["Cache-Control"] = "no-store"
+    return response
@@ -12,35 +12,31 @@ function App() {
   );
   const [selectedTicketId, setSelectedTicketId] = useState(null);
   const [showCreateTicket, setShowCreateTicket] = useState(false);
+  const [me, setMe] = useState(null);
   const [userRole, setUserRole] = useState(null);
   const [loadingRole, setLoadingRole] = useState(true);
 
   useEffect(() => {
-    const checkUserRole = async () => {
+    const loadMe = async () => {
       if (!authenticated) {
         setLoadingRole(false);
         return;
       }
 
       try {
-        // Try to fetch admin dashboard to determine if user is admin
-        await api.get("api/admin/dashboard/");
-        setUserRole("admin");
+        // Role and capabilities in one cheap, cacheable call
+        const res = await api.get("api/me/");
+        setMe(res.data);
+        setUserRole(res.data.capabilities.includes("admin") ? "admin" : "user");
       } catch (err) {
-        // Check if user can access support team endpoints
-        try {
-          await api.get("api/tickets/");
-          // If we get here, user can access tickets
-          setUserRole("user");
-        } catch (e) {
-          setUserRole("user");
-        }
+        console.error("Error loading user:", err);
+        setUserRole("user");
       } finally {
         setLoadingRole(false);
       }
     };
 
-    checkUserRole();
+    loadMe();
   }, [authenticated]);
 
   const handleLogout = () => {
@@ -49,6 +45,7 @@ function App() {
     setAuthenticated(false);
     setSelectedTicketId(null);
     setShowCreateTicket(false);
+    setMe(null);
     setUserRole(null);
   };
 
@@ -150,11 +147,13 @@ function App() {
           <CreateTicket onSuccess={handleTicketCreated} />
         ) : selectedTicketId ? (
           <TicketDetail
+            me={me}
             ticketId={selectedTicketId}
             onBack={() => setSelectedTicketId(null)}
           />
         ) : (
           <Tickets 
+            me={me}
             onSelectTicket={setSelectedTicketId}
             onCreateClick={() => setShowCreateTicket(true)}
           />
@@ -2,14 +2,72 @@ import axios from "axios";
 
 const api = axios.create({
     baseURL: "http://127.0.0.1:8000/",
+    // 304 Not Modified is answered from the cache below
+    validateStatus: status => (status >= 200 && status < 300) || status === 304,
 })
 
+// Last ETag and body per GET url, replayed when the server answers 304
+const conditionalCache = new Map();
+
+const cacheKey = config => api.getUri(config);
+
+// Token refresh in flight, shared by requests that got a 401 at the same time
+let refreshing = null;
+
 api.interceptors.request.use(config => {
   const token = localStorage.getItem("access");
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  if ((config.method || "get").toLowerCase() === "get") {
+    const cached = conditionalCache.get(cacheKey(config));
+    if (cached && cached.token === token) {
+      config.headers["If-None-Match"] = cached.etag;
+    }
+  }
   return config;
 });
 
-export default api;
\ No newline at end of file
+api.interceptors.response.use(response => {
+  const { config } = response;
+  if ((config.method || "get").toLowerCase() !== "get") {
+    return response;
+  }
+  const key = cacheKey(config);
+  if (response.status === 304) {
+    const cached = conditionalCache.get(key);
+    if (cached) {
+      return { ...response, status: 200, data: cached.data };
+    }
+    return response;
+  }
+  const etag = response.headers.etag;
+  if (etag) {
+    conditionalCache.set(key, {
+      etag,
+      data: response.data,
+      token: localStorage.getItem("access"),
+    });
+  }
+  return response;
+}, async error => {
+  // Access tokens carry the user's roles; after a role change (or expiry)
+  // the API answers 401 and a refreshed token has the current ones
+  const { config, response } = error;
+  const refresh = localStorage.getItem("refresh");
+  if (response?.status !== 401 || !refresh || config._retried || config.url.startsWith("api/token/")) {
+    return Promise.reject(error);
+  }
+  refreshing = refreshing || api.post("api/token/refresh/", { refresh })
+    .then(res => localStorage.setItem("access", res.data.access))
+    .finally(() => { refreshing = null; });
+  try {
+    await refreshing;
+  } catch {
+    return Promise.reject(error);
+  }
+  config._retried = true;
+  return api(config);
+});
+
+export default api;
@@ -334,6 +334,10 @@ function UserManagement() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showForm, setShowForm] = useState(false);
+  const [search, setSearch] = useState("");
+  const [cursor, setCursor] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [prevCursor, setPrevCursor] = useState(null);
   const [formData, setFormData] = useState({
     username: "",
     email: "",
@@ -345,12 +349,17 @@ function UserManagement() {
 
   useEffect(() => {
     fetchUsers();
-  }, []);
+  }, [cursor, search]);
 
   const fetchUsers = async () => {
     try {
-      const res = await api.get("api/admin/users/");
-      setUsers(res.data);
+      const params = {};
+      if (cursor) params.cursor = cursor;
+      if (search) params.username = search;
+      const res = await api.get("api/admin/users/", { params });
+      setUsers(res.data.results);
+      setNextCursor(res.data.next);
+      setPrevCursor(res.data.prev);
     } catch (err) {
       console.error("Error loading users:", err);
       setError("Failed to load users");
@@ -528,6 +537,24 @@ function UserManagement() {
 
       {error && <p style={{ color: "#991b1b" }}>{error}</p>}
 
+      <input
+        type="text"
+        placeholder="Search by username prefix"
+        value={search}
+        onChange={(e) => {
+          setSearch(e.target.value);
+          setCursor(null);
+        }}
+        style={{
+          width: "100%",
+          padding: "0.75rem",
+          border: "1px solid #d1d5db",
+          borderRadius: "6px",
+          marginBottom: "1rem",
+          boxSizing: "border-box",
+        }}
+      />
+
       <div style={{ display: "grid", gap: "1rem" }}>
         {users.map((user) => (
           <div
@@ -587,6 +614,39 @@ function UserManagement() {
           </div>
         ))}
       </div>
+
+      {(prevCursor || nextCursor) && (
+        <div style={{ display: "flex", justifyContent: "space-between", marginTop: "1.5rem" }}>
+          <button
+            onClick={() => setCursor(prevCursor)}
+            disabled={!prevCursor}
+            style={{
+              padding: "0.5rem 1rem",
+              backgroundColor: prevCursor ? "#2563eb" : "#e5e7eb",
+              color: prevCursor ? "white" : "#9ca3af",
+              border: "none",
+              borderRadius: "6px",
+              cursor: prevCursor ? "pointer" : "not-allowed",
+            }}
+          >
+            ← Previous
+          </button>
+          <button
+            onClick={() => setCursor(nextCursor)}
+            disabled={!nextCursor}
+            style={{
+              padding: "0.5rem 1rem",
+              backgroundColor: nextCursor ? "#2563eb" : "#e5e7eb",
+              color: nextCursor ? "white" : "#9ca3af",
+              border: "none",
+              borderRadius: "6px",
+              cursor: nextCursor ? "pointer" : "not-allowed",
+            }}
+          >
+            Next →
+          </button>
+        </div>
+      )}
     </div>
   );
 }
@@ -730,18 +790,21 @@ function TicketAssignments() {
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [selectedAgent, setSelectedAgent] = useState({});
+  const [cursor, setCursor] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [prevCursor, setPrevCursor] = useState(null);
+  const [refresh, setRefresh] = useState(0);
+  const [autoAssigning, setAutoAssigning] = useState(false);
 
   useEffect(() => {
     const fetchData = async () => {
       try {
-        const ticketsRes = await api.get("api/admin/assignments/");
-        setUnassignedTickets(ticketsRes.data);
-
-        const usersRes = await api.get("api/admin/users/");
-        const agents = usersRes.data.filter((u) =>
-          u.groups.includes("Support Team")
-        );
-        setSupportAgents(agents);
+        const ticketsRes = await api.get("api/admin/assignments/", {
+          params: cursor ? { cursor } : {},
+        });
+        setUnassignedTickets(ticketsRes.data.results);
+        setNextCursor(ticketsRes.data.next);
+        setPrevCursor(ticketsRes.data.prev);
       } catch (err) {
         console.error("Error loading data:", err);
         setError("Failed to load data");
@@ -751,6 +814,35 @@ function TicketAssignments() {
     };
 
     fetchData();
+  }, [cursor, refresh]);
+
+  // Assignee picker: only the Support Team and only the fields it shows,
+  // loaded once rather than on every page change
+  useEffect(() => {
+    const fetchAgents = async () => {
+      try {
+        const agents = [];
+        let agentCursor = null;
+        do {
+          const res = await api.get("api/admin/users/", {
+            params: {
+              group: "Support Team",
+              fields: "id,username,first_name,last_name",
+              page_size: 100,
+              ...(agentCursor ? { cursor: agentCursor } : {}),
+            },
+          });
+          agents.push(...res.data.results);
+          agentCursor = res.data.next;
+        } while (agentCursor);
+        setSupportAgents(agents);
+      } catch (err) {
+        console.error("Error loading agents:", err);
+        setError("Failed to load support agents");
+      }
+    };
+
+    fetchAgents();
   }, []);
 
   const handleAssign = async (ticketId, userId) => {
@@ -769,12 +861,57 @@ function TicketAssignments() {
     }
   };
 
+  // Hand every open unassigned ticket to the least-loaded agents; the
+  // server runs it as a background job, so poll until it finishes
+  const handleAutoAssign = async () => {
+    setAutoAssigning(true);
+    try {
+      const res = await api.post("api/admin/assignments/auto/");
+      let job = res.data;
+      while (job.status === "queued" || job.status === "running") {
+        await new Promise((resolve) => setTimeout(resolve, 1000));
+        job = (await api.get(`api/admin/jobs/${res.data.job}/`)).data;
+      }
+      if (job.status === "failed") {
+        throw new Error(job.last_error);
+      }
+      alert(`Assigned ${job.result.assigned} ticket(s)`);
+      setCursor(null);
+      setRefresh((n) => n + 1);
+    } catch (err) {
+      console.error("Error auto-assigning tickets:", err);
+      alert("Failed to auto-assign tickets");
+    } finally {
+      setAutoAssigning(false);
+    }
+  };
+
   if (loading) return <p>Loading...</p>;
 
   return (
     <div>
       {error && <p style={{ color: "#991b1b" }}>{error}</p>}
 
+      {unassignedTickets.length > 0 && (
+        <div style={{ display: "flex", justifyContent: "flex-end", marginBottom: "1rem" }}>
+          <button
+            onClick={handleAutoAssign}
+            disabled={autoAssigning}
+            style={{
+              padding: "0.75rem 1.5rem",
+              backgroundColor: autoAssigning ? "#e5e7eb" : "#059669",
+              color: autoAssigning ? "#9ca3af" : "white",
+              border: "none",
+              borderRadius: "6px",
+              cursor: autoAssigning ? "not-allowed" : "pointer",
+              fontWeight: "500",
+            }}
+          >
+            {autoAssigning ? "Assigning..." : "Auto-assign all"}
+          </button>
+        </div>
+      )}
+
       {unassignedTickets.length === 0 ? (
         <div
           style={{
@@ -859,6 +996,39 @@ function TicketAssignments() {
           ))}
         </div>
       )}
+
+      {(prevCursor || nextCursor) && (
+        <div style={{ display: "flex", justifyContent: "space-between", marginTop: "1.5rem" }}>
+          <button
+            onClick={() => setCursor(prevCursor)}
+            disabled={!prevCursor}
+            style={{
+              padding: "0.5rem 1rem",
+              backgroundColor: prevCursor ? "#2563eb" : "#e5e7eb",
+              color: prevCursor ? "white" : "#9ca3af",
+              border: "none",
+              borderRadius: "6px",
+              cursor: prevCursor ? "pointer" : "not-allowed",
+            }}
+          >
+            ← Newer
+          </button>
+          <button
+            onClick={() => setCursor(nextCursor)}
+            disabled={!nextCursor}
+            style={{
+              padding: "0.5rem 1rem",
+              backgroundColor: nextCursor ? "#2563eb" : "#e5e7eb",
+              color: nextCursor ? "white" : "#9ca3af",
+              border: "none",
+              borderRadius: "6px",
+              cursor: nextCursor ? "pointer" : "not-allowed",
+            }}
+          >
+            Older →
+          </button>
+        </div>
+      )}
     </div>
   );
 }
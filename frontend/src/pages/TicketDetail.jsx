@@ -1,7 +1,7 @@
 import { useEffect, useState } from "react";
 import api from "../api/axios";
 
-function TicketDetail({ ticketId, onBack }) {
+function TicketDetail({ me, ticketId, onBack }) {
   const [ticket, setTicket] = useState(null);
   const [comments, setComments] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -10,8 +10,11 @@ function TicketDetail({ ticketId, onBack }) {
   const [isInternal, setIsInternal] = useState(false);
   const [submittingComment, setSubmittingComment] = useState(false);
   const [updatingStatus, setUpdatingStatus] = useState(false);
-  const [canUpdateStatus, setCanUpdateStatus] = useState(false);
-  const [userRole, setUserRole] = useState("customer");
+  const capabilities = me?.capabilities || [];
+  const userRole = capabilities.includes("internal_comments") ? "support" : "customer";
+  // Same rule as PATCH api/tickets/<id>/: agents only update their own tickets
+  const canUpdateStatus = capabilities.includes("update_any")
+    || (capabilities.includes("update_assigned") && ticket?.assigned_to === me?.id);
 
   useEffect(() => {
     const fetchTicketData = async () => {
@@ -22,23 +25,6 @@ function TicketDetail({ ticketId, onBack }) {
 
         const commentsRes = await api.get(`api/tickets/${ticketId}/comments/`);
         setComments(commentsRes.data);
-
-        // Check if user can update status
-        try {
-          await api.get("api/admin/dashboard/");
-          setUserRole("admin");
-          setCanUpdateStatus(true);
-        } catch {
-          // Check if they're a support agent
-          try {
-            await api.patch(`api/tickets/${ticketId}/`, { status: ticket?.status });
-            setUserRole("support");
-            setCanUpdateStatus(true);
-          } catch {
-            setUserRole("customer");
-            setCanUpdateStatus(false);
-          }
-        }
       } catch (err) {
         console.error("Error loading ticket:", err);
         setError("Failed to load ticket details");
@@ -286,6 +272,24 @@ function TicketDetail({ ticketId, onBack }) {
             <span>Last Updated: </span>
             <strong>{new Date(ticket.updated_at).toLocaleString()}</strong>
           </div>
+          {ticket.first_response_due_at && (
+            <div>
+              <span>First response: </span>
+              <strong>
+                {ticket.first_responded_at
+                  ? new Date(ticket.first_responded_at).toLocaleString()
+                  : `due ${new Date(ticket.first_response_due_at).toLocaleString()}`}
+              </strong>
+            </div>
+          )}
+          {ticket.due_at && (
+            <div>
+              <span>Resolve by: </span>
+              <strong style={{ color: ticket.sla_state === "breached" ? "#991b1b" : ticket.sla_state === "at_risk" ? "#d97706" : undefined }}>
+                {new Date(ticket.due_at).toLocaleString()}
+              </strong>
+            </div>
+          )}
         </div>
       </div>
 
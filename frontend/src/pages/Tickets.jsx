@@ -1,27 +1,71 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import api from "../api/axios";
 
-function Tickets({ onSelectTicket, onCreateClick }) {
+// How often the newest page polls api/tickets/changes/ for updates
+const POLL_INTERVAL_MS = 5000;
+// Tickets per page; merged updates never grow the page past it
+const PAGE_SIZE = 25;
+
+// Merge a changes feed response into the newest page for the given sort
+function mergeChanges(current, { updated, deleted }, sort) {
+  const gone = new Set(deleted);
+  const changed = new Map(updated.map(ticket => [ticket.id, ticket]));
+  if (sort === "activity") {
+    // Anything that changed is now the most recently active
+    const moved = [...changed.values()].sort(
+      (a, b) => new Date(b.last_activity_at) - new Date(a.last_activity_at)
+    );
+    const rest = current.filter(ticket => !gone.has(ticket.id) && !changed.has(ticket.id));
+    return [...moved, ...rest];
+  }
+  // Only tickets created after the newest row belong above it; older ones
+  // that changed elsewhere keep their place on a later page
+  const known = new Set(current.map(ticket => ticket.id));
+  const newest = current.length ? new Date(current[0].created_at) : null;
+  const added = updated
+    .filter(ticket => !known.has(ticket.id) && (!newest || new Date(ticket.created_at) > newest))
+    .sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
+  const kept = current
+    .filter(ticket => !gone.has(ticket.id))
+    .map(ticket => changed.get(ticket.id) || ticket);
+  return [...added, ...kept];
+}
+
+function Tickets({ me, onSelectTicket, onCreateClick }) {
   const [tickets, setTickets] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
-  const [userRole, setUserRole] = useState(null);
   const [refreshTrigger, setRefreshTrigger] = useState(0);
+  const [cursor, setCursor] = useState(null);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [prevCursor, setPrevCursor] = useState(null);
+  // "created" (newest first) or "activity" (latest comment or edit first)
+  const [sort, setSort] = useState("created");
+  // Delta-sync cursor; a ref so advancing it does not restart the stream
+  const syncCursor = useRef(null);
+  const [syncReady, setSyncReady] = useState(false);
+  // Latest rendered page, for merging outside a state updater
+  const ticketsRef = useRef(tickets);
+  useEffect(() => {
+    ticketsRef.current = tickets;
+  }, [tickets]);
 
   useEffect(() => {
     const fetchTickets = async () => {
       try {
-        const res = await api.get("api/tickets/");
-        setTickets(res.data);
-        
-        // Determine user role based on the tickets they can see
-        // If they can see admin endpoints, they're admin
-        try {
-          await api.get("api/admin/dashboard/");
-          setUserRole("admin");
-        } catch {
-          setUserRole("customer");
+        // Take the sync baseline before the list so no change falls in between
+        setSyncReady(false);
+        if (!cursor) {
+          const changes = await api.get("api/tickets/changes/");
+          syncCursor.current = changes.data.cursor;
         }
+        const res = await api.get("api/tickets/", {
+          params: cursor ? { cursor, sort, page_size: PAGE_SIZE } : { sort, page_size: PAGE_SIZE },
+        });
+        setTickets(res.data.results);
+        setNextCursor(res.data.next);
+        setPrevCursor(res.data.prev);
+        setSyncReady(!cursor);
       } catch (err) {
         console.error("API error:", err);
         setError("Failed to load tickets");
@@ -31,13 +75,73 @@ function Tickets({ onSelectTicket, onCreateClick }) {
     };
 
     fetchTickets();
-  }, [refreshTrigger]);
+  }, [refreshTrigger, cursor, sort]);
+
+  // On the newest page, merge in tickets changed since the last sync. Pushed
+  // events (api/tickets/events/) trigger a sync right away; polling is the
+  // fallback when the stream is unavailable.
+  useEffect(() => {
+    if (!syncReady) return;
+
+    const syncNow = async () => {
+      try {
+        const res = await api.get("api/tickets/changes/", {
+          params: { since: syncCursor.current },
+        });
+        if (res.data.reset) {
+          setRefreshTrigger((prev) => prev + 1);
+          return;
+        }
+        const merged = mergeChanges(ticketsRef.current, res.data, sort);
+        setTickets(merged.slice(0, PAGE_SIZE));
+        syncCursor.current = res.data.cursor;
+        if (merged.length > PAGE_SIZE) {
+          // The rows pushed off the end now start the next page; reload so
+          // the pager's cursors do not skip them
+          setRefreshTrigger((prev) => prev + 1);
+        }
+      } catch (err) {
+        console.error("Sync error:", err);
+      }
+    };
+
+    const timer = setInterval(syncNow, POLL_INTERVAL_MS);
+
+    let events = null;
+    const token = localStorage.getItem("access");
+    if (token && window.EventSource) {
+      events = new EventSource(
+        api.getUri({ url: "api/tickets/events/", params: { token } })
+      );
+      ["ticket.created", "ticket.updated", "ticket.assigned", "comment.created", "reset"]
+        .forEach(type => events.addEventListener(type, syncNow));
+    }
+
+    return () => {
+      clearInterval(timer);
+      if (events) events.close();
+    };
+  }, [syncReady, sort]);
+
+  const canCreate = !!me && me.capabilities.includes("create_ticket")
+    && !me.capabilities.includes("admin");
 
   const handleTicketCreated = (newTicket) => {
     setTickets([newTicket, ...tickets]);
+    setCursor(null);
     setRefreshTrigger((prev) => prev + 1);
   };
 
+  const pagerButtonStyle = (enabled) => ({
+    padding: "0.5rem 1rem",
+    backgroundColor: enabled ? "#2563eb" : "#e5e7eb",
+    color: enabled ? "white" : "#9ca3af",
+    border: "none",
+    borderRadius: "6px",
+    cursor: enabled ? "pointer" : "not-allowed",
+    fontWeight: "500",
+  });
+
   const getStatusColor = (status) => {
     switch(status?.toLowerCase()) {
       case 'open':
@@ -94,10 +198,23 @@ function Tickets({ onSelectTicket, onCreateClick }) {
         <div>
           <h1 style={{ margin: "0 0 0.5rem 0" }}>Your Support Tickets</h1>
           <p style={{ color: "#6b7280", margin: 0 }}>
-            Total tickets: <strong>{tickets.length}</strong>
+            Showing: <strong>{tickets.length}</strong> tickets
+            <span style={{ marginLeft: "1rem" }}>
+              Sort by:{" "}
+              <select
+                value={sort}
+                onChange={(e) => {
+                  setSort(e.target.value);
+                  setCursor(null);
+                }}
+              >
+                <option value="created">Newest</option>
+                <option value="activity">Recent activity</option>
+              </select>
+            </span>
           </p>
         </div>
-        {userRole === "customer" && (
+        {canCreate && (
           <button
             onClick={onCreateClick}
             style={{
@@ -127,7 +244,7 @@ function Tickets({ onSelectTicket, onCreateClick }) {
           <p style={{ fontSize: "1.125rem", color: "#6b7280", marginBottom: "1.5rem" }}>
             No tickets yet
           </p>
-          {userRole === "customer" && (
+          {canCreate && (
             <button
               onClick={onCreateClick}
               style={{
@@ -205,6 +322,20 @@ function Tickets({ onSelectTicket, onCreateClick }) {
                     {ticket.priority} Priority
                   </div>
                 )}
+
+                {ticket.sla_state && (
+                  <div style={{
+                    display: "inline-block",
+                    padding: "0.375rem 0.75rem",
+                    backgroundColor: ticket.sla_state === "breached" ? "#991b1b" : "#d97706",
+                    color: "white",
+                    borderRadius: "4px",
+                    fontSize: "0.875rem",
+                    fontWeight: "500"
+                  }}>
+                    {ticket.sla_state === "breached" ? "SLA breached" : "SLA at risk"}
+                  </div>
+                )}
               </div>
 
               {ticket.description && (
@@ -216,14 +347,19 @@ function Tickets({ onSelectTicket, onCreateClick }) {
 
               <div style={{ marginTop: "1rem", paddingTop: "1rem", borderTop: "1px solid #e5e7eb", fontSize: "0.875rem", color: "#6b7280" }}>
                 <span>Created: {new Date(ticket.created_at).toLocaleDateString()}</span>
+                {ticket.last_activity_at && (
+                  <span style={{ marginLeft: "1rem" }}>
+                    Last activity: {new Date(ticket.last_activity_at).toLocaleString()}
+                  </span>
+                )}
                 {ticket.assigned_to_username && (
                   <span style={{ marginLeft: "1rem" }}>
                     Assigned to: <strong>{ticket.assigned_to_username}</strong>
                   </span>
                 )}
-                {ticket.comments && ticket.comments.length > 0 && (
+                {ticket.comment_count > 0 && (
                   <span style={{ marginLeft: "1rem" }}>
-                    Comments: <strong>{ticket.comments.length}</strong>
+                    Comments: <strong>{ticket.comment_count}</strong>
                   </span>
                 )}
               </div>
@@ -231,6 +367,25 @@ function Tickets({ onSelectTicket, onCreateClick }) {
           ))}
         </div>
       )}
+
+      {(prevCursor || nextCursor) && (
+        <div style={{ display: "flex", justifyContent: "space-between", marginTop: "1.5rem" }}>
+          <button
+            onClick={() => setCursor(prevCursor)}
+            disabled={!prevCursor}
+            style={pagerButtonStyle(!!prevCursor)}
+          >
+            ← Newer
+          </button>
+          <button
+            onClick={() => setCursor(nextCursor)}
+            disabled={!nextCursor}
+            style={pagerButtonStyle(!!nextCursor)}
+          >
+            Older →
+          </button>
+        </div>
+      )}
     </div>
   );
 }